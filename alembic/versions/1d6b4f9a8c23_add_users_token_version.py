@@ -0,0 +1,28 @@
+"""Add token_version to users
+
+Revision ID: 1d6b4f9a8c23
+Revises: f5a9c3d81b47
+Create Date: 2026-10-17 15:02:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d6b4f9a8c23'
+down_revision: Union[str, None] = 'f5a9c3d81b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,47 @@
+"""Add user-scoped composite indexes on contacts
+
+Revision ID: c4e8a1b6f052
+Revises: 8b27e5c4d913
+Create Date: 2026-10-17 11:47:09.630218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1b6f052'
+down_revision: Union[str, None] = '8b27e5c4d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, id) already exists as ix_contacts_user_id_id (revision 3c1f2a9d7e41)
+    op.create_index(
+        'ix_contacts_user_id_last_name_first_name',
+        'contacts',
+        ['user_id', 'last_name', 'first_name'],
+        unique=False,
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_contacts_user_id_birthday_month_day',
+            'contacts',
+            [
+                'user_id',
+                sa.text('EXTRACT(month FROM birthday)'),
+                sa.text('EXTRACT(day FROM birthday)'),
+            ],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_contacts_user_id_birthday_month_day', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_last_name_first_name', table_name='contacts')
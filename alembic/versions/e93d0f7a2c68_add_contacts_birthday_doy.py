@@ -0,0 +1,56 @@
+"""Add precomputed birthday_doy column to contacts
+
+Revision ID: e93d0f7a2c68
+Revises: c4e8a1b6f052
+Create Date: 2026-10-17 12:26:55.871340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93d0f7a2c68'
+down_revision: Union[str, None] = 'c4e8a1b6f052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('birthday_doy', sa.Integer(), nullable=True))
+
+    # Day of year in a leap-year calendar (Feb 29 = 60), same as models.birthday_day_of_year
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "UPDATE contacts SET birthday_doy = EXTRACT(DOY FROM make_date("
+            "2000, EXTRACT(MONTH FROM birthday)::int, EXTRACT(DAY FROM birthday)::int"
+            ")) WHERE birthday IS NOT NULL"
+        )
+        op.drop_index('ix_contacts_user_id_birthday_month_day', table_name='contacts')
+    else:
+        op.execute(
+            "UPDATE contacts SET birthday_doy = CAST(strftime('%j', '2000-' || strftime('%m-%d', birthday)) AS INTEGER) "
+            "WHERE birthday IS NOT NULL"
+        )
+
+    op.create_index('ix_contacts_user_id_birthday_doy', 'contacts', ['user_id', 'birthday_doy'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_birthday_doy', table_name='contacts')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_contacts_user_id_birthday_month_day',
+            'contacts',
+            [
+                'user_id',
+                sa.text('EXTRACT(month FROM birthday)'),
+                sa.text('EXTRACT(day FROM birthday)'),
+            ],
+            unique=False,
+        )
+    op.drop_column('contacts', 'birthday_doy')
@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
 from redis import asyncio as aioredis
 from fastapi_limiter import FastAPILimiter
 
@@ -22,17 +24,173 @@ def get_database_url():
 # Отримуємо URL бази даних
 SQLALCHEMY_DATABASE_URL = get_database_url()
 
+# Режим роботи з БД: "sync" (SessionLocal) або "async" (AsyncSession)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+# Функція для отримання URL асинхронного драйвера (asyncpg / aiosqlite)
+def get_async_database_url():
+    async_url = os.getenv("ASYNC_DATABASE_URL")
+    if async_url:
+        return async_url
+    return to_async_url(SQLALCHEMY_DATABASE_URL or "")
+
+# Функція для заміни синхронного драйвера в URL на асинхронний
+def to_async_url(database_url):
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if database_url.startswith(prefix):
+            return async_prefix + database_url[len(prefix):]
+    return database_url
+
+ASYNC_DATABASE_URL = get_async_database_url()
+
+# Пул з'єднань з БД на кожен воркер uvicorn: усього до WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Ліміт часу виконання одного запиту в PostgreSQL, мс (0 - без ліміту)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# За PgBouncer (transaction pooling): без власного пулу (NullPool) і без підготовлених запитів asyncpg
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+# Кількість воркерів uvicorn (uvicorn --workers читає ту саму змінну)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Репліки для читання (URL через кому): читання контактів іде на них, запис - на основну БД.
+# Після запису користувача його читання REPLICA_PIN_SECONDS секунд ідуть на основну БД (read-your-writes),
+# недоступна репліка пропускається REPLICA_RETRY_SECONDS секунд
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+# Функція для отримання параметрів двигуна БД (спільна для синхронного і асинхронного)
+def get_engine_options(database_url):
+    url = make_url(database_url)
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    connect_args = {}
+    if DB_PGBOUNCER:
+        # З'єднання тримає PgBouncer; власний пул лише займав би його слоти
+        options["poolclass"] = NullPool
+    elif url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        # SQLite у пам'яті має власний пул без цих параметрів
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if url.get_backend_name() == "postgresql":
+        asyncpg = url.get_driver_name() == "asyncpg"
+        if DB_PGBOUNCER and asyncpg:
+            # Підготовлені запити прив'язані до серверного з'єднання, яке PgBouncer міняє між транзакціями
+            connect_args.update(statement_cache_size=0, prepared_statement_cache_size=0)
+        if DB_STATEMENT_TIMEOUT_MS and not DB_PGBOUNCER:
+            # PgBouncer відхиляє параметри старту; там ліміт задається через ALTER ROLE ... SET statement_timeout
+            if asyncpg:
+                connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+            else:
+                connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+# Функція для створення синхронного двигуна БД
+def create_db_engine(database_url=None):
+    database_url = database_url or SQLALCHEMY_DATABASE_URL
+    return create_engine(database_url, **get_engine_options(database_url))
+
+# Пагінація списків контактів (keyset): розмір сторінки за замовчуванням і максимум
+CONTACTS_PAGE_SIZE = int(os.getenv("CONTACTS_PAGE_SIZE", "50"))
+CONTACTS_MAX_PAGE_SIZE = int(os.getenv("CONTACTS_MAX_PAGE_SIZE", "500"))
+
+# Експорт контактів: кількість рядків, що читаються з курсора БД за раз
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Масовий імпорт контактів: розмір пакета для валідації та INSERT ... RETURNING
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "500"))
+BULK_IMPORT_MAX_BATCH_SIZE = int(os.getenv("BULK_IMPORT_MAX_BATCH_SIZE", "5000"))
+
+# Вікно пошуку найближчих днів народження (у днях)
+BIRTHDAY_LOOKAHEAD_DAYS = int(os.getenv("BIRTHDAY_LOOKAHEAD_DAYS", "7"))
+
+# Щоденний дайджест днів народження в Redis (фонове завдання)
+BIRTHDAY_DIGEST_ENABLED = os.getenv("BIRTHDAY_DIGEST_ENABLED", "true").lower() == "true"
+BIRTHDAY_DIGEST_TTL = int(os.getenv("BIRTHDAY_DIGEST_TTL", str(2 * 24 * 3600)))
+
+# Хешування паролів (bcrypt) в окремих процесах; 0 процесів — у пулі потоків.
+# Якщо в черзі вже стільки запитів, нові одразу отримують 503
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# Черга листів (email_outbox) і фоновий відправник з повторними спробами
+EMAIL_WORKER_ENABLED = os.getenv("EMAIL_WORKER_ENABLED", "true").lower() == "true"
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_WORKER_CONCURRENCY = int(os.getenv("EMAIL_WORKER_CONCURRENCY", "10"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "1"))
+EMAIL_SEND_TIMEOUT = float(os.getenv("EMAIL_SEND_TIMEOUT", "10"))
+# Після стількох невдалих спроб лист переходить у dead-letter (status = "dead")
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "5"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+
 # Отримуємо URL Redis
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+# Кеш автентифікованих користувачів (Redis + необов'язковий локальний LRU)
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+# Локальний LRU у процесі; 0 вимикає. Інвалідація бачить лише свій процес,
+# тому TTL локального рівня має бути коротким
+USER_CACHE_LOCAL_SIZE = int(os.getenv("USER_CACHE_LOCAL_SIZE", "0"))
+USER_CACHE_LOCAL_TTL = int(os.getenv("USER_CACHE_LOCAL_TTL", "5"))
+
+# Кеш уже перевірених JWT у процесі (ключ — SHA-256 токена); запис живе не довше за exp
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+# Кеш відповідей GET /contacts/, /contacts/{id} і /contacts/search/ у Redis.
+# Записи користувача скидаються одним INCR його лічильника поколінь при будь-якій зміні контактів
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# Метрики Prometheus на /metrics (латентність маршрутів, SQL-запити, пул з'єднань, bcrypt, кеші)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Профілювання SQL для налагодження: "off", "header" (лише запити із заголовком X-SQL-Profile: 1)
+# або "always". Однакові SELECT, виконані щонайменше SQL_N_PLUS_ONE_THRESHOLD разів, позначаються як N+1
+SQL_PROFILING = os.getenv("SQL_PROFILING", "off").lower()
+SQL_PROFILE_HEADER = os.getenv("SQL_PROFILE_HEADER", "X-SQL-Profile")
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "3"))
+
+# Відкликані токени (logout, ротація refresh, адмін): Redis + локальний bloom-фільтр,
+# який кожні REVOCATION_SYNC_INTERVAL секунд дочитує з Redis нові відкликання,
+# а повністю перебудовується раз на REVOCATION_REBUILD_INTERVAL секунд
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+REVOCATION_REBUILD_INTERVAL = float(os.getenv("REVOCATION_REBUILD_INTERVAL", "600"))
+
+# Режим автентифікації: "stateful" завантажує користувача на кожен запит,
+# "stateless" довіряє claims токена (uid, role, ver) і звіряє лише версію токена
+AUTH_MODE = os.getenv("AUTH_MODE", "stateful").lower()
+TOKEN_VERSION_TTL = int(os.getenv("TOKEN_VERSION_TTL", "3600"))
+TOKEN_VERSION_LOCAL_TTL = int(os.getenv("TOKEN_VERSION_LOCAL_TTL", "5"))
+
 # Якщо змінна DATABASE_URL не була знайдена, вивести повідомлення
 if SQLALCHEMY_DATABASE_URL is None:
     print("ERROR: DATABASE_URL is not set.")
 else:
     print(f"Using database: {SQLALCHEMY_DATABASE_URL}")  # Додаємо вивід для перевірки
 
-# Створюємо двигун бази даних
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Створюємо двигун бази даних (єдиний для всього застосунку)
+engine = create_db_engine()
 
 # Створюємо фабрику сесій
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -53,3 +211,31 @@ AVATAR_STORAGE_PATH = os.getenv("AVATAR_STORAGE_PATH", "app/static/avatars")
 
 # Створюємо директорію для збереження аватарів, якщо вона ще не існує
 os.makedirs(AVATAR_STORAGE_PATH, exist_ok=True)
+
+# Обробка аватарів: ліміт розміру завантаження, розміри і формати варіантів,
+# кількість процесів для ресайзу
+AVATAR_URL_PREFIX = os.getenv("AVATAR_URL_PREFIX", "/static/avatars")
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+AVATAR_SIZES = tuple(int(size) for size in os.getenv("AVATAR_SIZES", "64,256,512").split(","))
+AVATAR_FORMATS = tuple(os.getenv("AVATAR_FORMATS", "webp,jpeg").split(","))
+AVATAR_PRIMARY_SIZE = int(os.getenv("AVATAR_PRIMARY_SIZE", "256"))
+AVATAR_WORKERS = int(os.getenv("AVATAR_WORKERS", "2"))
+
+# Сховище аватарів: "local" (AVATAR_STORAGE_PATH, роздається через /static) або "s3"
+# (будь-яке S3-сумісне сховище; обов'язковий AVATAR_S3_PUBLIC_URL - CDN або публічний бакет,
+# бо URL зберігається в users.avatar_url і не може протермінуватися)
+AVATAR_STORAGE = os.getenv("AVATAR_STORAGE", "local")
+AVATAR_SPOOL_PATH = os.getenv("AVATAR_SPOOL_PATH") or None
+AVATAR_S3_BUCKET = os.getenv("AVATAR_S3_BUCKET", "avatars")
+AVATAR_S3_PREFIX = os.getenv("AVATAR_S3_PREFIX", "avatars/")
+AVATAR_S3_ENDPOINT_URL = os.getenv("AVATAR_S3_ENDPOINT_URL") or None
+AVATAR_S3_REGION = os.getenv("AVATAR_S3_REGION", "us-east-1")
+AVATAR_S3_ACCESS_KEY = os.getenv("AVATAR_S3_ACCESS_KEY") or None
+AVATAR_S3_SECRET_KEY = os.getenv("AVATAR_S3_SECRET_KEY") or None
+AVATAR_S3_PUBLIC_URL = os.getenv("AVATAR_S3_PUBLIC_URL") or None
+AVATAR_S3_PART_SIZE = int(os.getenv("AVATAR_S3_PART_SIZE", str(8 * 1024 * 1024)))
+
+# Кешування статичних файлів: файли з хешем у назві кешуються назавжди,
+# решта — на STATIC_MAX_AGE секунд
+STATIC_DIRECTORY = os.getenv("STATIC_DIRECTORY", "app/static")
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
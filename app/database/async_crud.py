@@ -0,0 +1,172 @@
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.crud import contact_rows_query, export_contacts_query
+from app.database.models import Contact, EmailOutbox, User
+from app.database.replicas import replica_router
+from app.database.schemas import (
+    ContactCreate, ContactUpdate,
+    UserCreate, UserResponse
+)
+from app.services.hashing import hash_password_async, verify_password_async
+from app.services.user_cache import user_cache
+from app.services.token_versions import token_versions
+from app.services import birthday_digest
+from app.services.response_cache import response_cache
+
+
+async def create_user(db: AsyncSession, user: UserCreate) -> UserResponse:
+    hashed_password = await hash_password_async(user.password)
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        password_hash=hashed_password,
+        role=user.role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+
+    return UserResponse.model_validate(db_user)
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+
+async def update_avatar(db: AsyncSession, user: User, avatar_path: str):
+    user.avatar_url = avatar_path
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.ainvalidate(user.email)
+    return user
+
+
+async def mark_email_verified(db: AsyncSession, user: User):
+    user.is_verified = True
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.ainvalidate(user.email)
+    return user
+
+
+async def update_user_password(db: AsyncSession, email: str, new_password: str) -> Optional[User]:
+    user = await get_user_by_email(db, email)
+    if not user:
+        return None
+    user.password_hash = await hash_password_async(new_password)
+    user.token_version = (user.token_version or 0) + 1
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.ainvalidate(user.email)
+    await token_versions.aset(user.id, user.token_version)
+    return user
+
+
+async def get_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    return await db.scalar(select(User.token_version).where(User.id == user_id))
+
+
+async def create_contact(db: AsyncSession, contact: ContactCreate, user_id: int):
+    db_contact = Contact(
+        **contact.model_dump(),
+        user_id=user_id
+    )
+    db.add(db_contact)
+    await db.commit()
+    await db.refresh(db_contact)
+    await replica_router.apin(user_id)
+    await response_cache.ainvalidate_user(user_id)
+    if db_contact.birthday is not None:
+        await birthday_digest.arefresh_user(db, user_id)
+    return db_contact
+
+
+async def get_contacts(
+    db: AsyncSession, user_id: int, limit: Optional[int] = None, after_id: Optional[int] = None
+):
+    query = select(Contact).where(Contact.user_id == user_id)
+    if after_id is not None:
+        query = query.where(Contact.id > after_id)
+    query = query.order_by(Contact.id)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def get_contact_rows(
+    db: AsyncSession, user_id: int, limit: Optional[int] = None, after_id: Optional[int] = None
+):
+    result = await db.execute(contact_rows_query(user_id, limit, after_id))
+    return result.all()
+
+
+async def stream_contacts(db: AsyncSession, user_id: int, batch_size: int) -> AsyncIterator:
+    result = await db.stream(export_contacts_query(user_id, batch_size))
+    async for row in result:
+        yield row
+
+
+async def get_contact_by_id(db: AsyncSession, contact_id: int, user_id: int):
+    result = await db.execute(
+        select(Contact).where(Contact.id == contact_id, Contact.user_id == user_id)
+    )
+    return result.scalars().first()
+
+
+async def update_contact(db: AsyncSession, contact_id: int, contact: ContactUpdate, user_id: int):
+    db_contact = await get_contact_by_id(db, contact_id, user_id)
+    if db_contact:
+        changes = contact.model_dump(exclude_unset=True)
+        for key, value in changes.items():
+            setattr(db_contact, key, value)
+        await db.commit()
+        await db.refresh(db_contact)
+        await replica_router.apin(user_id)
+        await response_cache.ainvalidate_user(user_id)
+        if "birthday" in changes or db_contact.birthday is not None:
+            await birthday_digest.arefresh_user(db, user_id)
+    return db_contact
+
+
+async def delete_contact(db: AsyncSession, contact_id: int, user_id: int):
+    db_contact = await get_contact_by_id(db, contact_id, user_id)
+    if db_contact:
+        await db.delete(db_contact)
+        await db.commit()
+        await replica_router.apin(user_id)
+        await response_cache.ainvalidate_user(user_id)
+        if db_contact.birthday is not None:
+            await birthday_digest.arefresh_user(db, user_id)
+    return db_contact
+
+
+async def delete_user(db: AsyncSession, user_id: int):
+    db_user = await get_user_by_id(db, user_id)
+    if db_user:
+        await db.delete(db_user)
+        await db.commit()
+        await user_cache.ainvalidate(db_user.email)
+        await token_versions.aset(db_user.id, -1)
+    return db_user
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await verify_password_async(plain_password, hashed_password)
+
+
+# The worker in app.services.email_outbox picks the message up and sends it
+async def enqueue_email(db: AsyncSession, subject: str, to_email: str, body: str) -> EmailOutbox:
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body)
+    db.add(message)
+    await db.commit()
+    return message
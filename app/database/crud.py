@@ -1,15 +1,22 @@
-from typing import Optional
+from typing import Iterator, Optional
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
-from app.database.models import Contact, User
+from app.database.models import Contact, EmailOutbox, User, birthday_day_of_year
+from app.database.replicas import replica_router
 from app.database.schemas import (
-    ContactCreate, ContactUpdate,
+    ContactCreate, ContactResponse, ContactUpdate,
     UserCreate, UserResponse
 )
 from app.services.security import hash_password, verify_password as verify_password_service
+from app.services.user_cache import user_cache
+from app.services.token_versions import token_versions
+from app.services import birthday_digest
+from app.services.response_cache import response_cache
 
 
-def create_user(db: Session, user: UserCreate) -> UserResponse:
-    hashed_password = hash_password(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> UserResponse:
+    # Async routes hash in the process pool beforehand and pass the result in
+    hashed_password = hashed_password or hash_password(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -44,18 +51,52 @@ def update_avatar(db: Session, user: User, avatar_path: str):
     user.avatar_url = avatar_path
     db.commit()
     db.refresh(user)
+    user_cache.invalidate(user.email)
     return user
 
 
-def update_user_password(db: Session, email: str, new_password: str) -> Optional[User]:
+# Switches to a processed avatar only if the user has not uploaded another one meanwhile
+def replace_avatar_url(db: Session, user_id: int, old_url: str, new_url: str) -> bool:
+    email = db.scalar(select(User.email).where(User.id == user_id))
+    if email is None:
+        return False
+    result = db.execute(
+        update(User).where(User.id == user_id, User.avatar_url == old_url).values(avatar_url=new_url)
+    )
+    db.commit()
+    if not result.rowcount:
+        return False
+    user_cache.invalidate(email)
+    return True
+
+
+def mark_email_verified(db: Session, user: User):
+    user.is_verified = True
+    db.commit()
+    db.refresh(user)
+    user_cache.invalidate(user.email)
+    return user
+
+
+def update_user_password(
+    db: Session, email: str, new_password: str, hashed_password: Optional[str] = None
+) -> Optional[User]:
     user = get_user_by_email(db, email)
     if not user:
         return None
-    user.password_hash = hash_password(new_password)
+    user.password_hash = hashed_password or hash_password(new_password)
+    # Access tokens issued with the old password stop working
+    user.token_version = (user.token_version or 0) + 1
     db.commit()
     db.refresh(user)
+    user_cache.invalidate(user.email)
+    token_versions.set(user.id, user.token_version)
     return user
 
+
+def get_token_version(db: Session, user_id: int) -> Optional[int]:
+    return db.scalar(select(User.token_version).where(User.id == user_id))
+
 def create_contact(db: Session, contact: ContactCreate, user_id: int):
     db_contact = Contact(
         **contact.model_dump(),
@@ -64,10 +105,71 @@ def create_contact(db: Session, contact: ContactCreate, user_id: int):
     db.add(db_contact)
     db.commit()
     db.refresh(db_contact)
+    replica_router.pin(user_id)
+    response_cache.invalidate_user(user_id)
+    if db_contact.birthday is not None:
+        birthday_digest.refresh_user(db, user_id)
     return db_contact
 
-def get_contacts(db: Session, user_id: int):
-    return db.query(Contact).filter(Contact.user_id == user_id).all()
+def bulk_create_contacts(db: Session, contacts: list[ContactCreate], user_id: int) -> list[int]:
+    # One multi-row INSERT ... RETURNING per batch instead of an INSERT + SELECT per contact
+    # Core inserts bypass the ORM validator that maintains birthday_doy
+    rows = [
+        {**contact.model_dump(), "birthday_doy": birthday_day_of_year(contact.birthday), "user_id": user_id}
+        for contact in contacts
+    ]
+    result = db.execute(
+        insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+        rows,
+    )
+    return list(result.scalars())
+
+def get_existing_contact_emails(db: Session, emails: list[str]) -> set[str]:
+    if not emails:
+        return set()
+    return set(db.scalars(select(Contact.email).where(Contact.email.in_(emails))))
+
+def get_contacts(db: Session, user_id: int, limit: Optional[int] = None, after_id: Optional[int] = None):
+    query = db.query(Contact).filter(Contact.user_id == user_id)
+    if after_id is not None:
+        query = query.filter(Contact.id > after_id)
+    query = query.order_by(Contact.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+# In ContactResponse field order, so a row maps straight onto the response JSON
+CONTACT_COLUMNS = tuple(getattr(Contact, name) for name in ContactResponse.model_fields)
+
+def contact_rows_query(user_id: int, limit: Optional[int] = None, after_id: Optional[int] = None):
+    # Plain column tuples: no ORM instances, identity map or attribute instrumentation per row
+    query = select(*CONTACT_COLUMNS).where(Contact.user_id == user_id)
+    if after_id is not None:
+        query = query.where(Contact.id > after_id)
+    query = query.order_by(Contact.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def get_contact_rows(db: Session, user_id: int, limit: Optional[int] = None, after_id: Optional[int] = None):
+    return db.execute(contact_rows_query(user_id, limit, after_id)).all()
+
+EXPORT_COLUMNS = (
+    Contact.id, Contact.first_name, Contact.last_name, Contact.email,
+    Contact.phone, Contact.birthday, Contact.extra_info,
+)
+
+def export_contacts_query(user_id: int, batch_size: int):
+    # yield_per turns on stream_results, i.e. a server-side cursor on Postgres
+    return (
+        select(*EXPORT_COLUMNS)
+        .where(Contact.user_id == user_id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+def stream_contacts(db: Session, user_id: int, batch_size: int) -> Iterator:
+    yield from db.execute(export_contacts_query(user_id, batch_size))
 
 def get_contact_by_id(db: Session, contact_id: int, user_id: int):
     return db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user_id).first()
@@ -75,10 +177,16 @@ def get_contact_by_id(db: Session, contact_id: int, user_id: int):
 def update_contact(db: Session, contact_id: int, contact: ContactUpdate, user_id: int):
     db_contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user_id).first()
     if db_contact:
-        for key, value in contact.model_dump(exclude_unset=True).items():
+        changes = contact.model_dump(exclude_unset=True)
+        for key, value in changes.items():
             setattr(db_contact, key, value)
         db.commit()
         db.refresh(db_contact)
+        replica_router.pin(user_id)
+        response_cache.invalidate_user(user_id)
+        # The digest stores whole contacts, so any edit to a contact with a birthday refreshes it
+        if "birthday" in changes or db_contact.birthday is not None:
+            birthday_digest.refresh_user(db, user_id)
     return db_contact
 
 def delete_contact(db: Session, contact_id: int, user_id: int):
@@ -86,6 +194,10 @@ def delete_contact(db: Session, contact_id: int, user_id: int):
     if db_contact:
         db.delete(db_contact)
         db.commit()
+        replica_router.pin(user_id)
+        response_cache.invalidate_user(user_id)
+        if db_contact.birthday is not None:
+            birthday_digest.refresh_user(db, user_id)
     return db_contact
 
 def delete_user(db: Session, user_id: int):
@@ -93,7 +205,18 @@ def delete_user(db: Session, user_id: int):
     if db_user:
         db.delete(db_user)
         db.commit()
+        user_cache.invalidate(db_user.email)
+        # No token carries version -1, so stateless tokens of the deleted user are rejected
+        token_versions.set(db_user.id, -1)
     return db_user
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return verify_password_service(plain_password, hashed_password)
+
+
+# The worker in app.services.email_outbox picks the message up and sends it
+def enqueue_email(db: Session, subject: str, to_email: str, body: str) -> EmailOutbox:
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body)
+    db.add(message)
+    db.commit()
+    return message
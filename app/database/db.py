@@ -1,11 +1,43 @@
-from sqlalchemy.orm import sessionmaker
-from app.config import engine
+from typing import Iterator, Optional
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, QueuePool
 
-def get_db():
+from app.config import engine, SessionLocal, DB_MAX_OVERFLOW, WEB_CONCURRENCY
+
+
+# The one request-scoped session dependency for the sync routes and auth
+def get_db() -> Iterator[Session]:
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def pool_status(db_engine: Optional[Engine] = None) -> dict:
+    pool = (db_engine or engine).pool
+    status = {"pool": type(pool).__name__, "workers": WEB_CONCURRENCY}
+    if isinstance(pool, NullPool):
+        # PgBouncer mode: every checkout opens a fresh connection and PgBouncer does the pooling
+        status.update(pooled=False, detail="Connections are pooled by PgBouncer (DB_PGBOUNCER), not by this worker")
+        return status
+    # The SQLite in-memory pools keep no counters
+    if not isinstance(pool, QueuePool):
+        return status
+    status.update(
+        pooled=True,
+        size=pool.size(),
+        # The pool only exposes its current overflow, so the limit comes from the configuration
+        max_overflow=DB_MAX_OVERFLOW,
+        timeout=pool.timeout(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(0, pool.overflow()),
+    )
+    if DB_MAX_OVERFLOW >= 0:
+        # What this worker and all the workers together can open against the database
+        status["max_connections"] = pool.size() + DB_MAX_OVERFLOW
+        status["max_connections_all_workers"] = status["max_connections"] * WEB_CONCURRENCY
+    return status
@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Date, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
+from datetime import date, datetime, timezone
+from typing import Optional
 from app.config import Base
 
 
+def birthday_day_of_year(birthday: Optional[date]) -> Optional[int]:
+    # Day of year in a leap-year calendar, so Feb 29 is always 60 and Mar 1 is always 61
+    if birthday is None:
+        return None
+    return date(2000, birthday.month, birthday.day).timetuple().tm_yday
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -15,6 +23,8 @@ class User(Base):
     confirmed = Column(Boolean, default=False)
     avatar_url = Column(String, nullable=True)
     role = Column(String, default="user")  
+    # Bumped whenever existing access tokens must stop being trusted (e.g. password change)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -30,7 +40,51 @@ class Contact(Base):
     email = Column(String, unique=True, nullable=False)
     phone = Column(String, nullable=False)
     birthday = Column(Date, nullable=True)
+    birthday_doy = Column(Integer, nullable=True)
     extra_info = Column(String, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
-    user = relationship("User", back_populates="contacts")
\ No newline at end of file
+    user = relationship("User", back_populates="contacts")
+
+    __table_args__ = (
+        # Keyset pagination: WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_last_name_first_name", "user_id", "last_name", "first_name"),
+        Index("ix_contacts_user_id_birthday_doy", "user_id", "birthday_doy"),
+        # pg_trgm GIN indexes back ILIKE '%...%' and the ranked similarity search
+        *(
+            Index(
+                f"ix_contacts_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            ).ddl_if(dialect="postgresql")
+            for column in ("first_name", "last_name", "email")
+        ),
+    )
+
+    @validates("birthday")
+    def _sync_birthday_doy(self, key, value):
+        self.birthday_doy = birthday_day_of_year(value)
+        return value
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    # pending -> sent, or dead once retries are exhausted (the dead-letter queue)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Worker poll: WHERE status = 'pending' AND next_attempt_at <= now ORDER BY next_attempt_at
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
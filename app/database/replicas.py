@@ -0,0 +1,221 @@
+import asyncio
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+import redis
+from redis import asyncio as aioredis
+from loguru import logger
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app.config import (
+    DATABASE_REPLICA_URLS,
+    REDIS_URL,
+    REPLICA_PIN_SECONDS,
+    REPLICA_RETRY_SECONDS,
+    create_db_engine,
+    get_engine_options,
+    to_async_url,
+)
+from app.services import metrics
+
+PIN_PREFIX = "db:pin:"
+# Expired local pins are dropped once there are this many
+MAX_LOCAL_PINS = 10000
+
+
+def pin_key(user_id: int) -> str:
+    return f"{PIN_PREFIX}{user_id}"
+
+
+def is_replica_session(db) -> bool:
+    # Set by the read dependencies on sessions bound to a replica connection
+    return bool(db.info.get("replica"))
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        urls: List[str] = DATABASE_REPLICA_URLS,
+        pin_seconds: float = REPLICA_PIN_SECONDS,
+        retry_seconds: float = REPLICA_RETRY_SECONDS,
+        redis_url: str = REDIS_URL,
+    ):
+        self.urls = list(urls)
+        self.pin_seconds = pin_seconds
+        self.retry_seconds = retry_seconds
+        self.redis_url = redis_url
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._async_redis = None
+        self._async_loop = None
+        # create_engine does not connect, so an unreachable replica only shows up on the first read
+        self.engines: List[Engine] = [create_db_engine(url) for url in self.urls]
+        for index, engine in enumerate(self.engines):
+            metrics.register_engine(f"replica{index}", engine)
+        self._async_engines: Optional[List[AsyncEngine]] = None
+        # Writes made by this worker, so its own pins hold even when Redis is down
+        self._pins = {}
+        # Replica index -> monotonic time it is tried again
+        self._down = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = aioredis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._async_loop = loop
+        return self._async_redis
+
+    @property
+    def async_engines(self) -> List[AsyncEngine]:
+        # Created lazily, like the primary async engine, so the sync mode needs no async driver
+        if self._async_engines is None:
+            self._async_engines = [
+                create_async_engine(to_async_url(url), **get_engine_options(to_async_url(url)))
+                for url in self.urls
+            ]
+        return self._async_engines
+
+    def reset_stats(self) -> None:
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.pinned_reads = 0
+        self.fallbacks = 0
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.engines),
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    # Read-your-writes
+
+    def _pin_locally(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) >= MAX_LOCAL_PINS:
+                self._pins = {uid: until for uid, until in self._pins.items() if until > now}
+            self._pins[user_id] = now + self.pin_seconds
+
+    def _pinned_locally(self, user_id: int) -> bool:
+        return self._pins.get(user_id, 0) > time.monotonic()
+
+    def pin(self, user_id: int) -> None:
+        # Called after a user's write commits: their reads go to the primary until replicas catch up
+        if not self.enabled:
+            return
+        self._pin_locally(user_id)
+        try:
+            self.redis.set(pin_key(user_id), 1, px=int(self.pin_seconds * 1000))
+        except redis.RedisError as e:
+            logger.warning(f"Replica pin failed: {e}")
+
+    async def apin(self, user_id: int) -> None:
+        if not self.enabled:
+            return
+        self._pin_locally(user_id)
+        try:
+            await self.async_redis.set(pin_key(user_id), 1, px=int(self.pin_seconds * 1000))
+        except redis.RedisError as e:
+            logger.warning(f"Replica pin failed: {e}")
+
+    def is_pinned(self, user_id: int) -> bool:
+        if self._pinned_locally(user_id):
+            return True
+        try:
+            # The write may have gone through another worker
+            return bool(self.redis.exists(pin_key(user_id)))
+        except redis.RedisError as e:
+            # Without the pin we cannot tell how fresh a replica must be; the primary always is
+            logger.warning(f"Replica pin check failed: {e}")
+            return True
+
+    async def ais_pinned(self, user_id: int) -> bool:
+        if self._pinned_locally(user_id):
+            return True
+        try:
+            return bool(await self.async_redis.exists(pin_key(user_id)))
+        except redis.RedisError as e:
+            logger.warning(f"Replica pin check failed: {e}")
+            return True
+
+    # Routing
+
+    def _candidates(self) -> List[int]:
+        # Round-robin over the replicas that are not marked down
+        now = time.monotonic()
+        up = [index for index in range(len(self.engines)) if self._down.get(index, 0) <= now]
+        if not up:
+            return []
+        start = next(self._turn) % len(up)
+        return up[start:] + up[:start]
+
+    def _mark_down(self, index: int, error: Exception) -> None:
+        self._down[index] = time.monotonic() + self.retry_seconds
+        self._count("fallbacks")
+        logger.warning(f"Read replica {index} is unavailable, skipping it for {self.retry_seconds:g}s: {error}")
+
+    def connect(self, user_id: int) -> Optional[Connection]:
+        # A connection to a reachable replica, or None when the read has to go to the primary
+        if not self.enabled:
+            return None
+        if self.is_pinned(user_id):
+            self._count("pinned_reads")
+            return None
+        for index in self._candidates():
+            try:
+                connection = self.engines[index].connect()
+            except (DBAPIError, OSError) as e:
+                # Drivers report refused or unreachable hosts as DBAPI errors or as a bare OSError
+                self._mark_down(index, e)
+                continue
+            self._count("replica_reads")
+            return connection
+        self._count("primary_reads")
+        return None
+
+    async def aconnect(self, user_id: int) -> Optional[AsyncConnection]:
+        if not self.enabled:
+            return None
+        if await self.ais_pinned(user_id):
+            self._count("pinned_reads")
+            return None
+        for index in self._candidates():
+            try:
+                connection = await self.async_engines[index].connect()
+            except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+                # asyncpg raises ConnectionRefusedError / TimeoutError without a DBAPI wrapper
+                self._mark_down(index, e)
+                continue
+            self._count("replica_reads")
+            return connection
+        self._count("primary_reads")
+        return None
+
+    async def dispose(self) -> None:
+        if self._async_engines is not None:
+            for engine in self._async_engines:
+                await engine.dispose()
+            self._async_engines = None
+        for engine in self.engines:
+            engine.dispose()
+
+
+replica_router = ReplicaRouter()
@@ -17,6 +17,10 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
 class UserCreate(BaseModel):
     username: str
     email: EmailStr
@@ -67,3 +71,15 @@ class ContactResponse(ContactCreate):
 
     class Config:
         from_attributes = True
+
+
+class BulkImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    created: int = 0
+    ids: list[int] = []
+    errors: list[BulkImportError] = []
@@ -4,19 +4,53 @@ from contextlib import asynccontextmanager
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 
-from app.config import init_limiter  # Ініціалізація Rate Limiter
-from app.routes import contacts, users, auth
+from app.config import init_limiter, engine, DB_MODE, SQL_PROFILING, STATIC_DIRECTORY  # Ініціалізація Rate Limiter
+from app.database.async_db import current_async_engine, dispose_async_engine
+from app.database.db import pool_status
+from app.database.replicas import replica_router
+from app.services import birthday_digest, email_outbox, metrics
+from app.services.email import close_batch_client
+from app.services.hashing import password_hasher
+from app.services.avatars import avatar_processor
+from app.services.revocation import revocation_store
+from app.services.static_files import CachedStaticFiles, file_response
+from app.services.sql_profiler import SQLProfilerMiddleware
+
+# 🔹 Вибір реалізації маршрутів: синхронна (SessionLocal) або асинхронна (AsyncSession)
+if DB_MODE == "async":
+    from app.routes.aio import contacts, users, auth
+    from app.services.auth import get_current_admin_user_async as get_current_admin_user
+else:
+    from app.routes import contacts, users, auth
+    from app.services.auth import get_current_admin_user
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_limiter()
+    # Відмови rate limiter рахуються в метриках
+    metrics.instrument_limiter()
+    # Пул процесів для bcrypt створюється до першого логіну
+    password_hasher.start()
+    # Щоденний перерахунок найближчих днів народження у Redis
+    digest_task = birthday_digest.start_scheduler()
+    # Відправка листів із таблиці email_outbox (можна вимкнути і запускати окремим процесом)
+    email_task = email_outbox.start_worker()
+    # Локальний bloom-фільтр відкликаних токенів періодично оновлюється з Redis
+    revocation_task = revocation_store.start_sync()
     yield
+    for task in (digest_task, email_task, revocation_task):
+        if task is not None:
+            task.cancel()
+    password_hasher.shutdown()
+    # Пул для ресайзу аватарів створюється при першому завантаженні
+    avatar_processor.shutdown()
+    await close_batch_client()
+    await dispose_async_engine()
+    await replica_router.dispose()
 
 app = FastAPI(title="Contacts API with Authentication", lifespan=lifespan)
 
@@ -30,15 +64,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link"],  # Курсор наступної сторінки для пагінації
 )
 
+# 🔹 Профілювання SQL-запитів (лише для налагодження, див. SQL_PROFILING)
+if SQL_PROFILING != "off":
+    app.add_middleware(SQLProfilerMiddleware)
+
+# 🔹 Метрики Prometheus: middleware для латентності маршрутів і SQL-запитів, ендпоінт /metrics
+metrics.setup(app, engine)
+
 # 🔹 Підключаємо маршрути
 app.include_router(contacts.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 
 # 🔹 Підключення статичних файлів (включаючи favicon)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Сильні ETag, 304 на повторні запити, immutable для файлів з хешем у назві та .br/.gz варіанти
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIRECTORY), name="static")
 
 # 🔹 Головна сторінка API
 @app.get("/")
@@ -50,7 +93,19 @@ def root():
 def secure_endpoint(token: str = Depends(oauth2_scheme)):
     return {"message": "Token is valid"}
 
+# 🔹 Стан пулів з'єднань з БД і реплік (для адміністраторів): зайняті з'єднання і ліміт на всі воркери
+@app.get("/admin/db_pool", include_in_schema=False)
+def db_pool(current_user=Depends(get_current_admin_user)):
+    pools = {"sync": pool_status(engine)}
+    async_engine = current_async_engine()
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine)
+    for index, replica in enumerate(replica_router.engines):
+        pools[f"replica{index}"] = pool_status(replica)
+    pools["routing"] = replica_router.stats()
+    return pools
+
 # 🔹 Повернення favicon
 @app.get("/favicon.ico", include_in_schema=False)
-async def favicon():
-    return FileResponse("app/static/favicon.svg")
+async def favicon(request: Request):
+    return await file_response(os.path.join(STATIC_DIRECTORY, "favicon.svg"), request)
@@ -0,0 +1,142 @@
+import os
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from jose import JWTError, jwt
+from fastapi_limiter.depends import RateLimiter
+
+from app.services.auth import (
+    access_token_data,
+    create_access_token,
+    create_refresh_token,
+    create_verification_token,
+    get_current_user_async,
+    aget_refresh_claims,
+    get_token_claims,
+    oauth2_scheme,
+    refresh_token_data,
+    token_cache,
+    token_version_matches,
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from app.database import async_crud, schemas
+from app.database.async_db import get_async_db
+from app.services.revocation import revocation_store
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+
+router = APIRouter(prefix="/auth", tags=["Auth"])
+
+@router.post("/login", response_model=schemas.Token)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_email(db, form_data.username)
+    if not user or not await async_crud.verify_password(form_data.password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    access_token = create_access_token(
+        data=access_token_data(user),
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = create_refresh_token(data=refresh_token_data(user))
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+
+@router.post("/refresh", response_model=schemas.Token)
+async def refresh_token(
+    request: schemas.RefreshTokenRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    claims = await aget_refresh_claims(request.refresh_token)
+    if not claims:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    user = await async_crud.get_user_by_email(db, claims["sub"])
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not token_version_matches(claims, user.token_version):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    # Rotation: the presented refresh token is spent, and of two concurrent uses only one wins
+    if not await revocation_store.arevoke_claims(claims):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    access_token = create_access_token(data=access_token_data(user))
+    new_refresh_token = create_refresh_token(data=refresh_token_data(user))
+
+    return {
+        "access_token": access_token,
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer"
+    }
+
+
+@router.post("/logout")
+async def logout(request: Optional[schemas.LogoutRequest] = None, token: str = Depends(oauth2_scheme)):
+    claims = get_token_claims(token)
+    await revocation_store.arevoke_claims(claims)
+    token_cache.evict(token)
+
+    if request and request.refresh_token:
+        refresh_claims = await aget_refresh_claims(request.refresh_token)
+        if refresh_claims and refresh_claims["sub"] == claims["sub"]:
+            await revocation_store.arevoke_claims(refresh_claims)
+
+    return {"message": "Logged out"}
+
+
+@router.post("/signup", response_model=schemas.UserResponse)
+async def signup(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await async_crud.get_user_by_email(db, user_data.email)
+    if existing_user:
+        raise HTTPException(status_code=409, detail="Email already registered")
+
+    new_user = await async_crud.create_user(db, user_data)
+
+    verification_token = create_verification_token(user_data.email)
+    confirmation_url = f"{BASE_URL}/auth/verify/{verification_token}"
+
+    subject = "Please verify your email address"
+    body = f"Click the following link to verify your email: {confirmation_url}"
+    await async_crud.enqueue_email(db, subject, user_data.email, body)
+
+    return new_user
+
+
+@router.get("/me", response_model=schemas.UserResponse, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+async def read_users_me(current_user: schemas.UserResponse = Depends(get_current_user_async)):
+    return current_user
+
+@router.get("/verify/{token}", response_model=schemas.UserResponse)
+async def verify_email(token: str, db: AsyncSession = Depends(get_async_db)):
+    try:
+        email = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        if not email:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+
+        user = await async_crud.get_user_by_email(db, email)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        if user.is_verified:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already verified")
+
+        return await async_crud.mark_email_verified(db, user)
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
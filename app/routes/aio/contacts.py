@@ -0,0 +1,178 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_crud, schemas
+from app.config import (
+    BIRTHDAY_LOOKAHEAD_DAYS,
+    EXPORT_BATCH_SIZE,
+    BULK_IMPORT_BATCH_SIZE,
+    BULK_IMPORT_MAX_BATCH_SIZE,
+)
+from app.services import birthday_digest
+from app.services.bulk_import import import_contacts, read_import_rows
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.database.async_db import get_async_db, get_async_sessionmaker
+from app.database.replicas import is_replica_session
+from app.services.export import MEDIA_TYPES, aencode_rows
+from app.services.async_utils import search_contacts, rank_contacts, get_upcoming_birthdays
+from app.services.pagination import decode_cursor, page_limit, paginate
+from app.services.response_cache import CONTACT, CONTACT_LIST, CONTACT_ROWS, response_cache
+from app.services.auth import Principal, get_async_read_db, get_current_principal_async
+
+router = APIRouter(prefix="/contacts", tags=["Contacts"])
+
+
+@router.post("/", response_model=schemas.ContactResponse, status_code=status.HTTP_201_CREATED)
+async def create_contact(
+    contact: schemas.ContactCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    return await async_crud.create_contact(db, contact, current_user.id)
+
+@router.post("/bulk", response_model=schemas.BulkImportResponse)
+async def bulk_import_contacts(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=BULK_IMPORT_MAX_BATCH_SIZE, description="Rows per INSERT batch"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    # JSON array of contacts, or a multipart CSV/NDJSON upload in the "file" field
+    rows = await read_import_rows(request)
+    result = await db.run_sync(
+        lambda session: import_contacts(session, rows, current_user.id, batch_size or BULK_IMPORT_BATCH_SIZE)
+    )
+    return result
+
+@router.get("/", response_model=list[schemas.ContactResponse])
+async def get_contacts(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (capped by the server maximum)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    limit = page_limit(limit)
+
+    async def load():
+        contacts = await async_crud.get_contact_rows(db, current_user.id, limit=limit + 1, after_id=decode_cursor(cursor))
+        return paginate(contacts, limit, request, response)
+
+    return await response_cache.aserve(
+        request, response, current_user.id, CONTACT_ROWS, load, store=not is_replica_session(db)
+    )
+
+async def _export_rows(session_factory: async_sessionmaker, user_id: int, fmt: str):
+    # The export owns its session: yield dependencies are closed before the body is streamed
+    async with session_factory() as db:
+        async for chunk in aencode_rows(async_crud.stream_contacts(db, user_id, EXPORT_BATCH_SIZE), fmt):
+            yield chunk
+
+@router.get("/export")
+async def export_contacts(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    return StreamingResponse(
+        _export_rows(session_factory, current_user.id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
+
+@router.get("/{contact_id}", response_model=schemas.ContactResponse)
+async def get_contact(
+    request: Request,
+    response: Response,
+    contact_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    async def load():
+        db_contact = await async_crud.get_contact_by_id(db, contact_id, current_user.id)
+        if db_contact is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        return db_contact
+
+    return await response_cache.aserve(
+        request, response, current_user.id, CONTACT, load, store=not is_replica_session(db)
+    )
+
+
+@router.put("/{contact_id}", response_model=schemas.ContactResponse)
+async def update_contact(
+    contact_id: int,
+    contact: schemas.ContactUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_contact = await async_crud.update_contact(db, contact_id, contact, current_user.id)
+    if db_contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return db_contact
+
+
+@router.delete("/{contact_id}", response_model=schemas.ContactResponse)
+async def delete_contact(
+    contact_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_contact = await async_crud.delete_contact(db, contact_id, current_user.id)
+    if db_contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return db_contact
+
+
+@router.get("/search/", response_model=list[schemas.ContactResponse])
+async def search_contacts_api(
+    request: Request,
+    response: Response,
+    name: str = Query(None, description="Search by first or last name"),
+    email: str = Query(None, description="Search by email"),
+    mode: Literal["contains", "ranked"] = Query(
+        "contains", description="contains: keyset-paginated substring match; ranked: best matches first"
+    ),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (capped by the server maximum)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    limit = page_limit(limit)
+
+    async def load():
+        if mode == "ranked":
+            # Ranked results are a single top-N page, so no cursor is issued
+            contacts = await rank_contacts(db, name, email, current_user.id, limit=limit)
+            if not contacts:
+                raise HTTPException(status_code=404, detail="No contacts found")
+            return contacts
+
+        contacts = await search_contacts(
+            db, name, email, current_user.id, limit=limit + 1, after_id=decode_cursor(cursor)
+        )
+        if not contacts:
+            raise HTTPException(status_code=404, detail="No contacts found")
+        return paginate(contacts, limit, request, response)
+
+    return await response_cache.aserve(
+        request, response, current_user.id, CONTACT_LIST, load, store=not is_replica_session(db)
+    )
+
+@router.get("/upcoming_birthdays/", response_model=list[schemas.ContactResponse])
+async def get_birthdays_api(
+    days: Optional[int] = Query(None, ge=1, le=366, description="Look-ahead window in days"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    contacts = None
+    if days in (None, BIRTHDAY_LOOKAHEAD_DAYS):
+        # Served from the daily digest when it has been built for today
+        contacts = await birthday_digest.aget_digest(current_user.id)
+    if contacts is None:
+        contacts = await get_upcoming_birthdays(db, current_user.id, days)
+    if not contacts:
+        raise HTTPException(status_code=404, detail="No upcoming birthdays found")
+    return contacts
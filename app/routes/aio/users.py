@@ -0,0 +1,105 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
+
+from app.database.async_db import get_async_db
+import app.database.schemas as schemas
+import app.database.async_crud as async_crud
+from app.services.auth import (
+    Principal,
+    access_token_data,
+    authenticate_user_async,
+    create_access_token,
+    create_reset_token,
+    verify_reset_token,
+    get_current_admin_user_async,
+    arevoke_user_sessions,
+)
+from app.services import avatars
+from loguru import logger
+
+router = APIRouter(prefix="/users", tags=["Users"])
+
+
+@router.post("/signup", response_model=schemas.UserResponse, status_code=201)
+async def signup(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await async_crud.get_user_by_email(db, user_data.email)
+    if existing_user:
+        raise HTTPException(status_code=409, detail="Email already registered")
+
+    new_user = await async_crud.create_user(db, user_data)
+    return new_user
+
+@router.post("/login")
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    access_token = create_access_token(
+        data=access_token_data(user),
+        expires_delta=timedelta(hours=1)
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/test")
+async def test_route():
+    return {"message": "Users API is working!"}
+
+@router.post("/reset_password_request/")
+async def request_password_reset(email: str, db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_email(db, email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    reset_token = create_reset_token(email)
+    reset_link = f"http://localhost:8000/users/reset_password/?token={reset_token}"
+    logger.info(f"Password reset forÑ {email}: {reset_link}")
+
+    return {"message": "Password reset link has been sent (check logs)."}
+
+@router.post("/reset_password/")
+async def reset_password(token: str, new_password: str, db: AsyncSession = Depends(get_async_db)):
+    email = verify_reset_token(token)
+    if not email:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token")
+
+    user = await async_crud.update_user_password(db, email, new_password)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    return {"message": "Password was resetted"}
+
+
+@router.post("/avatar", response_model=schemas.UserResponse)
+async def update_user_avatar(
+    request: Request,
+    current_user: Principal = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    file = await avatars.read_upload(request)
+    avatar = await avatars.store_upload(file)
+
+    try:
+        user = await async_crud.get_user_by_email(db, current_user.email)
+        updated_user = await async_crud.update_avatar(db, user, avatar.url)
+    except BaseException:
+        avatars.discard_upload(avatar)
+        raise
+    avatars.avatar_processor.schedule(updated_user.id, avatar)
+    return updated_user
+
+
+@router.post("/{user_id}/revoke_sessions")
+async def revoke_sessions(
+    user_id: int,
+    current_user: Principal = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await async_crud.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    await arevoke_user_sessions(user.email)
+    return {"message": f"All sessions of user {user_id} have been revoked"}
@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from fastapi.security import OAuth2PasswordRequestForm
@@ -7,19 +8,29 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from fastapi_limiter.depends import RateLimiter
 
+from starlette.concurrency import run_in_threadpool
+
 from app.services.auth import (
+    access_token_data,
+    authenticate_user_pooled,
     create_access_token,
     create_refresh_token,
     create_verification_token,
     get_current_user,
-    get_db,
-    verify_refresh_token,
+    get_refresh_claims,
+    get_token_claims,
+    oauth2_scheme,
+    refresh_token_data,
+    token_cache,
+    token_version_matches,
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 from app.database import crud, schemas
-from app.services.email import send_email
+from app.database.db import get_db
+from app.services.revocation import revocation_store
+from app.services.hashing import hash_password_async
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -29,9 +40,9 @@ BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await authenticate_user_pooled(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -39,10 +50,10 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         )
 
     access_token = create_access_token(
-        data={"sub": user.email},
+        data=access_token_data(user),
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    refresh_token = create_refresh_token(data={"sub": user.email})
+    refresh_token = create_refresh_token(data=refresh_token_data(user))
 
     return {
         "access_token": access_token,
@@ -56,16 +67,22 @@ def refresh_token(
     request: schemas.RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
-    email = verify_refresh_token(request.refresh_token)
-    if not email:
+    claims = get_refresh_claims(request.refresh_token)
+    if not claims:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    user = crud.get_user_by_email(db, email)
+    user = crud.get_user_by_email(db, claims["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if not token_version_matches(claims, user.token_version):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    # Rotation: the presented refresh token is spent, and of two concurrent uses only one wins
+    if not revocation_store.revoke_claims(claims):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    access_token = create_access_token(data={"sub": user.email})
-    new_refresh_token = create_refresh_token(data={"sub": user.email})
+    access_token = create_access_token(data=access_token_data(user))
+    new_refresh_token = create_refresh_token(data=refresh_token_data(user))
 
     return {
         "access_token": access_token,
@@ -74,20 +91,35 @@ def refresh_token(
     }
 
 
+@router.post("/logout")
+def logout(request: Optional[schemas.LogoutRequest] = None, token: str = Depends(oauth2_scheme)):
+    claims = get_token_claims(token)
+    revocation_store.revoke_claims(claims)
+    token_cache.evict(token)
+
+    if request and request.refresh_token:
+        refresh_claims = get_refresh_claims(request.refresh_token)
+        if refresh_claims and refresh_claims["sub"] == claims["sub"]:
+            revocation_store.revoke_claims(refresh_claims)
+
+    return {"message": "Logged out"}
+
+
 @router.post("/signup", response_model=schemas.UserResponse)
-def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing_user = crud.get_user_by_email(db, user_data.email)
+async def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(crud.get_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(status_code=409, detail="Email already registered")
 
-    new_user = crud.create_user(db, user_data)
+    hashed_password = await hash_password_async(user_data.password)
+    new_user = await run_in_threadpool(crud.create_user, db, user_data, hashed_password)
 
     verification_token = create_verification_token(user_data.email)
     confirmation_url = f"{BASE_URL}/auth/verify/{verification_token}"
 
     subject = "Please verify your email address"
     body = f"Click the following link to verify your email: {confirmation_url}"
-    send_email(subject, user_data.email, body)
+    await run_in_threadpool(crud.enqueue_email, db, subject, user_data.email, body)
 
     return new_user
 
@@ -110,10 +142,6 @@ def verify_email(token: str, db: Session = Depends(get_db)):
         if user.is_verified:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already verified")
 
-        user.is_verified = True
-        db.commit()
-        db.refresh(user)
-
-        return user
+        return crud.mark_email_verified(db, user)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
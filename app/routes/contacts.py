@@ -1,46 +1,105 @@
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import crud, schemas
-from app.config import SessionLocal
-from app.services.utils import search_contacts, get_upcoming_birthdays
-from app.services.auth import get_current_user
+from app.database.db import SessionLocal, get_db
+from app.database.replicas import is_replica_session
+from app.config import (
+    BIRTHDAY_LOOKAHEAD_DAYS,
+    EXPORT_BATCH_SIZE,
+    BULK_IMPORT_BATCH_SIZE,
+    BULK_IMPORT_MAX_BATCH_SIZE,
+)
+from app.services import birthday_digest
+from app.services.bulk_import import import_contacts, read_import_rows
+from app.services.export import MEDIA_TYPES, encode_rows
+from app.services.utils import search_contacts, rank_contacts, get_upcoming_birthdays
+from app.services.pagination import decode_cursor, page_limit, paginate
+from app.services.response_cache import CONTACT, CONTACT_LIST, CONTACT_ROWS, response_cache
+from app.services.auth import Principal, get_current_principal, get_read_db
 
 router = APIRouter(prefix="/contacts", tags=["Contacts"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/", response_model=schemas.ContactResponse, status_code=status.HTTP_201_CREATED)
 def create_contact(
     contact: schemas.ContactCreate,
     db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     return crud.create_contact(db, contact, current_user.id)
 
+@router.post("/bulk", response_model=schemas.BulkImportResponse)
+async def bulk_import_contacts(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=BULK_IMPORT_MAX_BATCH_SIZE, description="Rows per INSERT batch"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    # JSON array of contacts, or a multipart CSV/NDJSON upload in the "file" field
+    rows = await read_import_rows(request)
+    result = await run_in_threadpool(
+        import_contacts, db, rows, current_user.id, batch_size or BULK_IMPORT_BATCH_SIZE
+    )
+    return result
+
 @router.get("/", response_model=list[schemas.ContactResponse])
 def get_contacts(
-    db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (capped by the server maximum)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    limit = page_limit(limit)
+
+    def load():
+        contacts = crud.get_contact_rows(db, current_user.id, limit=limit + 1, after_id=decode_cursor(cursor))
+        return paginate(contacts, limit, request, response)
+
+    return response_cache.serve(
+        request, response, current_user.id, CONTACT_ROWS, load, store=not is_replica_session(db)
+    )
+
+def _export_rows(user_id: int, fmt: str):
+    # The export owns its session: yield dependencies are closed before the body is streamed
+    db = SessionLocal()
+    try:
+        yield from encode_rows(crud.stream_contacts(db, user_id, EXPORT_BATCH_SIZE), fmt)
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_contacts(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    return crud.get_contacts(db, current_user.id)
+    return StreamingResponse(
+        _export_rows(current_user.id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
 
 @router.get("/{contact_id}", response_model=schemas.ContactResponse)
 def get_contact(
+    request: Request,
+    response: Response,
     contact_id: int,
-    db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    db_contact = crud.get_contact_by_id(db, contact_id, current_user.id)
-    if db_contact is None:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    return db_contact
+    def load():
+        db_contact = crud.get_contact_by_id(db, contact_id, current_user.id)
+        if db_contact is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        return db_contact
+
+    return response_cache.serve(
+        request, response, current_user.id, CONTACT, load, store=not is_replica_session(db)
+    )
 
 
 @router.put("/{contact_id}", response_model=schemas.ContactResponse)
@@ -48,7 +107,7 @@ def update_contact(
     contact_id: int,
     contact: schemas.ContactUpdate,
     db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     db_contact = crud.update_contact(db, contact_id, contact, current_user.id)
     if db_contact is None:
@@ -60,7 +119,7 @@ def update_contact(
 def delete_contact(
     contact_id: int,
     db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     db_contact = crud.delete_contact(db, contact_id, current_user.id)
     if db_contact is None:
@@ -70,22 +129,51 @@ def delete_contact(
 
 @router.get("/search/", response_model=list[schemas.ContactResponse])
 def search_contacts_api(
+    request: Request,
+    response: Response,
     name: str = Query(None, description="Search by first or last name"),
     email: str = Query(None, description="Search by email"),
-    db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    mode: Literal["contains", "ranked"] = Query(
+        "contains", description="contains: keyset-paginated substring match; ranked: best matches first"
+    ),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (capped by the server maximum)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    contacts = search_contacts(db, name, email, current_user.id)
-    if not contacts:
-        raise HTTPException(status_code=404, detail="No contacts found")
-    return contacts
+    limit = page_limit(limit)
+
+    def load():
+        if mode == "ranked":
+            # Ranked results are a single top-N page, so no cursor is issued
+            contacts = rank_contacts(db, name, email, current_user.id, limit=limit)
+            if not contacts:
+                raise HTTPException(status_code=404, detail="No contacts found")
+            return contacts
+
+        contacts = search_contacts(
+            db, name, email, current_user.id, limit=limit + 1, after_id=decode_cursor(cursor)
+        )
+        if not contacts:
+            raise HTTPException(status_code=404, detail="No contacts found")
+        return paginate(contacts, limit, request, response)
+
+    return response_cache.serve(
+        request, response, current_user.id, CONTACT_LIST, load, store=not is_replica_session(db)
+    )
 
 @router.get("/upcoming_birthdays/", response_model=list[schemas.ContactResponse])
 def get_birthdays_api(
-    db: Session = Depends(get_db),
-    current_user: schemas.UserResponse = Depends(get_current_user)
+    days: Optional[int] = Query(None, ge=1, le=366, description="Look-ahead window in days"),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    contacts = get_upcoming_birthdays(db, current_user.id)
+    contacts = None
+    if days in (None, BIRTHDAY_LOOKAHEAD_DAYS):
+        # Served from the daily digest when it has been built for today
+        contacts = birthday_digest.get_digest(current_user.id)
+    if contacts is None:
+        contacts = get_upcoming_birthdays(db, current_user.id, days)
     if not contacts:
         raise HTTPException(status_code=404, detail="No upcoming birthdays found")
     return contacts
\ No newline at end of file
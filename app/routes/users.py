@@ -1,48 +1,47 @@
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
-import shutil
-import os
 
-from app.config import SessionLocal
+from starlette.concurrency import run_in_threadpool
+
+from app.database.db import get_db
 import app.database.schemas as schemas
 import app.database.crud as crud
 from app.services.auth import (
-    authenticate_user,
+    Principal,
+    access_token_data,
+    authenticate_user_pooled,
     create_access_token,
     create_reset_token,
     verify_reset_token,
-    get_current_admin_user
+    get_current_admin_user,
+    revoke_user_sessions,
 )
+from app.services import avatars
+from app.services.hashing import hash_password_async
 from loguru import logger
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/signup", response_model=schemas.UserResponse, status_code=201)
-def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing_user = crud.get_user_by_email(db, user_data.email)
+async def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(crud.get_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(status_code=409, detail="Email already registered")
 
-    new_user = crud.create_user(db, user_data)
+    hashed_password = await hash_password_async(user_data.password)
+    new_user = await run_in_threadpool(crud.create_user, db, user_data, hashed_password)
     return new_user
 
 @router.post("/login")
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await authenticate_user_pooled(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token = create_access_token(
-        data={"sub": user.email},
+        data=access_token_data(user),
         expires_delta=timedelta(hours=1)
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -64,30 +63,46 @@ def request_password_reset(email: str, db: Session = Depends(get_db)):
     return {"message": "Password reset link has been sent (check logs)."}
 
 @router.post("/reset_password/")
-def reset_password(token: str, new_password: str, db: Session = Depends(get_db)):
+async def reset_password(token: str, new_password: str, db: Session = Depends(get_db)):
     email = verify_reset_token(token)
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token")
 
-    user = crud.update_user_password(db, email, new_password)
+    hashed_password = await hash_password_async(new_password)
+    user = await run_in_threadpool(crud.update_user_password, db, email, new_password, hashed_password)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     return {"message": "Password was resetted"}
 
 @router.post("/avatar", response_model=schemas.UserResponse)
-def update_user_avatar(
-    file: UploadFile = File(...),
-    current_user: schemas.UserResponse = Depends(get_current_admin_user),
+async def update_user_avatar(
+    request: Request,
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    avatar_dir = "static/avatars"
-    os.makedirs(avatar_dir, exist_ok=True)
+    file = await avatars.read_upload(request)
+    avatar = await avatars.store_upload(file)
 
-    avatar_path = os.path.join(avatar_dir, file.filename)
-    with open(avatar_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    user = crud.get_user_by_email(db, current_user.email)
-    updated_user = crud.update_avatar(db, user, avatar_path)
+    try:
+        user = await run_in_threadpool(crud.get_user_by_email, db, current_user.email)
+        updated_user = await run_in_threadpool(crud.update_avatar, db, user, avatar.url)
+    except BaseException:
+        avatars.discard_upload(avatar)
+        raise
+    # Resized variants are rendered in the background; avatar_url switches once they exist
+    avatars.avatar_processor.schedule(updated_user.id, avatar)
     return updated_user
+
+@router.post("/{user_id}/revoke_sessions")
+def revoke_sessions(
+    user_id: int,
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    user = crud.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    revoke_user_sessions(user.email)
+    return {"message": f"All sessions of user {user_id} have been revoked"}
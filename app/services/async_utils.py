@@ -0,0 +1,50 @@
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import BIRTHDAY_LOOKAHEAD_DAYS
+from app.database.models import Contact
+from app.services.utils import ranked_search_query, upcoming_birthdays_query
+
+
+async def search_contacts(
+    db: AsyncSession,
+    name: str = None,
+    email: str = None,
+    user_id: int = None,
+    limit: int = None,
+    after_id: int = None,
+):
+    query = select(Contact)
+
+    if user_id is not None:
+        query = query.where(Contact.user_id == user_id)
+
+    if name:
+        query = query.where(
+            (Contact.first_name.ilike(f"%{name}%")) | (Contact.last_name.ilike(f"%{name}%"))
+        )
+
+    if email:
+        query = query.where(Contact.email.ilike(f"%{email}%"))
+
+    if after_id is not None:
+        query = query.where(Contact.id > after_id)
+
+    query = query.order_by(Contact.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def rank_contacts(db: AsyncSession, name: str = None, email: str = None, user_id: int = None, limit: int = None):
+    query = ranked_search_query(db.bind.dialect.name, name, email, user_id, limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def get_upcoming_birthdays(db: AsyncSession, user_id: int, days: int = None, today: date = None):
+    query = upcoming_birthdays_query(user_id, days or BIRTHDAY_LOOKAHEAD_DAYS, today or date.today())
+    result = await db.execute(query)
+    return result.scalars().all()
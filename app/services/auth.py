@@ -1,17 +1,28 @@
 import os
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
-from app.config import SessionLocal
-from app.database import crud
+from app.config import AUTH_MODE
+from app.database import crud, async_crud
+from app.database.async_db import get_async_db
+from app.database.db import get_db
+from app.database.replicas import replica_router
 from app.database.models import User
+from app.services.user_cache import user_cache
+from app.services.hashing import verify_password_async
+from app.services.token_cache import TokenCache
+from app.services.revocation import revocation_store
+from app.services.token_versions import token_versions
 
 load_dotenv()
 
@@ -20,70 +31,292 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _verify_jwt(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+# Clients resend the same bearer token on every request; verified claims are reused until exp
+token_cache = TokenCache(_verify_jwt)
+
+
+def decode_token(token: str) -> dict:
+    return token_cache.decode(token)
 
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     user = crud.get_user_by_email(db, email)
-    if not user or not pwd_context.verify(password, user.password_hash):
+    if not user or not crud.verify_password(password, user.password_hash):
+        return None
+    return user
+
+
+# Sync session for the lookup, bcrypt in the hashing pool instead of the request thread
+async def authenticate_user_pooled(db: Session, email: str, password: str) -> Optional[User]:
+    user = await run_in_threadpool(crud.get_user_by_email, db, email)
+    if not user or not await verify_password_async(password, user.password_hash):
+        return None
+    return user
+
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = await async_crud.get_user_by_email(db, email)
+    if not user or not await async_crud.verify_password(password, user.password_hash):
         return None
     return user
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "scope": "access_token"})
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti identifies this token in the revocation store; iat (sub-second) lets "revoke all sessions" cut off older ones
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "jti": uuid.uuid4().hex, "scope": "access_token"})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "scope": "refresh_token"})
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "jti": uuid.uuid4().hex, "scope": "refresh_token"})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_refresh_token(token: str) -> Optional[str]:
+def _refresh_payload(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("scope") != "refresh_token":
-            return None
-        return payload.get("sub")
+        payload = decode_token(token)
     except JWTError:
         return None
+    if payload.get("scope") != "refresh_token" or not payload.get("sub"):
+        return None
+    return payload
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def get_refresh_claims(token: str) -> Optional[dict]:
+    payload = _refresh_payload(token)
+    if payload is None or revocation_store.is_revoked(payload):
+        return None
+    return payload
+
+
+async def aget_refresh_claims(token: str) -> Optional[dict]:
+    payload = _refresh_payload(token)
+    if payload is None or await revocation_store.ais_revoked(payload):
+        return None
+    return payload
+
+
+def verify_refresh_token(token: str) -> Optional[str]:
+    payload = get_refresh_claims(token)
+    return payload.get("sub") if payload else None
+
+
+def get_credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def get_token_claims(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_email: str = payload.get("sub")
-        if user_email is None:
-            raise credentials_exception
+        payload = decode_token(token)
     except JWTError:
-        raise credentials_exception
+        raise get_credentials_exception()
+    if payload.get("sub") is None:
+        raise get_credentials_exception()
+    return payload
+
+
+def _access_claims(token: str) -> dict:
+    payload = get_token_claims(token)
+    # Refresh and reset-password tokens are signed with the same key but are not bearer credentials
+    if payload.get("scope") != "access_token":
+        raise get_credentials_exception()
+    return payload
+
+
+def get_valid_claims(token: str) -> dict:
+    payload = _access_claims(token)
+    if revocation_store.is_revoked(payload):
+        raise get_credentials_exception()
+    return payload
+
+
+async def aget_valid_claims(token: str) -> dict:
+    payload = _access_claims(token)
+    if await revocation_store.ais_revoked(payload):
+        raise get_credentials_exception()
+    return payload
+
+
+def get_token_subject(token: str) -> str:
+    return get_valid_claims(token)["sub"]
+
+
+async def aget_token_subject(token: str) -> str:
+    return (await aget_valid_claims(token))["sub"]
+
+
+# Covers tokens already issued (up to the refresh token lifetime) on every worker
+def revoke_user_sessions(email: str) -> None:
+    revocation_store.revoke_user(email, REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
+    token_cache.evict_subject(email)
+
+
+async def arevoke_user_sessions(email: str) -> None:
+    await revocation_store.arevoke_user(email, REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
+    token_cache.evict_subject(email)
+
+
+def token_version_matches(payload: dict, current_version: Optional[int]) -> bool:
+    # Tokens issued before "ver" existed count as version 0, so any password change cuts them off
+    return (payload.get("ver") or 0) == (current_version or 0)
+
 
-    user = crud.get_user_by_email(db, user_email)
+def _check_token_version(payload: dict, current_version: Optional[int]) -> None:
+    if not token_version_matches(payload, current_version):
+        raise get_credentials_exception()
+
+
+def _load_current_user(payload: dict, db: Session) -> User:
+    user = user_cache.get(payload["sub"])
     if user is None:
-        raise credentials_exception
+        user = crud.get_user_by_email(db, payload["sub"])
+        if user is None:
+            raise get_credentials_exception()
+        user_cache.set(user)
+    _check_token_version(payload, user.token_version)
     return user
 
 
+async def _aload_current_user(payload: dict, db: AsyncSession) -> User:
+    user = await user_cache.aget(payload["sub"])
+    if user is None:
+        user = await async_crud.get_user_by_email(db, payload["sub"])
+        if user is None:
+            raise get_credentials_exception()
+        await user_cache.aset(user)
+    _check_token_version(payload, user.token_version)
+    return user
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    return _load_current_user(get_valid_claims(token), db)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> User:
+    return await _aload_current_user(await aget_valid_claims(token), db)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, token_version=user.token_version or 0)
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        return cls(id=payload["uid"], email=payload["sub"], role=payload["role"], token_version=payload["ver"])
+
+
+STATELESS_CLAIMS = ("uid", "role", "ver")
+
+
+def access_token_data(user: User) -> dict:
+    # uid/role/ver let AUTH_MODE=stateless authorize a request without loading the user.
+    # A role change takes effect on the next token unless token_version is bumped with it.
+    return {"sub": user.email, "uid": user.id, "role": user.role, "ver": user.token_version or 0}
+
+
+def refresh_token_data(user: User) -> dict:
+    # ver ties the refresh token to the password it was issued under
+    return {"sub": user.email, "ver": user.token_version or 0}
+
+
+def _is_stateless(payload: dict) -> bool:
+    return AUTH_MODE == "stateless" and all(claim in payload for claim in STATELESS_CLAIMS)
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    payload = get_valid_claims(token)
+    if not _is_stateless(payload):
+        return Principal.from_user(_load_current_user(payload, db))
+
+    current_version = token_versions.get(payload["uid"])
+    if current_version is None:
+        # Only a cold or expired version entry costs a query
+        current_version = crud.get_token_version(db, payload["uid"])
+        if current_version is None:
+            raise get_credentials_exception()
+        token_versions.set(payload["uid"], current_version)
+    _check_token_version(payload, current_version)
+    return Principal.from_claims(payload)
+
+
+async def get_current_principal_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    payload = await aget_valid_claims(token)
+    if not _is_stateless(payload):
+        return Principal.from_user(await _aload_current_user(payload, db))
+
+    current_version = await token_versions.aget(payload["uid"])
+    if current_version is None:
+        current_version = await async_crud.get_token_version(db, payload["uid"])
+        if current_version is None:
+            raise get_credentials_exception()
+        await token_versions.aset(payload["uid"], current_version)
+    _check_token_version(payload, current_version)
+    return Principal.from_claims(payload)
+
+
+# User lookups above stay on the primary: password, role and token version changes must apply at once
+
+
+def get_read_db(
+    db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)
+) -> Iterator[Session]:
+    # Read-only endpoints: a replica, unless the user wrote a moment ago or no replica is reachable
+    connection = replica_router.connect(current_user.id)
+    if connection is None:
+        yield db
+        return
+    replica_db = Session(bind=connection, autoflush=False, info={"replica": True})
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+        connection.close()
+
+
+async def get_async_read_db(
+    db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(get_current_principal_async)
+) -> AsyncIterator[AsyncSession]:
+    connection = await replica_router.aconnect(current_user.id)
+    if connection is None:
+        yield db
+        return
+    try:
+        async with AsyncSession(
+            bind=connection, autoflush=False, expire_on_commit=False, info={"replica": True}
+        ) as replica_db:
+            yield replica_db
+    finally:
+        await connection.close()
+
+
 def create_verification_token(email: str, expires_delta: timedelta = timedelta(hours=1)) -> str:
     to_encode = {"sub": email}
     expire = datetime.now(timezone.utc) + expires_delta
@@ -100,7 +333,7 @@ def create_reset_token(email: str, expires_delta: timedelta = timedelta(hours=1)
 
 def verify_reset_token(token: str) -> Optional[str]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         if payload.get("scope") != "reset_password":
             return None
         return payload.get("sub")
@@ -108,7 +341,18 @@ def verify_reset_token(token: str) -> Optional[str]:
         return None
 
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_admin_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to perform this action",
+        )
+    return current_user
+
+
+async def get_current_admin_user_async(
+    current_user: Principal = Depends(get_current_principal_async)
+) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Set
+
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser, parse_options_header
+from loguru import logger
+
+from app.config import (
+    SessionLocal,
+    AVATAR_MAX_BYTES,
+    AVATAR_SIZES,
+    AVATAR_FORMATS,
+    AVATAR_PRIMARY_SIZE,
+    AVATAR_WORKERS,
+    AVATAR_SPOOL_PATH,
+)
+from app.database import crud
+from app.services.storage import Storage, StorageError, avatar_storage
+
+CHUNK_SIZE = 64 * 1024
+ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+# Room for the multipart boundary and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Avatar must be at most {AVATAR_MAX_BYTES} bytes",
+    )
+
+
+def check_content_length(request: Request) -> None:
+    # Rejects an oversized upload before its body is read at all
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > AVATAR_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise too_large()
+
+
+class UploadTooLarge(MultiPartException):
+    pass
+
+
+async def capped_stream(request: Request, limit: int) -> AsyncIterator[bytes]:
+    # Chunked uploads carry no Content-Length, so the bytes actually received are counted
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            # A MultiPartException, so the parser closes the parts it has spooled so far
+            raise UploadTooLarge("Avatar is too large")
+        yield chunk
+
+
+async def read_upload(request: Request) -> UploadFile:
+    # Parsed here rather than with File(...) so the size cap applies while the body is read
+    check_content_length(request)
+    content_type, _ = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing 'file' upload")
+    parser = MultiPartParser(
+        request.headers, capped_stream(request, AVATAR_MAX_BYTES + MULTIPART_OVERHEAD), max_files=1, max_fields=10
+    )
+    try:
+        form = await parser.parse()
+    except UploadTooLarge:
+        raise too_large()
+    except MultiPartException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+    upload = form.get("file")
+    if not isinstance(upload, UploadFile):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing 'file' upload")
+    return upload
+
+
+@dataclass
+class StoredAvatar:
+    digest: str
+    filename: str
+    url: str
+    # Local copy of the original, kept for the resize job and removed by it
+    source: str
+
+
+def variant_name(digest: str, size: int, fmt: str) -> str:
+    return f"{digest}_{size}.{EXTENSIONS[fmt]}"
+
+
+def _upload_extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Avatar must be one of: {', '.join(sorted(ALLOWED_EXTENSIONS))}",
+        )
+    return extension
+
+
+async def store_upload(file: UploadFile, storage: Optional[Storage] = None) -> StoredAvatar:
+    """Copy the upload in chunks with a byte cap and store it under its content hash."""
+    storage = storage or avatar_storage
+    extension = _upload_extension(file.filename)
+    digest = hashlib.sha256()
+    size = 0
+    fd, source = tempfile.mkstemp(dir=AVATAR_SPOOL_PATH, suffix=extension)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > AVATAR_MAX_BYTES:
+                    raise too_large()
+                digest.update(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+        # Same bytes, same name: a re-upload replaces nothing and cached copies stay valid
+        name = digest.hexdigest()[:32]
+        filename = f"{name}{extension}"
+        await asyncio.to_thread(storage.put, filename, source)
+        url = await asyncio.to_thread(storage.url, filename)
+        return StoredAvatar(name, filename, url, source)
+    except StorageError as e:
+        os.remove(source)
+        logger.error(f"Avatar upload to storage failed: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Avatar storage is unavailable")
+    except BaseException:
+        os.remove(source)
+        raise
+
+
+def discard_upload(avatar: StoredAvatar) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(avatar.source)
+
+
+def render_variants(source: str, out_dir: str, digest: str, sizes, formats) -> Dict[str, str]:
+    # Runs in a worker process; Pillow is imported there only
+    from PIL import Image, ImageOps
+
+    rendered = {}
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        for size in sizes:
+            square = ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+            for fmt in formats:
+                name = variant_name(digest, size, fmt)
+                path = os.path.join(out_dir, name)
+                if fmt == "jpeg":
+                    square.convert("RGB").save(path, "JPEG", quality=85, optimize=True, progressive=True)
+                else:
+                    square.convert("RGBA").save(path, "WEBP", quality=80, method=4)
+                rendered[f"{size}.{fmt}"] = name
+    return rendered
+
+
+class AvatarProcessor:
+    def __init__(self, workers: int = AVATAR_WORKERS, storage: Optional[Storage] = None):
+        self.workers = workers
+        self.storage = storage or avatar_storage
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Strong references, otherwise pending tasks can be garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def schedule(self, user_id: int, avatar: StoredAvatar) -> asyncio.Task:
+        task = asyncio.create_task(self.process(user_id, avatar))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def process(self, user_id: int, avatar: StoredAvatar) -> Optional[str]:
+        self.start()
+        out_dir = tempfile.mkdtemp(dir=AVATAR_SPOOL_PATH)
+        try:
+            rendered = await asyncio.wrap_future(self._executor.submit(
+                render_variants, avatar.source, out_dir, avatar.digest, AVATAR_SIZES, AVATAR_FORMATS
+            ))
+            primary = rendered.get(f"{AVATAR_PRIMARY_SIZE}.{AVATAR_FORMATS[0]}") or next(iter(rendered.values()))
+            # The primary variant goes last: once it exists, the others do too
+            for name in sorted(rendered.values(), key=lambda name: name == primary):
+                await asyncio.to_thread(self.storage.put, name, os.path.join(out_dir, name))
+            new_url = await asyncio.to_thread(self.storage.url, primary)
+        except Exception as e:
+            logger.warning(f"Avatar processing failed for {avatar.filename}: {e}")
+            return None
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+            discard_upload(avatar)
+
+        switched = await asyncio.to_thread(self._switch_url, user_id, avatar.url, new_url)
+        return new_url if switched else None
+
+    @staticmethod
+    def _switch_url(user_id: int, original_url: str, new_url: str) -> bool:
+        db = SessionLocal()
+        try:
+            return crud.replace_avatar_url(db, user_id, original_url, new_url)
+        finally:
+            db.close()
+
+    async def wait(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+avatar_processor = AvatarProcessor()
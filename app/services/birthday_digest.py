@@ -0,0 +1,219 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Optional
+
+import orjson
+import redis
+from redis import asyncio as aioredis
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import (
+    REDIS_URL,
+    SessionLocal,
+    BIRTHDAY_LOOKAHEAD_DAYS,
+    BIRTHDAY_DIGEST_ENABLED,
+    BIRTHDAY_DIGEST_TTL,
+)
+from app.database.schemas import ContactResponse
+from app.services import async_utils
+from app.services.utils import get_upcoming_birthdays, upcoming_birthdays_query
+
+KEY_PREFIX = "birthdays:"
+WRITE_BATCH = 1000
+
+_redis = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+_async_redis: Optional[aioredis.Redis] = None
+_async_loop = None
+
+
+def _get_async_redis() -> aioredis.Redis:
+    global _async_redis, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_redis is None or _async_loop is not loop:
+        _async_redis = aioredis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+        _async_loop = loop
+    return _async_redis
+
+
+def user_key(today: date, user_id: int) -> str:
+    return f"{KEY_PREFIX}{today.isoformat()}:{user_id}"
+
+
+def ready_key(today: date) -> str:
+    # Set once the full pass for the day is stored; a missing user key then means "no birthdays"
+    return f"{KEY_PREFIX}{today.isoformat()}:ready"
+
+
+def lock_key(today: date) -> str:
+    return f"{KEY_PREFIX}{today.isoformat()}:lock"
+
+
+def dirty_key(today: date) -> str:
+    # Users whose contacts changed while the daily pass was running from an older snapshot
+    return f"{KEY_PREFIX}{today.isoformat()}:dirty"
+
+
+def _encode(contacts) -> bytes:
+    return orjson.dumps([ContactResponse.model_validate(c).model_dump(mode="json") for c in contacts])
+
+
+# Stores every user's upcoming birthdays for the day from one pass over contacts
+def compute_all(db: Session, today: Optional[date] = None) -> int:
+    today = today or date.today()
+    query = upcoming_birthdays_query(None, BIRTHDAY_LOOKAHEAD_DAYS, today).execution_options(yield_per=WRITE_BATCH)
+
+    users = 0
+    pipe = _redis.pipeline(transaction=False)
+    for user_id, contacts in groupby(db.scalars(query), key=lambda c: c.user_id):
+        pipe.set(user_key(today, user_id), _encode(contacts), ex=BIRTHDAY_DIGEST_TTL)
+        users += 1
+        if users % WRITE_BATCH == 0:
+            pipe.execute()
+    pipe.set(ready_key(today), 1, ex=BIRTHDAY_DIGEST_TTL)
+    pipe.execute()
+
+    # Changes made during the pass were marked instead of written; once the marker is set,
+    # refresh_user writes its own entries, so this set does not grow any more
+    pipe = _redis.pipeline()
+    pipe.smembers(dirty_key(today))
+    pipe.delete(dirty_key(today))
+    changed, _ = pipe.execute()
+    if changed:
+        # A new transaction sees what was committed during the pass
+        db.rollback()
+        for user_id in changed:
+            contacts = get_upcoming_birthdays(db, int(user_id), today=today)
+            _redis.set(user_key(today, int(user_id)), _encode(contacts), ex=BIRTHDAY_DIGEST_TTL)
+    return users
+
+
+def _decode_digest(raw: Optional[bytes], ready: Optional[bytes]) -> Optional[list]:
+    # User keys are trusted only with the ready marker: a failed refresh drops just the marker,
+    # and that user's entry may be stale
+    if ready is None:
+        return None
+    return orjson.loads(raw) if raw is not None else []
+
+
+# None means today's digest has not been built yet (or was dropped) and the caller should query live
+def get_digest(user_id: int, today: Optional[date] = None) -> Optional[list]:
+    today = today or date.today()
+    try:
+        raw, ready = _redis.mget(user_key(today, user_id), ready_key(today))
+    except redis.RedisError as e:
+        logger.warning(f"Birthday digest read failed: {e}")
+        return None
+    return _decode_digest(raw, ready)
+
+
+async def aget_digest(user_id: int, today: Optional[date] = None) -> Optional[list]:
+    today = today or date.today()
+    try:
+        raw, ready = await _get_async_redis().mget(user_key(today, user_id), ready_key(today))
+    except redis.RedisError as e:
+        logger.warning(f"Birthday digest read failed: {e}")
+        return None
+    return _decode_digest(raw, ready)
+
+
+def _mark_changed(pipe, today: date, user_id: int) -> None:
+    # Only while the pass runs: it rebuilds the marked users after setting the ready marker.
+    # The marker is read again in case the pass finished before the user was marked.
+    pipe.sadd(dirty_key(today), user_id)
+    pipe.expire(dirty_key(today), BIRTHDAY_DIGEST_TTL)
+    pipe.exists(ready_key(today))
+
+
+# Rebuilds one user's entry after a contact birthday changed
+def refresh_user(db: Session, user_id: int, today: Optional[date] = None) -> None:
+    today = today or date.today()
+    try:
+        if not _redis.exists(ready_key(today)):
+            if not _redis.exists(lock_key(today)):
+                return
+            pipe = _redis.pipeline()
+            _mark_changed(pipe, today, user_id)
+            *_, ready = pipe.execute()
+            if not ready:
+                return
+        contacts = get_upcoming_birthdays(db, user_id, today=today)
+        _redis.set(user_key(today, user_id), _encode(contacts), ex=BIRTHDAY_DIGEST_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"Birthday digest refresh failed, dropping today's digest: {e}")
+        _drop_day(today)
+
+
+async def arefresh_user(db: AsyncSession, user_id: int, today: Optional[date] = None) -> None:
+    today = today or date.today()
+    client = _get_async_redis()
+    try:
+        if not await client.exists(ready_key(today)):
+            if not await client.exists(lock_key(today)):
+                return
+            pipe = client.pipeline()
+            _mark_changed(pipe, today, user_id)
+            *_, ready = await pipe.execute()
+            if not ready:
+                return
+        contacts = await async_utils.get_upcoming_birthdays(db, user_id, today=today)
+        await client.set(user_key(today, user_id), _encode(contacts), ex=BIRTHDAY_DIGEST_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"Birthday digest refresh failed, dropping today's digest: {e}")
+        await _adrop_day(today)
+
+
+def _drop_day(today: date) -> None:
+    # Without the ready marker the endpoint falls back to a live query instead of stale data
+    try:
+        _redis.delete(ready_key(today))
+    except redis.RedisError:
+        pass
+
+
+async def _adrop_day(today: date) -> None:
+    try:
+        await _get_async_redis().delete(ready_key(today))
+    except redis.RedisError:
+        pass
+
+
+def run_daily_job(today: Optional[date] = None) -> None:
+    today = today or date.today()
+    if _redis.exists(ready_key(today)):
+        return
+    # Every worker runs the scheduler; only the one holding the lock does the pass
+    if not _redis.set(lock_key(today), 1, nx=True, ex=3600):
+        return
+    db = SessionLocal()
+    try:
+        users = compute_all(db, today)
+        logger.info(f"Birthday digest for {today} stored for {users} users")
+    finally:
+        db.close()
+        _redis.delete(lock_key(today))
+
+
+def seconds_until_tomorrow() -> float:
+    now = datetime.now()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (tomorrow - now).total_seconds() + 1
+
+
+async def run_scheduler() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(run_daily_job)
+        except Exception as e:
+            logger.exception(f"Birthday digest job failed: {e}")
+            await asyncio.sleep(300)
+            continue
+        await asyncio.sleep(seconds_until_tomorrow())
+
+
+def start_scheduler() -> Optional[asyncio.Task]:
+    if not BIRTHDAY_DIGEST_ENABLED:
+        return None
+    return asyncio.create_task(run_scheduler())
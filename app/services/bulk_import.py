@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
+
+from app.database import crud
+from app.database.replicas import replica_router
+from app.services import birthday_digest
+from app.services.response_cache import response_cache
+from app.database.schemas import BulkImportError, BulkImportResponse, ContactCreate
+
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+
+class InvalidRow:
+    def __init__(self, error: str):
+        self.error = error
+
+
+def detect_upload_format(filename: str, content_type: str) -> str:
+    name = (filename or "").lower()
+    if content_type in CSV_TYPES or name.endswith(".csv"):
+        return "csv"
+    if content_type in NDJSON_TYPES or name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError("Unsupported file type, expected CSV or NDJSON")
+
+
+def iter_upload_rows(file: BinaryIO, fmt: str) -> Iterator:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for record in csv.DictReader(text):
+                # Empty CSV cells mean "not set" for the optional fields
+                yield {key: value if value != "" else None for key, value in record.items()}
+        else:
+            for line in text:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield InvalidRow(f"Invalid JSON: {e.msg}")
+    finally:
+        text.detach()
+
+
+async def read_import_rows(request: Request) -> Iterable:
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("application/json"):
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of contacts")
+        return payload
+
+    if content_type.startswith("multipart/form-data"):
+        # Starlette spools large uploads to disk, so rows are read from the file one at a time
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing 'file' upload")
+        try:
+            fmt = detect_upload_format(upload.filename, upload.content_type)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+        return iter_upload_rows(upload.file, fmt)
+
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send a JSON array or a multipart CSV/NDJSON file upload",
+    )
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _row_email(raw) -> str:
+    return raw.get("email") if isinstance(raw, dict) else None
+
+
+def _insert_batch(db: Session, batch: list, user_id: int, result: BulkImportResponse) -> None:
+    existing = crud.get_existing_contact_emails(db, [contact.email for _, contact in batch])
+    pending = []
+    for row_number, contact in batch:
+        if contact.email in existing:
+            result.errors.append(BulkImportError(row=row_number, email=contact.email, error="Email already exists"))
+        else:
+            pending.append((row_number, contact))
+    if not pending:
+        return
+
+    try:
+        ids = crud.bulk_create_contacts(db, [contact for _, contact in pending], user_id)
+        db.commit()
+    except IntegrityError:
+        # A concurrent writer took one of the emails: retry row by row so only that row fails
+        db.rollback()
+        ids = []
+        for row_number, contact in pending:
+            try:
+                with db.begin_nested():
+                    ids.extend(crud.bulk_create_contacts(db, [contact], user_id))
+            except IntegrityError:
+                result.errors.append(BulkImportError(row=row_number, email=contact.email, error="Email already exists"))
+        db.commit()
+
+    result.ids.extend(ids)
+    result.created += len(ids)
+
+
+def import_contacts(db: Session, rows: Iterable, user_id: int, batch_size: int) -> BulkImportResponse:
+    result = BulkImportResponse()
+    seen_emails = set()
+    has_birthdays = False
+    numbered = enumerate(rows, start=1)
+
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            break
+
+        batch = []
+        for row_number, raw in chunk:
+            if isinstance(raw, InvalidRow):
+                result.errors.append(BulkImportError(row=row_number, error=raw.error))
+                continue
+            try:
+                contact = ContactCreate.model_validate(raw)
+            except ValidationError as e:
+                result.errors.append(BulkImportError(
+                    row=row_number, email=_row_email(raw), error=_validation_message(e)
+                ))
+                continue
+            if contact.email in seen_emails:
+                result.errors.append(BulkImportError(
+                    row=row_number, email=contact.email, error="Duplicate email in import"
+                ))
+                continue
+            seen_emails.add(contact.email)
+            batch.append((row_number, contact))
+
+        _insert_batch(db, batch, user_id, result)
+        has_birthdays = has_birthdays or any(contact.birthday is not None for _, contact in batch)
+
+    if result.created:
+        replica_router.pin(user_id)
+        response_cache.invalidate_user(user_id)
+    if result.created and has_birthdays:
+        birthday_digest.refresh_user(db, user_id)
+    return result
@@ -1,6 +1,13 @@
+import asyncio
+import json
 import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import httpx
 import requests
 from dotenv import load_dotenv
+from email_validator import EmailNotValidError, validate_email
 
 # Завантажуємо змінні середовища з .env
 load_dotenv()
@@ -8,23 +15,140 @@ load_dotenv()
 MAILGUN_API_KEY = os.getenv("MAILGUN_API_KEY")
 MAILGUN_DOMAIN = os.getenv("MAILGUN_DOMAIN")
 MAILGUN_SENDER = os.getenv("MAILGUN_SENDER")
+MAILGUN_API_BASE = os.getenv("MAILGUN_API_BASE", "https://api.mailgun.net/v3")
+MAILGUN_TIMEOUT = 10
+# Mailgun accepts at most 1000 recipients per batch message
+MAILGUN_BATCH_SIZE = 1000
+MAILGUN_BATCH_CONCURRENCY = 4
 
-def send_email(subject: str, to_email: str, body: str):
+
+def _check_settings():
     if not MAILGUN_API_KEY or not MAILGUN_DOMAIN or not MAILGUN_SENDER:
         raise ValueError("Mailgun API Key, Domain або Sender Email не налаштовані")
 
-    url = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
-    auth = ("api", MAILGUN_API_KEY)
-    data = {
+
+def _message_data(subject: str, to_email: str, body: str) -> dict:
+    return {
         "from": f"Admin <{MAILGUN_SENDER}>",
         "to": [to_email],
         "subject": subject,
         "text": body
     }
 
-    response = requests.post(url, auth=auth, data=data)
+
+def send_email(subject: str, to_email: str, body: str):
+    _check_settings()
+
+    url = f"{MAILGUN_API_BASE}/{MAILGUN_DOMAIN}/messages"
+    auth = ("api", MAILGUN_API_KEY)
+    data = _message_data(subject, to_email, body)
+
+    response = requests.post(url, auth=auth, data=data, timeout=MAILGUN_TIMEOUT)
 
     if response.status_code == 200:
         print(f"Email was sent {to_email}")
     else:
         print(f"There is an error sending email: {response.status_code}, {response.text}")
+
+
+# Used by the outbox worker with one pooled client; the caller decides what to do with the status
+async def send_email_async(client: httpx.AsyncClient, subject: str, to_email: str, body: str) -> httpx.Response:
+    _check_settings()
+    return await client.post(
+        f"{MAILGUN_API_BASE}/{MAILGUN_DOMAIN}/messages",
+        auth=("api", MAILGUN_API_KEY),
+        data=_message_data(subject, to_email, body),
+    )
+
+
+@dataclass
+class BatchSendReport:
+    sent: List[str] = field(default_factory=list)
+    # email -> reason; a rejected Mailgun call fails every recipient in it
+    failed: Dict[str, str] = field(default_factory=dict)
+    requests: int = 0
+
+
+_batch_client: Optional[httpx.AsyncClient] = None
+_batch_loop = None
+
+
+def get_batch_client() -> httpx.AsyncClient:
+    # One keep-alive pool per event loop, shared by every batch sent from it
+    global _batch_client, _batch_loop
+    loop = asyncio.get_running_loop()
+    if _batch_client is None or _batch_loop is not loop:
+        _batch_client = httpx.AsyncClient(
+            timeout=MAILGUN_TIMEOUT * 3,
+            limits=httpx.Limits(max_connections=MAILGUN_BATCH_CONCURRENCY, max_keepalive_connections=MAILGUN_BATCH_CONCURRENCY),
+        )
+        _batch_loop = loop
+    return _batch_client
+
+
+async def close_batch_client():
+    global _batch_client, _batch_loop
+    # A client from another (already finished) loop cannot be closed from here
+    if _batch_client is not None and _batch_loop is asyncio.get_running_loop():
+        await _batch_client.aclose()
+    _batch_client = None
+    _batch_loop = None
+
+
+def _chunks(recipients: Dict[str, dict], size: int) -> List[Dict[str, dict]]:
+    items = list(recipients.items())
+    return [dict(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+# recipients maps email -> variables; the body refers to them as %recipient.name%.
+# With recipient-variables set, Mailgun delivers a separate message to each address.
+async def send_batch_async(
+    subject: str,
+    body: str,
+    recipients: Mapping[str, dict],
+    client: Optional[httpx.AsyncClient] = None,
+    batch_size: int = MAILGUN_BATCH_SIZE,
+) -> BatchSendReport:
+    _check_settings()
+    client = client or get_batch_client()
+    report = BatchSendReport()
+
+    valid = {}
+    for to_email, variables in recipients.items():
+        try:
+            validate_email(to_email, check_deliverability=False)
+        except EmailNotValidError as e:
+            report.failed[to_email] = str(e)
+            continue
+        valid[to_email] = variables
+
+    semaphore = asyncio.Semaphore(MAILGUN_BATCH_CONCURRENCY)
+
+    async def send_chunk(chunk: Dict[str, dict]) -> Optional[str]:
+        data = {
+            "from": f"Admin <{MAILGUN_SENDER}>",
+            "to": list(chunk),
+            "subject": subject,
+            "text": body,
+            "recipient-variables": json.dumps(chunk),
+        }
+        async with semaphore:
+            try:
+                response = await client.post(
+                    f"{MAILGUN_API_BASE}/{MAILGUN_DOMAIN}/messages", auth=("api", MAILGUN_API_KEY), data=data
+                )
+            except httpx.HTTPError as e:
+                return f"{type(e).__name__}: {e}"
+        if response.is_success:
+            return None
+        return f"Mailgun {response.status_code}: {response.text[:200]}"
+
+    chunks = _chunks(valid, batch_size)
+    errors = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+    for chunk, error in zip(chunks, errors):
+        report.requests += 1
+        if error is None:
+            report.sent.extend(chunk)
+        else:
+            report.failed.update(dict.fromkeys(chunk, error))
+    return report
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+import httpx
+from loguru import logger
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    SessionLocal,
+    EMAIL_WORKER_ENABLED,
+    EMAIL_BATCH_SIZE,
+    EMAIL_WORKER_CONCURRENCY,
+    EMAIL_POLL_INTERVAL,
+    EMAIL_SEND_TIMEOUT,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_BASE_SECONDS,
+    EMAIL_RETRY_MAX_SECONDS,
+)
+from app.database.models import EmailOutbox
+from app.services.email import send_email_async
+
+# A claimed message is invisible to other workers for this long, then it is picked up again
+CLAIM_LEASE = timedelta(seconds=EMAIL_SEND_TIMEOUT * 3)
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    to_email: str
+    subject: str
+    body: str
+    attempts: int
+
+
+@dataclass
+class SendResult:
+    id: int
+    sent: bool
+    error: Optional[str] = None
+    # 4xx other than 429 will not get better on retry
+    permanent: bool = False
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS))
+
+
+def claim_batch(db: Session, now: datetime, limit: int = EMAIL_BATCH_SIZE) -> List[OutboxMessage]:
+    query = (
+        select(EmailOutbox)
+        .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        # Several workers can poll at once; each takes rows the others have not locked
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.scalars(query).all()
+    claimed = [OutboxMessage(r.id, r.to_email, r.subject, r.body, r.attempts) for r in rows]
+    for row in rows:
+        row.next_attempt_at = now + CLAIM_LEASE
+    db.commit()
+    return claimed
+
+
+def record_results(db: Session, results: List[SendResult], now: datetime) -> None:
+    attempts = dict(db.execute(
+        select(EmailOutbox.id, EmailOutbox.attempts).where(EmailOutbox.id.in_([r.id for r in results]))
+    ).all())
+    for result in results:
+        tried = attempts[result.id] + 1
+        if result.sent:
+            values = {"status": "sent", "attempts": tried, "sent_at": now, "last_error": None}
+        elif result.permanent or tried >= EMAIL_MAX_ATTEMPTS:
+            logger.error(f"Email {result.id} moved to dead-letter after {tried} attempts: {result.error}")
+            values = {"status": "dead", "attempts": tried, "last_error": result.error}
+        else:
+            values = {"attempts": tried, "next_attempt_at": now + retry_delay(tried), "last_error": result.error}
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == result.id).values(**values))
+    db.commit()
+
+
+def requeue_dead(db: Session) -> int:
+    result = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == "dead")
+        .values(status="pending", attempts=0, next_attempt_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+    return result.rowcount
+
+
+async def deliver(client: httpx.AsyncClient, message: OutboxMessage) -> SendResult:
+    try:
+        response = await send_email_async(client, message.subject, message.to_email, message.body)
+    except httpx.HTTPError as e:
+        return SendResult(message.id, sent=False, error=f"{type(e).__name__}: {e}")
+    except ValueError as e:
+        # Mailgun is not configured: counted as an attempt, so the row is not re-leased forever
+        return SendResult(message.id, sent=False, error=str(e))
+    if response.is_success:
+        return SendResult(message.id, sent=True)
+    error = f"Mailgun {response.status_code}: {response.text[:200]}"
+    permanent = 400 <= response.status_code < 500 and response.status_code != 429
+    return SendResult(message.id, sent=False, error=error, permanent=permanent)
+
+
+def _with_session(session_factory: Callable[[], Session], func, *args):
+    db = session_factory()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+async def process_batch(
+    client: httpx.AsyncClient,
+    session_factory: Callable[[], Session] = SessionLocal,
+    now: Optional[datetime] = None,
+) -> int:
+    now = now or datetime.now(timezone.utc)
+    # Short DB transactions stay on a thread; only the HTTP calls run concurrently on the loop
+    messages = await asyncio.to_thread(_with_session, session_factory, claim_batch, now)
+    if not messages:
+        return 0
+
+    semaphore = asyncio.Semaphore(EMAIL_WORKER_CONCURRENCY)
+
+    async def send(message: OutboxMessage) -> SendResult:
+        async with semaphore:
+            return await deliver(client, message)
+
+    results = await asyncio.gather(*(send(m) for m in messages))
+    await asyncio.to_thread(_with_session, session_factory, record_results, results, datetime.now(timezone.utc))
+    return len(messages)
+
+
+def create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=EMAIL_SEND_TIMEOUT,
+        limits=httpx.Limits(max_connections=EMAIL_WORKER_CONCURRENCY),
+    )
+
+
+async def run_worker(session_factory: Callable[[], Session] = SessionLocal) -> None:
+    async with create_client() as client:
+        while True:
+            try:
+                processed = await process_batch(client, session_factory)
+            except Exception as e:
+                logger.exception(f"Email outbox batch failed: {e}")
+                processed = 0
+            # A full batch means there is probably more waiting
+            if processed < EMAIL_BATCH_SIZE:
+                await asyncio.sleep(EMAIL_POLL_INTERVAL)
+
+
+def start_worker() -> Optional[asyncio.Task]:
+    if not EMAIL_WORKER_ENABLED:
+        return None
+    return asyncio.create_task(run_worker())
+
+
+if __name__ == "__main__":
+    # Standalone worker: EMAIL_WORKER_ENABLED=false for the API and run this as its own process
+    parser = argparse.ArgumentParser(description="Send queued emails from the email_outbox table")
+    parser.add_argument("--requeue-dead", action="store_true", help="move dead-lettered emails back to pending and exit")
+    args = parser.parse_args()
+    if args.requeue_dead:
+        print(f"Requeued {_with_session(SessionLocal, requeue_dead)} emails")
+    else:
+        asyncio.run(run_worker())
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+EXPORT_FIELDS = ("id", "first_name", "last_name", "email", "phone", "birthday", "extra_info")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are grouped into chunks so that each write to the socket carries more than one line
+ROWS_PER_CHUNK = 500
+
+
+def _row_dict(row) -> dict:
+    data = dict(row._mapping)
+    if data.get("birthday") is not None:
+        data["birthday"] = data["birthday"].isoformat()
+    return data
+
+
+class _Encoder:
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.buffer = io.StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=EXPORT_FIELDS) if fmt == "csv" else None
+
+    def header(self) -> str:
+        if self.writer is None:
+            return ""
+        self.writer.writeheader()
+        return self.flush()
+
+    def write(self, row) -> None:
+        if self.writer is None:
+            self.buffer.write(json.dumps(_row_dict(row)) + "\n")
+        else:
+            self.writer.writerow(_row_dict(row))
+
+    def flush(self) -> str:
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+
+def encode_rows(rows: Iterable, fmt: str) -> Iterator[str]:
+    encoder = _Encoder(fmt)
+    header = encoder.header()
+    if header:
+        yield header
+    for count, row in enumerate(rows, start=1):
+        encoder.write(row)
+        if count % ROWS_PER_CHUNK == 0:
+            yield encoder.flush()
+    tail = encoder.flush()
+    if tail:
+        yield tail
+
+
+async def aencode_rows(rows: AsyncIterable, fmt: str) -> AsyncIterator[str]:
+    encoder = _Encoder(fmt)
+    header = encoder.header()
+    if header:
+        yield header
+    count = 0
+    async for row in rows:
+        count += 1
+        encoder.write(row)
+        if count % ROWS_PER_CHUNK == 0:
+            yield encoder.flush()
+    tail = encoder.flush()
+    if tail:
+        yield tail
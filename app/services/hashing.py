@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+from app.services import security
+from app.services.metrics import PASSWORD_HASH_REJECTED, time_password_hash
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                # spawn: forking a process that already runs an event loop and threads is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func, *args):
+        with self._lock:
+            # Waiting longer than the queue allows is worse than failing fast and letting the client retry
+            if self._pending >= self.max_queue:
+                raise HashingBusyError()
+            self._pending += 1
+        try:
+            if self.workers <= 0:
+                return await asyncio.to_thread(func, *args)
+            self.start()
+            return await asyncio.wrap_future(self._executor.submit(func, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(security.verify_password, plain_password, hashed_password)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password operations in progress, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    try:
+        with time_password_hash("hash"):
+            return await password_hasher.hash(password)
+    except HashingBusyError:
+        PASSWORD_HASH_REJECTED.labels("hash").inc()
+        raise _busy()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    try:
+        with time_password_hash("verify"):
+            return await password_hasher.verify(plain_password, hashed_password)
+    except HashingBusyError:
+        PASSWORD_HASH_REJECTED.labels("verify").inc()
+        raise _busy()
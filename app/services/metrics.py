@@ -0,0 +1,224 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi_limiter import FastAPILimiter, http_default_callback
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import METRICS_ENABLED
+
+# Latency buckets in seconds, from cache hits to slow exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served")
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements issued while serving a request", ["route"], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_QUERY_TIME = Histogram(
+    "db_query_time_per_request_seconds", "Total SQL time while serving a request", ["route"], buckets=LATENCY_BUCKETS
+)
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "SQL statement latency", buckets=LATENCY_BUCKETS)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time including the pool queue", ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1, 2, 5, 10),
+)
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected_total", "Hashing requests rejected with 503", ["operation"])
+RATE_LIMITED = Counter("rate_limit_rejections_total", "Requests rejected by the rate limiter", ["route"])
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+# Copied into the threadpool with the rest of the context, so sync routes count too
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def route_label(scope: Scope) -> str:
+    # The path template, never the raw path: /contacts/{contact_id} is one series, not one per id
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    # Plain ASGI: BaseHTTPMiddleware would add a task and a memory stream per request
+    def __init__(self, app: ASGIApp, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_PROGRESS.dec()
+            _request_stats.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUEST_QUERIES.labels(route).observe(stats.queries)
+            REQUEST_QUERY_TIME.labels(route).observe(stats.query_seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    QUERY_LATENCY.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+def instrument_pool(pool: Pool) -> None:
+    # The checkout and connect events fire once a connection has been obtained, so nothing public
+    # marks the start of the wait; the public Pool.connect(), which Engine calls for every
+    # checkout, is timed instead (queue wait plus pre-ping)
+    if getattr(pool, "_metrics_instrumented", False):
+        return
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+
+
+@contextmanager
+def time_password_hash(operation: str):
+    started = time.perf_counter()
+    yield
+    PASSWORD_HASH_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+
+async def rate_limit_callback(request: Request, response: Response, pexpire: int):
+    RATE_LIMITED.labels(route_label(request.scope)).inc()
+    return await http_default_callback(request, response, pexpire)
+
+
+def instrument_limiter() -> None:
+    # Called after FastAPILimiter.init, which sets the default callback
+    if METRICS_ENABLED:
+        FastAPILimiter.http_callback = rate_limit_callback
+
+
+class PoolCollector:
+    # Read at scrape time, so there is no cost on the request path
+    def __init__(self):
+        self.pools = {}
+
+    def register(self, name: str, pool: Pool) -> None:
+        self.pools[name] = pool
+        instrument_pool(pool)
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine"])
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections above pool_size", labels=["engine"])
+        for name, pool in self.pools.items():
+            # Only QueuePool and its async variant keep these numbers
+            if not hasattr(pool, "checkedout"):
+                continue
+            size.add_metric([name], pool.size())
+            checked_out.add_metric([name], pool.checkedout())
+            overflow.add_metric([name], max(0, pool.overflow()))
+        yield size
+        yield checked_out
+        yield overflow
+
+
+class CacheCollector:
+    def collect(self):
+        from app.services.auth import token_cache
+        from app.services.response_cache import response_cache
+        from app.services.revocation import revocation_store
+        from app.services.user_cache import user_cache
+
+        events = CounterMetricFamily("cache_events", "Cache hits, misses and errors", labels=["cache", "event"])
+        sizes = GaugeMetricFamily("cache_size", "Entries held in process", labels=["cache"])
+        caches = {
+            "user": user_cache, "token": token_cache,
+            "response": response_cache, "revocation": revocation_store,
+        }
+        for name, cache in caches.items():
+            for key, value in cache.stats().items():
+                if key == "size":
+                    sizes.add_metric([name], value)
+                elif isinstance(value, int):
+                    events.add_metric([name, key], value)
+        yield events
+        yield sizes
+
+
+pool_collector = PoolCollector()
+
+
+def register_engine(name: str, engine: Engine) -> None:
+    if METRICS_ENABLED:
+        pool_collector.register(name, engine.pool)
+
+
+def setup(app: FastAPI, engine: Engine) -> None:
+    if not METRICS_ENABLED:
+        return
+    # Class-level listeners also cover the sync engine behind the async one
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    register_engine("sync", engine)
+    REGISTRY.register(pool_collector)
+    REGISTRY.register(CacheCollector())
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+
+def metrics_endpoint() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
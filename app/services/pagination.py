@@ -0,0 +1,42 @@
+import base64
+import json
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.config import CONTACTS_PAGE_SIZE, CONTACTS_MAX_PAGE_SIZE
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError
+        return last_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def page_limit(limit: Optional[int]) -> int:
+    return min(limit or CONTACTS_PAGE_SIZE, CONTACTS_MAX_PAGE_SIZE)
+
+
+def paginate(items: Sequence, limit: int, request: Request, response: Response) -> list:
+    # Callers fetch limit + 1 rows; the extra row only tells us that another page exists
+    page = list(items[:limit])
+    if len(items) > limit:
+        next_cursor = encode_cursor(page[-1].id)
+        next_url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return page
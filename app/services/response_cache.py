@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Awaitable, Callable, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import orjson
+import redis
+from redis import asyncio as aioredis
+from fastapi import Request, Response
+from loguru import logger
+from pydantic import TypeAdapter
+
+from app.config import REDIS_URL, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TTL
+from app.database.schemas import ContactResponse
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+KEY_PREFIX = "contacts:cache:"
+# Response headers that are part of the cached representation
+CACHED_HEADERS = (NEXT_CURSOR_HEADER, "Link")
+# Per-user data: shared caches must not store it, browsers revalidate with the ETag
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+CONTACT = TypeAdapter(ContactResponse)
+CONTACT_LIST = TypeAdapter(list[ContactResponse])
+
+
+class RowsRenderer:
+    # For column-only rows selected in the model's field order (crud.CONTACT_COLUMNS). They hold
+    # data validated on write, so they are encoded with orjson as is instead of building models
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+
+    def render(self, rows) -> bytes:
+        fields = self.fields
+        return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+
+CONTACT_ROWS = RowsRenderer(tuple(ContactResponse.model_fields))
+
+
+def generation_key(user_id: int) -> str:
+    return f"{KEY_PREFIX}gen:{user_id}"
+
+
+def entry_key(user_id: int, request_hash: str) -> str:
+    return f"{KEY_PREFIX}{user_id}:{request_hash}"
+
+
+def request_hash(request: Request) -> str:
+    # Parameter order does not change the response, so it does not change the key either
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return hashlib.sha256(f"{request.url.path}?{query}".encode()).hexdigest()[:32]
+
+
+def make_etag(user_id: int, generation: int, key: str) -> str:
+    return '"' + hashlib.sha256(f"{user_id}:{generation}:{key}".encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(etag: str, request: Request) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def encode_entry(generation: int, headers: dict, body: bytes) -> bytes:
+    # orjson never emits a raw newline, so the first one ends the metadata
+    return orjson.dumps([generation, headers]) + b"\n" + body
+
+
+def decode_entry(raw: bytes) -> Tuple[int, dict, bytes]:
+    meta, body = raw.split(b"\n", 1)
+    generation, headers = orjson.loads(meta)
+    return generation, headers, body
+
+
+def render(adapter: Union[TypeAdapter, RowsRenderer], result) -> bytes:
+    # The same JSON FastAPI would produce through response_model, built once and stored as is
+    if isinstance(adapter, RowsRenderer):
+        return adapter.render(result)
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+
+class ResponseCache:
+    def __init__(self, redis_url: str = REDIS_URL, ttl: int = RESPONSE_CACHE_TTL, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._async_redis = None
+        self._async_loop = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = aioredis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._async_loop = loop
+        return self._async_redis
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "not_modified": self.not_modified, "errors": self.errors}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @staticmethod
+    def _initial_generation() -> int:
+        # A lost counter restarts from the clock, so ETags issued before the loss never match again
+        return int(time.time() * 1000)
+
+    # Reads
+
+    def _cached_response(self, request: Request, user_id: int, key: str, generation: int, raw) -> Tuple[str, Optional[Response]]:
+        etag = make_etag(user_id, generation, key)
+        if etag_matches(etag, request):
+            self._count("not_modified")
+            return etag, Response(status_code=304, headers={"ETag": etag, **CACHE_HEADERS})
+        if raw is not None:
+            entry_generation, headers, body = decode_entry(raw)
+            if entry_generation == generation:
+                self._count("hits")
+                return etag, self._response(body, headers, etag)
+        self._count("misses")
+        return etag, None
+
+    @staticmethod
+    def _response(body: bytes, headers: dict, etag: str) -> Response:
+        return Response(content=body, media_type="application/json", headers={**headers, "ETag": etag, **CACHE_HEADERS})
+
+    @staticmethod
+    def _headers(response: Response) -> dict:
+        return {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+
+    def _uncached(self, adapter, result, response: Response) -> Response:
+        # Rendered here as well, so FastAPI does not validate the result again through response_model
+        return Response(content=render(adapter, result), media_type="application/json", headers=self._headers(response))
+
+    def serve(
+        self,
+        request: Request,
+        response: Response,
+        user_id: int,
+        adapter: TypeAdapter,
+        load: Callable,
+        store: bool = True,
+    ):
+        """Cached JSON response for the request, or load() rendered and stored under the user's generation.
+
+        adapter is a TypeAdapter for ORM results or a RowsRenderer for column-only rows. store=False
+        (a replica read) still serves cached entries but never stores or ETags what load() returns.
+        """
+        if not self.enabled:
+            return self._uncached(adapter, load(), response)
+        key = request_hash(request)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            # Sets the counter only if missing; GET then always returns a value
+            pipe.set(generation_key(user_id), self._initial_generation(), nx=True)
+            pipe.get(generation_key(user_id))
+            pipe.get(entry_key(user_id, key))
+            _, generation, raw = pipe.execute()
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Response cache read failed: {e}")
+            return self._uncached(adapter, load(), response)
+
+        generation = int(generation)
+        etag, cached = self._cached_response(request, user_id, key, generation, raw)
+        if cached is not None:
+            return cached
+        if not store:
+            # A replica can lag behind the write that set this generation
+            return self._uncached(adapter, load(), response)
+
+        body = render(adapter, load())
+        headers = self._headers(response)
+        try:
+            self.redis.set(entry_key(user_id, key), encode_entry(generation, headers, body), ex=self.ttl)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Response cache write failed: {e}")
+        return self._response(body, headers, etag)
+
+    async def aserve(
+        self,
+        request: Request,
+        response: Response,
+        user_id: int,
+        adapter: TypeAdapter,
+        load: Callable[[], Awaitable],
+        store: bool = True,
+    ):
+        if not self.enabled:
+            return self._uncached(adapter, await load(), response)
+        key = request_hash(request)
+        try:
+            pipe = self.async_redis.pipeline(transaction=False)
+            pipe.set(generation_key(user_id), self._initial_generation(), nx=True)
+            pipe.get(generation_key(user_id))
+            pipe.get(entry_key(user_id, key))
+            _, generation, raw = await pipe.execute()
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Response cache read failed: {e}")
+            return self._uncached(adapter, await load(), response)
+
+        generation = int(generation)
+        etag, cached = self._cached_response(request, user_id, key, generation, raw)
+        if cached is not None:
+            return cached
+        if not store:
+            return self._uncached(adapter, await load(), response)
+
+        body = render(adapter, await load())
+        headers = self._headers(response)
+        try:
+            await self.async_redis.set(entry_key(user_id, key), encode_entry(generation, headers, body), ex=self.ttl)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Response cache write failed: {e}")
+        return self._response(body, headers, etag)
+
+    # Invalidation: one INCR makes every cached response of the user unreachable
+
+    def invalidate_user(self, user_id: int) -> None:
+        if not self.enabled:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(generation_key(user_id), self._initial_generation(), nx=True)
+            pipe.incr(generation_key(user_id))
+            pipe.execute()
+        except redis.RedisError as e:
+            # Entries written before the failure can be served until they expire (RESPONSE_CACHE_TTL)
+            self._count("errors")
+            logger.error(f"Response cache invalidation failed for user {user_id}: {e}")
+
+    async def ainvalidate_user(self, user_id: int) -> None:
+        if not self.enabled:
+            return
+        try:
+            pipe = self.async_redis.pipeline()
+            pipe.set(generation_key(user_id), self._initial_generation(), nx=True)
+            pipe.incr(generation_key(user_id))
+            await pipe.execute()
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.error(f"Response cache invalidation failed for user {user_id}: {e}")
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,337 @@
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from typing import Iterable, Optional
+
+import redis
+from redis import asyncio as aioredis
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.config import (
+    REDIS_URL,
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_REBUILD_INTERVAL,
+    REVOCATION_SYNC_INTERVAL,
+)
+
+KEY_PREFIX = "revoked:"
+# Every revoked jti / user with its expiry as score; the bloom filter is rebuilt from it
+INDEX_KEY = KEY_PREFIX + "index"
+# The same members scored by when they were revoked, so a sync only reads what is new
+LOG_KEY = KEY_PREFIX + "log"
+# Revocations stamped by a worker whose clock runs this far behind are still picked up
+CLOCK_SKEW = 5.0
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.count = 0
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        # Counts repeats too, so it only over-estimates how full the filter is
+        self.count += 1
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def jti_member(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def user_member(subject: str) -> str:
+    return f"user:{subject}"
+
+
+def unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Token revocation store is unavailable",
+    )
+
+
+class RevocationStore:
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = REVOCATION_BLOOM_ERROR_RATE,
+        sync_interval: float = REVOCATION_SYNC_INTERVAL,
+        rebuild_interval: float = REVOCATION_REBUILD_INTERVAL,
+    ):
+        self.redis_url = redis_url
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._async_redis = None
+        self._async_loop = None
+        self.bloom: Optional[BloomFilter] = None
+        # Revoked here since the last sync; they may be missing from the snapshot being built
+        self._recent = set()
+        # Wall-clock time the last sync started; the next incremental one reads the log from there
+        self._synced_until = 0.0
+        self._rebuilt_at = 0.0
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = aioredis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._async_loop = loop
+        return self._async_redis
+
+    def reset_stats(self) -> None:
+        self.bloom_negatives = 0
+        self.redis_checks = 0
+        self.false_positives = 0
+        self.errors = 0
+        self.rebuilds = 0
+        self.incremental_syncs = 0
+
+    def stats(self) -> dict:
+        return {
+            "bloom_negatives": self.bloom_negatives,
+            "redis_checks": self.redis_checks,
+            "false_positives": self.false_positives,
+            "errors": self.errors,
+            "rebuilds": self.rebuilds,
+            "incremental_syncs": self.incremental_syncs,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    # Bloom filter
+
+    def sync(self) -> int:
+        if self._needs_rebuild():
+            return self.rebuild()
+        return self._sync_recent()
+
+    def _needs_rebuild(self) -> bool:
+        # Only a rebuild drops expired members, so it also runs once the filter is over capacity
+        bloom = self.bloom
+        return (
+            bloom is None
+            or time.monotonic() - self._rebuilt_at >= self.rebuild_interval
+            or bloom.count > bloom.capacity
+        )
+
+    def rebuild(self) -> int:
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(INDEX_KEY, "-inf", now)
+        # Every worker rebuilds within rebuild_interval, so older log entries are never read again
+        pipe.zremrangebyscore(LOG_KEY, "-inf", now - self.rebuild_interval - CLOCK_SKEW)
+        pipe.zrange(INDEX_KEY, 0, -1)
+        _, _, members = pipe.execute()
+        bloom = BloomFilter(max(self.capacity, len(members) * 2), self.error_rate)
+        for member in members:
+            bloom.add(member.decode())
+        with self._lock:
+            for member in self._recent:
+                bloom.add(member)
+            self._recent.clear()
+            # Swapped in whole, so readers never see a half-built filter
+            self.bloom = bloom
+            self._synced_until = now
+        self._rebuilt_at = time.monotonic()
+        self._count("rebuilds")
+        return len(members)
+
+    def _sync_recent(self) -> int:
+        now = time.time()
+        # Overlaps the previous read; adding a member twice is harmless
+        members = self.redis.zrangebyscore(LOG_KEY, self._synced_until - CLOCK_SKEW, "+inf")
+        with self._lock:
+            for member in members:
+                self.bloom.add(member.decode())
+            # Already in the filter, and in Redis for the next rebuild
+            self._recent.clear()
+            self._synced_until = now
+        self._count("incremental_syncs")
+        return len(members)
+
+    def _ensure_bloom(self) -> Optional[BloomFilter]:
+        # First use before the background sync ran; retried at most once per interval
+        if self.bloom is None and time.monotonic() - self._last_attempt >= self.sync_interval:
+            self._last_attempt = time.monotonic()
+            try:
+                self.sync()
+            except redis.RedisError as e:
+                self._count("errors")
+                logger.warning(f"Revocation bloom sync failed: {e}")
+        return self.bloom
+
+    def _candidates(self, claims: dict) -> list:
+        bloom = self._ensure_bloom()
+        members = []
+        if claims.get("jti"):
+            members.append(jti_member(claims["jti"]))
+        if claims.get("sub"):
+            members.append(user_member(claims["sub"]))
+        if bloom is None:
+            # Never synced: every lookup has to go to Redis
+            return members
+        return [member for member in members if member in bloom]
+
+    @staticmethod
+    def _revoked(claims: dict, jti_revoked, user_cutoff) -> bool:
+        if jti_revoked:
+            return True
+        return user_cutoff is not None and claims.get("iat", 0) <= float(user_cutoff)
+
+    def _redis_keys(self, claims: dict) -> tuple:
+        return (
+            KEY_PREFIX + jti_member(claims.get("jti") or ""),
+            KEY_PREFIX + user_member(claims.get("sub") or ""),
+        )
+
+    def is_revoked(self, claims: dict) -> bool:
+        if not self._candidates(claims):
+            self._count("bloom_negatives")
+            return False
+        self._count("redis_checks")
+        try:
+            jti_revoked, user_cutoff = self.redis.mget(*self._redis_keys(claims))
+        except redis.RedisError as e:
+            # A bloom positive we cannot confirm is treated as revoked; without a filter
+            # (Redis was down from the start) auth keeps working rather than rejecting everyone
+            self._count("errors")
+            logger.warning(f"Revocation check failed: {e}")
+            return self.bloom is not None
+        revoked = self._revoked(claims, jti_revoked, user_cutoff)
+        if not revoked:
+            self._count("false_positives")
+        return revoked
+
+    async def ais_revoked(self, claims: dict) -> bool:
+        if not self._candidates(claims):
+            self._count("bloom_negatives")
+            return False
+        self._count("redis_checks")
+        try:
+            jti_revoked, user_cutoff = await self.async_redis.mget(*self._redis_keys(claims))
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Revocation check failed: {e}")
+            return self.bloom is not None
+        revoked = self._revoked(claims, jti_revoked, user_cutoff)
+        if not revoked:
+            self._count("false_positives")
+        return revoked
+
+    # Revocation
+
+    def _remember(self, member: str) -> None:
+        # This worker sees its own revocations at once; the others after their next sync
+        with self._lock:
+            self._recent.add(member)
+            if self.bloom is not None:
+                self.bloom.add(member)
+
+    def revoke_claims(self, claims: dict) -> bool:
+        # False when the token was already revoked: refresh rotation uses it to let only one request win
+        jti, exp = claims.get("jti"), claims.get("exp")
+        if not jti or not exp:
+            return False
+        now = time.time()
+        ttl = max(1, int(exp - now) + 1)
+        member = jti_member(jti)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(KEY_PREFIX + member, 1, nx=True, ex=ttl)
+            pipe.zadd(INDEX_KEY, {member: exp})
+            pipe.zadd(LOG_KEY, {member: now})
+            created, _, _ = pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Token revocation failed: {e}")
+            raise unavailable()
+        self._remember(member)
+        return bool(created)
+
+    async def arevoke_claims(self, claims: dict) -> bool:
+        jti, exp = claims.get("jti"), claims.get("exp")
+        if not jti or not exp:
+            return False
+        now = time.time()
+        ttl = max(1, int(exp - now) + 1)
+        member = jti_member(jti)
+        try:
+            pipe = self.async_redis.pipeline()
+            pipe.set(KEY_PREFIX + member, 1, nx=True, ex=ttl)
+            pipe.zadd(INDEX_KEY, {member: exp})
+            pipe.zadd(LOG_KEY, {member: now})
+            created, _, _ = await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Token revocation failed: {e}")
+            raise unavailable()
+        self._remember(member)
+        return bool(created)
+
+    def revoke_user(self, subject: str, max_token_lifetime: int) -> None:
+        # Every token for the user issued up to now is revoked; the marker outlives the longest token
+        now = time.time()
+        member = user_member(subject)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(KEY_PREFIX + member, now, ex=max_token_lifetime)
+            pipe.zadd(INDEX_KEY, {member: now + max_token_lifetime})
+            pipe.zadd(LOG_KEY, {member: now})
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Session revocation failed: {e}")
+            raise unavailable()
+        self._remember(member)
+
+    async def arevoke_user(self, subject: str, max_token_lifetime: int) -> None:
+        now = time.time()
+        member = user_member(subject)
+        try:
+            pipe = self.async_redis.pipeline()
+            pipe.set(KEY_PREFIX + member, now, ex=max_token_lifetime)
+            pipe.zadd(INDEX_KEY, {member: now + max_token_lifetime})
+            pipe.zadd(LOG_KEY, {member: now})
+            await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Session revocation failed: {e}")
+            raise unavailable()
+        self._remember(member)
+
+    async def run_sync(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"Revocation bloom sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def start_sync(self) -> asyncio.Task:
+        return asyncio.create_task(self.run_sync())
+
+
+revocation_store = RevocationStore()
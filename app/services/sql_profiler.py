@@ -0,0 +1,152 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import SQL_PROFILING, SQL_PROFILE_HEADER, SQL_N_PLUS_ONE_THRESHOLD
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    # Same query with other parameters, IN-list lengths or inlined literals -> same shape
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryLog:
+    statements: List[tuple] = field(default_factory=list)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements.append((statement, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> dict:
+        """SELECT shapes run at least threshold times: the usual sign of an N+1 pattern."""
+        shapes = Counter(
+            statement_shape(statement) for statement, _ in self.statements
+            if statement.lstrip().upper().startswith("SELECT")
+        )
+        return {shape: count for shape, count in shapes.most_common() if count >= threshold}
+
+    def summary(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> str:
+        lines = [f"{self.count} SQL statements in {self.seconds * 1000:.1f} ms"]
+        for shape, count in self.repeated(threshold).items():
+            lines.append(f"  possible N+1: {count}x {shape[:200]}")
+        return "\n".join(lines)
+
+
+_active: ContextVar[Optional[QueryLog]] = ContextVar("sql_profile", default=None)
+# Logs that see every statement regardless of context: TestClient runs the app in another thread
+_global_logs: List[QueryLog] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+    log = _active.get()
+    if log is not None:
+        log.record(statement, elapsed)
+    for log in _global_logs:
+        log.record(statement, elapsed)
+
+
+_installed = False
+
+
+def install() -> None:
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _installed = True
+
+
+def uninstall() -> None:
+    global _installed
+    if _installed and not _global_logs:
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+        _installed = False
+
+
+class capture_queries:
+    # Collects every statement run by any engine in this process while the block runs
+
+    def __enter__(self) -> QueryLog:
+        install()
+        self.log = QueryLog()
+        _global_logs.append(self.log)
+        return self.log
+
+    def __exit__(self, *exc_info) -> None:
+        _global_logs.remove(self.log)
+        uninstall()
+
+
+class SQLProfilerMiddleware:
+    # SQL_PROFILING=header profiles requests sending the X-SQL-Profile header, =always every request.
+    # Counts and time go to response headers, the summary with repeated shapes to the log
+
+    def __init__(self, app: ASGIApp, mode: str = SQL_PROFILING):
+        self.app = app
+        self.mode = mode
+        install()
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.mode == "always":
+            return True
+        return Headers(scope=scope).get(SQL_PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _active.set(log)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Statements after the headers (streamed bodies) only reach the log line
+                headers = MutableHeaders(scope=message)
+                repeated = log.repeated()
+                headers["X-SQL-Count"] = str(log.count)
+                headers["X-SQL-Time-Ms"] = f"{log.seconds * 1000:.2f}"
+                headers["X-SQL-N-Plus-One"] = str(len(repeated))
+                headers.append("Server-Timing", f'db;dur={log.seconds * 1000:.2f};desc="{log.count} queries"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active.reset(token)
+            path = f"{scope['method']} {scope['path']}"
+            if log.repeated():
+                logger.warning(f"{path}: {log.summary()}")
+            else:
+                logger.info(f"{path}: {log.summary()}")
@@ -0,0 +1,170 @@
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import stat
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.config import STATIC_DIRECTORY, STATIC_MAX_AGE
+from app.services.storage import CACHE_CONTROL as IMMUTABLE, content_type
+
+# Avatar originals and variants: sha256 prefix, optional size suffix
+HASHED_NAME = re.compile(r"^[0-9a-f]{32}(_\d+)?\.\w+$")
+# Preferred first when the client accepts both
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = (".svg", ".css", ".js", ".json", ".txt", ".html", ".xml", ".map")
+ETAG_CACHE_SIZE = 1024
+
+
+def is_hashed(path: str) -> bool:
+    return bool(HASHED_NAME.match(os.path.basename(path)))
+
+
+def cache_control(path: str) -> str:
+    if is_hashed(path):
+        return IMMUTABLE
+    return f"public, max-age={STATIC_MAX_AGE}"
+
+
+# lru_cache is thread-safe; responses are built on worker threads. mtime and size in the key
+# mean an edited file gets a new entry instead of a stale tag.
+@lru_cache(maxsize=ETAG_CACHE_SIZE)
+def _content_etag(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def strong_etag(path: str, stat_result: os.stat_result) -> str:
+    if is_hashed(path):
+        # The name already is the content hash
+        return f'"{os.path.splitext(os.path.basename(path))[0]}"'
+    return _content_etag(path, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def accepted_encodings(request_headers: Headers) -> set:
+    accepted = set()
+    for item in request_headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name.lower())
+    return accepted
+
+
+def precompressed(path: str, request_headers: Headers) -> Tuple[Optional[str], Optional[str], bool]:
+    """Returns (variant path, encoding, whether any variant exists) for the file at path."""
+    variants = [(encoding, path + suffix) for encoding, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+    if not variants:
+        return None, None, False
+    # Byte ranges refer to the identity body, so range requests always get the original
+    if "range" not in request_headers:
+        accepted = accepted_encodings(request_headers)
+        for encoding, variant in variants:
+            if encoding in accepted or "*" in accepted:
+                return variant, encoding, True
+    return None, None, True
+
+
+def is_not_modified(etag: str, request_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cached_file_response(
+    path: str,
+    request_headers: Headers,
+    stat_result: Optional[os.stat_result] = None,
+    status_code: int = 200,
+) -> Response:
+    stat_result = stat_result or os.stat(path)
+    etag = strong_etag(path, stat_result)
+    headers = {"cache-control": cache_control(path)}
+    variant, encoding, has_variants = precompressed(path, request_headers)
+    if has_variants:
+        headers["vary"] = "Accept-Encoding"
+    if variant:
+        # Each encoding is its own representation with its own validator
+        etag = f'{etag[:-1]}-{encoding}"'
+        headers["content-encoding"] = encoding
+    headers["etag"] = etag
+
+    if is_not_modified(etag, request_headers):
+        return NotModifiedResponse(Headers(headers))
+    if variant:
+        return FileResponse(variant, status_code=status_code, headers=headers, media_type=content_type(path))
+    return FileResponse(path, status_code=status_code, headers=headers, stat_result=stat_result)
+
+
+class CachedStaticFiles(StaticFiles):
+    # StaticFiles with strong ETags, long-lived caching of hashed names and .br/.gz variants
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # StaticFiles calls file_response on the event loop; the ETag hash and variant probes read
+        # the disk, so regular files are answered from a worker thread instead
+        if scope["method"] in ("GET", "HEAD"):
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+            except OSError:
+                full_path, stat_result = None, None
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return await anyio.to_thread.run_sync(
+                    cached_file_response, str(full_path), Headers(scope=scope), stat_result
+                )
+        # Other methods, lookup errors, directories and 404s are handled as StaticFiles does
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        return cached_file_response(str(full_path), Headers(scope=scope), stat_result, status_code)
+
+
+async def file_response(path: str, request: Request) -> Response:
+    return await anyio.to_thread.run_sync(cached_file_response, path, request.headers)
+
+
+def compress_directory(directory: str, min_size: int = 256) -> int:
+    # Writes .gz (and .br when the brotli package is installed) next to every compressible file
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if not name.endswith(COMPRESSIBLE) or os.path.getsize(path) < min_size:
+                continue
+            with open(path, "rb") as source:
+                data = source.read()
+            with open(path + ".gz", "wb") as target:
+                # mtime=0 keeps the output, and so its ETag, stable across rebuilds
+                with gzip.GzipFile(filename="", mode="wb", fileobj=target, compresslevel=9, mtime=0) as gz:
+                    gz.write(data)
+            written += 1
+            if brotli is not None:
+                with open(path + ".br", "wb") as target:
+                    target.write(brotli.compress(data, quality=11))
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompress static files for CachedStaticFiles")
+    parser.add_argument("directory", nargs="?", default=STATIC_DIRECTORY)
+    parser.add_argument("--min-size", type=int, default=256, help="skip files smaller than this many bytes")
+    args = parser.parse_args()
+    print(f"Wrote {compress_directory(args.directory, args.min_size)} compressed files")
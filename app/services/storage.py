@@ -0,0 +1,152 @@
+import mimetypes
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.config import (
+    AVATAR_STORAGE,
+    AVATAR_STORAGE_PATH,
+    AVATAR_URL_PREFIX,
+    AVATAR_S3_BUCKET,
+    AVATAR_S3_PREFIX,
+    AVATAR_S3_ENDPOINT_URL,
+    AVATAR_S3_REGION,
+    AVATAR_S3_ACCESS_KEY,
+    AVATAR_S3_SECRET_KEY,
+    AVATAR_S3_PUBLIC_URL,
+    AVATAR_S3_PART_SIZE,
+)
+
+# Names are content-addressed, so a stored object never changes
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+StorageError = (OSError, BotoCoreError, ClientError)
+
+
+def content_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+class Storage(ABC):
+    # Blocking calls; async code runs them with asyncio.to_thread
+
+    @abstractmethod
+    def put(self, name: str, path: str) -> None:
+        """Store the local file at path under name; the file itself is left in place."""
+
+    @abstractmethod
+    def url(self, name: str) -> str:
+        """Permanent public URL of the stored object."""
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        ...
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str = AVATAR_STORAGE_PATH, url_prefix: str = AVATAR_URL_PREFIX):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def put(self, name: str, path: str) -> None:
+        # Copied next to the target first so readers never see a partial file
+        tmp_path = self._path(f".{name}.part")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, self._path(name))
+
+    def url(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self._path(name))
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(Storage):
+    def __init__(
+        self,
+        bucket: str = AVATAR_S3_BUCKET,
+        prefix: str = AVATAR_S3_PREFIX,
+        endpoint_url: Optional[str] = AVATAR_S3_ENDPOINT_URL,
+        region: str = AVATAR_S3_REGION,
+        access_key: Optional[str] = AVATAR_S3_ACCESS_KEY,
+        secret_key: Optional[str] = AVATAR_S3_SECRET_KEY,
+        public_url: Optional[str] = AVATAR_S3_PUBLIC_URL,
+        part_size: int = AVATAR_S3_PART_SIZE,
+    ):
+        # The URL is stored in users.avatar_url, so it has to stay valid: a presigned link would expire
+        if not public_url:
+            raise ValueError("AVATAR_S3_PUBLIC_URL (a CDN or public bucket URL) is required for S3 avatar storage")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url.rstrip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            # Path-style addressing works with MinIO and other S3-compatible servers
+            config=Config(s3={"addressing_style": "path"}, retries={"max_attempts": 3, "mode": "standard"}),
+        )
+        # Files above one part are sent as a multipart upload, several parts at a time
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size, max_concurrency=4
+        )
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def put(self, name: str, path: str) -> None:
+        self.client.upload_file(
+            path,
+            self.bucket,
+            self.key(name),
+            ExtraArgs={"ContentType": content_type(name), "CacheControl": CACHE_CONTROL},
+            Config=self.transfer_config,
+        )
+
+    def url(self, name: str) -> str:
+        # CDN or public bucket in front of the objects
+        return f"{self.public_url}/{self.key(name)}"
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(name))
+
+
+def create_storage(kind: str = AVATAR_STORAGE) -> Storage:
+    if kind == "local":
+        return LocalStorage()
+    if kind == "s3":
+        return S3Storage()
+    raise ValueError(f"Unknown AVATAR_STORAGE: {kind!r}")
+
+
+avatar_storage = create_storage()
@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Set
+
+from app.config import TOKEN_CACHE_ENABLED, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
+
+
+def token_key(token: str) -> str:
+    # Raw tokens are credentials, so only their digest is kept in memory
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(
+        self,
+        decode: Callable[[str], dict],
+        maxsize: int = TOKEN_CACHE_SIZE,
+        ttl: int = TOKEN_CACHE_TTL,
+        enabled: bool = TOKEN_CACHE_ENABLED,
+    ):
+        self._decode = decode
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled and maxsize > 0
+        # key -> (expires_at as epoch seconds, claims)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_subject: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.revoked = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "revoked": self.revoked,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def decode(self, token: str) -> dict:
+        # Raises JWTError exactly like jwt.decode; failures are never cached
+        if not self.enabled:
+            return self._decode(token)
+
+        key = token_key(token)
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, claims = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return dict(claims)
+                self._remove(key)
+                self.expired += 1
+            self.misses += 1
+
+        claims = self._decode(token)
+        expires_at = now + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._data[key] = (expires_at, claims)
+            self._data.move_to_end(key)
+            subject = claims.get("sub")
+            if subject is not None:
+                self._by_subject.setdefault(subject, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        return dict(claims)
+
+    def _remove(self, key: str) -> None:
+        _, claims = self._data.pop(key)
+        subject = claims.get("sub")
+        keys = self._by_subject.get(subject)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_subject[subject]
+
+    # Revocation hooks: drop verified claims so the next request re-checks the token
+    def evict(self, token: str) -> bool:
+        with self._lock:
+            key = token_key(token)
+            if key not in self._data:
+                return False
+            self._remove(key)
+            self.revoked += 1
+            return True
+
+    def evict_subject(self, subject: str) -> int:
+        with self._lock:
+            keys = list(self._by_subject.get(subject, ()))
+            for key in keys:
+                self._remove(key)
+            self.revoked += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_subject.clear()
+
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+from loguru import logger
+
+from app.config import REDIS_URL, TOKEN_VERSION_TTL, TOKEN_VERSION_LOCAL_TTL
+from app.services.user_cache import LocalLRU
+
+KEY_PREFIX = "token_version:"
+LOCAL_SIZE = 10000
+
+
+class TokenVersionStore:
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        ttl: int = TOKEN_VERSION_TTL,
+        local_ttl: int = TOKEN_VERSION_LOCAL_TTL,
+    ):
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._async_redis = None
+        self._async_loop = None
+        # Another worker's bump is seen once the local entry expires, as with the user cache
+        self.local = LocalLRU(LOCAL_SIZE, local_ttl) if local_ttl > 0 else None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = aioredis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._async_loop = loop
+        return self._async_redis
+
+    def reset_stats(self) -> None:
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _local_get(self, key: str) -> Optional[int]:
+        if self.local is None:
+            return None
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+        return value
+
+    def _found(self, key: str, raw) -> Optional[int]:
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("redis_hits")
+        if self.local is not None:
+            self.local.set(key, int(raw))
+        return int(raw)
+
+    def get(self, user_id: int) -> Optional[int]:
+        key = f"{KEY_PREFIX}{user_id}"
+        version = self._local_get(key)
+        if version is not None:
+            return version
+        try:
+            raw = self.redis.get(key)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Token version read failed: {e}")
+            raw = None
+        return self._found(key, raw)
+
+    async def aget(self, user_id: int) -> Optional[int]:
+        key = f"{KEY_PREFIX}{user_id}"
+        version = self._local_get(key)
+        if version is not None:
+            return version
+        try:
+            raw = await self.async_redis.get(key)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Token version read failed: {e}")
+            raw = None
+        return self._found(key, raw)
+
+    def set(self, user_id: int, version: int) -> None:
+        key = f"{KEY_PREFIX}{user_id}"
+        if self.local is not None:
+            self.local.set(key, version)
+        try:
+            self.redis.set(key, version, ex=self.ttl)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Token version write failed: {e}")
+
+    async def aset(self, user_id: int, version: int) -> None:
+        key = f"{KEY_PREFIX}{user_id}"
+        if self.local is not None:
+            self.local.set(key, version)
+        try:
+            await self.async_redis.set(key, version, ex=self.ttl)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"Token version write failed: {e}")
+
+
+token_versions = TokenVersionStore()
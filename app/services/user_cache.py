@@ -0,0 +1,236 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+from loguru import logger
+
+from app.config import (
+    REDIS_URL,
+    USER_CACHE_ENABLED,
+    USER_CACHE_TTL,
+    USER_CACHE_LOCAL_SIZE,
+    USER_CACHE_LOCAL_TTL,
+)
+from app.database.models import User
+
+KEY_PREFIX = "user:"
+
+# password_hash is deliberately not cached: the cached user only authorizes requests
+CACHED_FIELDS = (
+    "id", "username", "email", "is_verified", "confirmed",
+    "avatar_url", "role", "token_version", "created_at", "updated_at",
+)
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def serialize_user(user: User) -> str:
+    data = {}
+    for field in CACHED_FIELDS:
+        value = getattr(user, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(data)
+
+
+def deserialize_user(raw) -> User:
+    data = json.loads(raw)
+    for field in DATETIME_FIELDS:
+        if data.get(field):
+            data[field] = datetime.fromisoformat(data[field])
+    return User(**data)
+
+
+class LocalLRU:
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class UserCache:
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        ttl: int = USER_CACHE_TTL,
+        local_size: int = USER_CACHE_LOCAL_SIZE,
+        local_ttl: int = USER_CACHE_LOCAL_TTL,
+        enabled: bool = USER_CACHE_ENABLED,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._async_redis = None
+        self._async_loop = None
+        self.local = LocalLRU(local_size, local_ttl) if local_size > 0 else None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        # Connections are bound to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = aioredis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            self._async_loop = loop
+        return self._async_redis
+
+    def reset_stats(self) -> None:
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        hits = self.local_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, email: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        key = KEY_PREFIX + email
+
+        if self.local is not None:
+            raw = self.local.get(key)
+            if raw is not None:
+                self._count("local_hits")
+                return deserialize_user(raw)
+
+        try:
+            raw = self.redis.get(key)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"User cache read failed: {e}")
+            raw = None
+
+        if raw is None:
+            self._count("misses")
+            return None
+
+        self._count("redis_hits")
+        if self.local is not None:
+            self.local.set(key, raw)
+        return deserialize_user(raw)
+
+    def set(self, user: User) -> None:
+        if not self.enabled:
+            return
+        key = KEY_PREFIX + user.email
+        raw = serialize_user(user)
+        if self.local is not None:
+            self.local.set(key, raw)
+        try:
+            self.redis.set(key, raw, ex=self.ttl)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"User cache write failed: {e}")
+
+    def invalidate(self, email: str) -> None:
+        key = KEY_PREFIX + email
+        if self.local is not None:
+            self.local.delete(key)
+        try:
+            self.redis.delete(key)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"User cache invalidation failed: {e}")
+
+    async def aget(self, email: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        key = KEY_PREFIX + email
+
+        if self.local is not None:
+            raw = self.local.get(key)
+            if raw is not None:
+                self._count("local_hits")
+                return deserialize_user(raw)
+
+        try:
+            raw = await self.async_redis.get(key)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"User cache read failed: {e}")
+            raw = None
+
+        if raw is None:
+            self._count("misses")
+            return None
+
+        self._count("redis_hits")
+        if self.local is not None:
+            self.local.set(key, raw)
+        return deserialize_user(raw)
+
+    async def aset(self, user: User) -> None:
+        if not self.enabled:
+            return
+        key = KEY_PREFIX + user.email
+        raw = serialize_user(user)
+        if self.local is not None:
+            self.local.set(key, raw)
+        try:
+            await self.async_redis.set(key, raw, ex=self.ttl)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"User cache write failed: {e}")
+
+    async def ainvalidate(self, email: str) -> None:
+        key = KEY_PREFIX + email
+        if self.local is not None:
+            self.local.delete(key)
+        try:
+            await self.async_redis.delete(key)
+        except redis.RedisError as e:
+            self._count("errors")
+            logger.warning(f"User cache invalidation failed: {e}")
+
+
+user_cache = UserCache()
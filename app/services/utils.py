@@ -1,9 +1,19 @@
 from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import case, literal, select
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
-from app.database.models import Contact
+from app.config import BIRTHDAY_LOOKAHEAD_DAYS
+from app.database.models import Contact, birthday_day_of_year
 
-def search_contacts(db: Session, name: str = None, email: str = None, user_id: int = None):
+def search_contacts(
+    db: Session,
+    name: str = None,
+    email: str = None,
+    user_id: int = None,
+    limit: int = None,
+    after_id: int = None,
+):
     query = db.query(Contact)
 
     if user_id is not None:
@@ -17,21 +27,90 @@ def search_contacts(db: Session, name: str = None, email: str = None, user_id: i
     if email:
         query = query.filter(Contact.email.ilike(f"%{email}%"))
 
+    if after_id is not None:
+        query = query.filter(Contact.id > after_id)
+
+    query = query.order_by(Contact.id)
+    if limit is not None:
+        query = query.limit(limit)
+
     return query.all()
 
-def get_upcoming_birthdays(db: Session, user_id: int):
-    today = date.today()
-    next_week = today + timedelta(days=7)
+def _sqlite_rank(column, term: str):
+    # Portable stand-in for pg_trgm similarity: exact > prefix > substring
+    value = func.lower(column)
+    term = term.lower()
+    return case((value == term, 1.0), (value.like(f"{term}%"), 0.75), else_=0.5)
+
+
+def _greatest(dialect_name: str, scores: list):
+    if len(scores) == 1:
+        return scores[0]
+    # SQLite's multi-argument max() is the scalar GREATEST
+    return func.max(*scores) if dialect_name == "sqlite" else func.greatest(*scores)
+
+
+def ranked_search_query(dialect_name: str, name: str = None, email: str = None, user_id: int = None, limit: int = None):
+    query = select(Contact)
+    scores = []
+
+    if user_id is not None:
+        query = query.where(Contact.user_id == user_id)
+
+    if dialect_name == "postgresql":
+        # `term <% column` is word similarity; both it and the score are served by the trigram GIN indexes
+        if name:
+            query = query.where(
+                literal(name).op("<%")(Contact.first_name) | literal(name).op("<%")(Contact.last_name)
+            )
+            scores += [func.word_similarity(name, Contact.first_name), func.word_similarity(name, Contact.last_name)]
+        if email:
+            query = query.where(literal(email).op("<%")(Contact.email))
+            scores.append(func.word_similarity(email, Contact.email))
+    else:
+        if name:
+            query = query.where(
+                (Contact.first_name.ilike(f"%{name}%")) | (Contact.last_name.ilike(f"%{name}%"))
+            )
+            scores += [_sqlite_rank(Contact.first_name, name), _sqlite_rank(Contact.last_name, name)]
+        if email:
+            query = query.where(Contact.email.ilike(f"%{email}%"))
+            scores.append(_sqlite_rank(Contact.email, email))
+
+    if scores:
+        query = query.order_by(_greatest(dialect_name, scores).desc(), Contact.id)
+    else:
+        query = query.order_by(Contact.id)
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def rank_contacts(db: Session, name: str = None, email: str = None, user_id: int = None, limit: int = None):
+    query = ranked_search_query(db.get_bind().dialect.name, name, email, user_id, limit)
+    return db.scalars(query).all()
+
+
+def upcoming_birthdays_query(user_id: Optional[int], days: int, today: date):
+    start = birthday_day_of_year(today)
+    if days >= 365:
+        window = Contact.birthday_doy.is_not(None)
+    else:
+        end = birthday_day_of_year(today + timedelta(days=days))
+        if start <= end:
+            window = Contact.birthday_doy.between(start, end)
+        else:
+            # The window wraps from December into January
+            window = (Contact.birthday_doy >= start) | (Contact.birthday_doy <= end)
 
-    print(f"Today: {today}")
-    print(f"Looking for birthdays from: {today.day}-{today.month} to {next_week.day}-{next_week.month} (year is ignored)")
+    order = (case((Contact.birthday_doy >= start, 0), else_=1), Contact.birthday_doy, Contact.id)
+    if user_id is None:
+        # All users in one pass, grouped by user (used by the daily digest job)
+        return select(Contact).where(window).order_by(Contact.user_id, *order)
+    return select(Contact).where(Contact.user_id == user_id, window).order_by(*order)
 
-    contacts = db.query(Contact).filter(
-        Contact.user_id == user_id,  
-        ((func.extract('month', Contact.birthday) == today.month) & (func.extract('day', Contact.birthday) >= today.day)) |
-        ((func.extract('month', Contact.birthday) == next_week.month) & (func.extract('day', Contact.birthday) <= next_week.day))
-    ).all()
 
-    print(f"Contacts found: {len(contacts)}")
-    
-    return contacts
+def get_upcoming_birthdays(db: Session, user_id: int, days: int = None, today: date = None):
+    query = upcoming_birthdays_query(user_id, days or BIRTHDAY_LOOKAHEAD_DAYS, today or date.today())
+    return db.scalars(query).all()
@@ -0,0 +1,91 @@
+"""Compare stateful and stateless authentication on GET /contacts/.
+
+Runs the app in-process (TestClient) against the configured DATABASE_URL and
+REDIS_URL and reports SQL statements and latency per request:
+
+    python -m benchmarks.auth_principal --requests 500
+
+"stateful" loads the User on every request (with and without the Redis user
+cache); "stateless" trusts the uid/role/ver claims and only checks the cached
+token version.
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.config import SessionLocal, engine
+from app.database import crud
+from app.database.schemas import UserCreate
+from app.main import app
+from app.services import auth
+from app.services.user_cache import user_cache
+
+MODES = {
+    "stateful_no_user_cache": ("stateful", False),
+    "stateful_user_cache": ("stateful", True),
+    "stateless": ("stateless", True),
+}
+
+
+def create_user():
+    unique = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        crud.create_user(db, UserCreate(
+            username=f"bench_{unique}", email=f"bench_{unique}@example.com", password="BenchPass123"
+        ))
+        return crud.get_user_by_email(db, f"bench_{unique}@example.com")
+    finally:
+        db.close()
+
+
+def run(client: TestClient, headers: dict, requests: int) -> dict:
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client.get("/contacts/", headers=headers)
+    event.listen(engine, "before_cursor_execute", count)
+    timings = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get("/contacts/", headers=headers)
+            timings.append(time.perf_counter() - started)
+            response.raise_for_status()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    timings.sort()
+    return {
+        "queries_per_request": round(len(statements) / requests, 2),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p99_ms": round(timings[int(len(timings) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    user = create_user()
+    headers = {"Authorization": f"Bearer {auth.create_access_token(data=auth.access_token_data(user))}"}
+    report = {"requests": args.requests}
+    with TestClient(app) as client:
+        for name, (mode, cache_enabled) in MODES.items():
+            auth.AUTH_MODE = mode
+            user_cache.enabled = cache_enabled
+            report[name] = run(client, headers, args.requests)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare per-recipient Mailgun calls with batched recipient-variables sends.
+
+Runs against a local stub of the Mailgun messages endpoint, so nothing leaves
+the machine:
+
+    python -m benchmarks.email_batch --recipients 5000 --latency-ms 50
+
+--latency-ms adds a fixed delay to every stub response to stand in for the
+round trip to Mailgun.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.services import email
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        payload = b'{"message": "Queued. Thank you."}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(latency: float) -> ThreadingHTTPServer:
+    StubHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    email.MAILGUN_API_BASE = f"http://127.0.0.1:{server.server_address[1]}/v3"
+    email.MAILGUN_API_KEY = email.MAILGUN_API_KEY or "key-benchmark"
+    email.MAILGUN_DOMAIN = email.MAILGUN_DOMAIN or "example.com"
+    email.MAILGUN_SENDER = email.MAILGUN_SENDER or "bench@example.com"
+    return server
+
+
+async def per_recipient(recipients: dict) -> dict:
+    limits = httpx.Limits(max_connections=email.MAILGUN_BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(email.MAILGUN_BATCH_CONCURRENCY)
+    async with httpx.AsyncClient(limits=limits) as client:
+
+        async def send(to_email: str, variables: dict):
+            async with semaphore:
+                return await email.send_email_async(client, "Verify", to_email, f"Hi {variables['name']}")
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(send(e, v) for e, v in recipients.items()))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": len(responses),
+        "seconds": round(elapsed, 3),
+        "recipients_per_second": round(len(recipients) / elapsed, 1),
+    }
+
+
+async def batched(recipients: dict) -> dict:
+    started = time.perf_counter()
+    report = await email.send_batch_async("Verify", "Hi %recipient.name%", recipients)
+    elapsed = time.perf_counter() - started
+    await email.close_batch_client()
+    return {
+        "requests": report.requests,
+        "failed": len(report.failed),
+        "seconds": round(elapsed, 3),
+        "recipients_per_second": round(len(recipients) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    server = start_stub(args.latency_ms / 1000)
+    recipients = {f"bench{i}@example.com": {"name": f"User {i}"} for i in range(args.recipients)}
+    try:
+        report = {
+            "recipients": args.recipients,
+            "latency_ms": args.latency_ms,
+            "per_recipient": asyncio.run(per_recipient(recipients)),
+            "batched": asyncio.run(batched(recipients)),
+        }
+    finally:
+        server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Load test the Contacts API and report throughput and latency per endpoint as JSON.
+
+Seeds --users users with --contacts contacts each (signup + POST /contacts/bulk),
+then runs --clients concurrent virtual users for --seconds. Each one picks a
+weighted action in a loop: login, /auth/me, contact list/get/create/update/delete,
+search and upcoming birthdays.
+
+Against a running server (SQLite or Postgres, real Redis):
+
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --seconds 30
+
+Self-contained, starting uvicorn on a fresh SQLite file (or --database-url) and
+an in-process fakeredis server (pip install fakeredis):
+
+    python -m benchmarks.load_test --serve --users 20 --contacts 200 --clients 32 \\
+        --output report.json
+
+Comparing with an earlier report exits with status 1 when any endpoint's p95
+grew, or its requests/s dropped, by more than --tolerance:
+
+    python -m benchmarks.load_test --serve --compare report.json --tolerance 0.25
+
+/auth/me is rate limited (5 per minute per client address), so most of its
+responses are expected to be 429; they are counted under "statuses".
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks.login_storm import percentile
+
+FIRST_NAMES = ("Olena", "Taras", "Iryna", "Andrii", "Maria", "Petro", "Sofia", "Dmytro")
+LAST_NAMES = ("Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Melnyk")
+PASSWORD = "LoadTest123"
+SEED_BATCH = 500
+
+
+@dataclass
+class SeededUser:
+    email: str
+    token: str
+    contact_ids: list
+    # Contacts created during the run; only these are deleted, so the seed set stays intact
+    created_ids: list = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class Stats:
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+
+    def record(self, label: str, seconds: float, status) -> None:
+        self.samples.setdefault(label, []).append(seconds)
+        counts = self.statuses.setdefault(label, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def report(self, seconds: float) -> dict:
+        endpoints = {}
+        for label in sorted(self.samples):
+            samples = self.samples[label]
+            statuses = self.statuses[label]
+            errors = sum(count for status, count in statuses.items() if status == "error" or status >= 500)
+            endpoints[label] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / seconds, 1),
+                "errors": errors,
+                "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": round(max(samples) * 1000, 2),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "total": {
+                "requests": total,
+                "rps": round(total / seconds, 1),
+                "errors": sum(e["errors"] for e in endpoints.values()),
+            },
+            "endpoints": endpoints,
+        }
+
+
+async def timed(client: httpx.AsyncClient, stats: Stats, label: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.record(label, time.perf_counter() - started, "error")
+        return None
+    stats.record(label, time.perf_counter() - started, response.status_code)
+    return response
+
+
+def fake_contact(rng: random.Random) -> dict:
+    return {
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "email": f"load_{uuid.uuid4().hex[:12]}@example.com",
+        "phone": f"+380{rng.randrange(10 ** 8, 10 ** 9)}",
+        # Spread over the year, so upcoming birthdays finds a few for every user
+        "birthday": (date(1990, 1, 1) + timedelta(days=rng.randrange(365))).isoformat(),
+    }
+
+
+async def seed_user(client: httpx.AsyncClient, contacts: int, rng: random.Random) -> SeededUser:
+    unique = uuid.uuid4().hex[:8]
+    email = f"load_{unique}@example.com"
+    response = await client.post("/users/signup", json={"username": f"load_{unique}", "email": email, "password": PASSWORD})
+    response.raise_for_status()
+    response = await client.post("/users/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    user = SeededUser(email, response.json()["access_token"], [])
+
+    for start in range(0, contacts, SEED_BATCH):
+        batch = [fake_contact(rng) for _ in range(min(SEED_BATCH, contacts - start))]
+        response = await client.post("/contacts/bulk", json=batch, headers=user.headers)
+        response.raise_for_status()
+        user.contact_ids.extend(response.json()["ids"])
+    return user
+
+
+async def seed(client: httpx.AsyncClient, users: int, contacts: int, rng: random.Random) -> list:
+    # A few at a time: signups are bcrypt-bound on the server
+    semaphore = asyncio.Semaphore(4)
+
+    async def one() -> SeededUser:
+        async with semaphore:
+            return await seed_user(client, contacts, rng)
+
+    return await asyncio.gather(*(one() for _ in range(users)))
+
+
+# Actions
+
+
+async def login(client, user: SeededUser, stats, rng):
+    response = await timed(client, stats, "POST /users/login", "POST", "/users/login",
+                           data={"username": user.email, "password": PASSWORD})
+    if response is not None and response.status_code == 200:
+        user.token = response.json()["access_token"]
+
+
+async def me(client, user, stats, rng):
+    await timed(client, stats, "GET /auth/me", "GET", "/auth/me", headers=user.headers)
+
+
+async def list_contacts(client, user, stats, rng):
+    await timed(client, stats, "GET /contacts/", "GET", "/contacts/",
+                params={"limit": rng.choice((10, 50, 100))}, headers=user.headers)
+
+
+async def get_contact(client, user, stats, rng):
+    contact_id = rng.choice(user.contact_ids)
+    await timed(client, stats, "GET /contacts/{id}", "GET", f"/contacts/{contact_id}", headers=user.headers)
+
+
+async def search(client, user, stats, rng):
+    await timed(client, stats, "GET /contacts/search/", "GET", "/contacts/search/",
+                params={"name": rng.choice(FIRST_NAMES)[:3], "limit": 20}, headers=user.headers)
+
+
+async def birthdays(client, user, stats, rng):
+    await timed(client, stats, "GET /contacts/upcoming_birthdays/", "GET", "/contacts/upcoming_birthdays/",
+                headers=user.headers)
+
+
+async def create_contact(client, user, stats, rng):
+    response = await timed(client, stats, "POST /contacts/", "POST", "/contacts/",
+                           json=fake_contact(rng), headers=user.headers)
+    if response is not None and response.status_code == 201:
+        user.created_ids.append(response.json()["id"])
+
+
+async def update_contact(client, user, stats, rng):
+    contact_id = rng.choice(user.contact_ids)
+    await timed(client, stats, "PUT /contacts/{id}", "PUT", f"/contacts/{contact_id}",
+                json={"extra_info": f"updated {time.time()}"}, headers=user.headers)
+
+
+async def delete_contact(client, user, stats, rng):
+    if not user.created_ids:
+        return await create_contact(client, user, stats, rng)
+    contact_id = user.created_ids.pop()
+    await timed(client, stats, "DELETE /contacts/{id}", "DELETE", f"/contacts/{contact_id}", headers=user.headers)
+
+
+# Read-heavy, roughly what the web client does
+ACTIONS = (
+    (login, 1),
+    (me, 3),
+    (list_contacts, 25),
+    (get_contact, 25),
+    (search, 15),
+    (birthdays, 10),
+    (create_contact, 8),
+    (update_contact, 8),
+    (delete_contact, 5),
+)
+
+
+async def virtual_user(client: httpx.AsyncClient, user: SeededUser, deadline: float, stats: Stats, seed: int) -> None:
+    rng = random.Random(seed)
+    actions, weights = zip(*ACTIONS)
+    while time.perf_counter() < deadline:
+        await rng.choices(actions, weights)[0](client, user, stats, rng)
+
+
+async def run(base_url: str, users: int, contacts: int, clients: int, seconds: float, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    limits = httpx.Limits(max_connections=clients + 4, max_keepalive_connections=clients + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        started = time.perf_counter()
+        seeded = await seed(client, users, contacts, rng)
+        seed_seconds = time.perf_counter() - started
+
+        stats = Stats()
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(
+            virtual_user(client, seeded[i % len(seeded)], deadline, stats, seed_value + i) for i in range(clients)
+        ))
+
+    report = stats.report(seconds)
+    return {
+        "config": {
+            "base_url": base_url, "users": users, "contacts_per_user": contacts,
+            "clients": clients, "seconds": seconds, "seed": seed_value,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        **report,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for label, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: {previous['rps']} -> {current['rps']} requests/s")
+    return regressions
+
+
+# Self-contained server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def fake_redis():
+    from fakeredis import TcpFakeServer
+
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"redis://127.0.0.1:{port}"
+    finally:
+        server.shutdown()
+
+
+def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+@contextmanager
+def serve(database_url: str, workers: int):
+    with tempfile.TemporaryDirectory() as tmp, fake_redis() as redis_url:
+        env = {
+            **os.environ,
+            "DATABASE_URL": database_url or f"sqlite:///{tmp}/load_test.db",
+            "REDIS_URL": redis_url,
+            "EMAIL_WORKER_ENABLED": "false",
+            "MAILGUN_API_KEY": os.environ.get("MAILGUN_API_KEY", "load-test"),
+            "MAILGUN_DOMAIN": os.environ.get("MAILGUN_DOMAIN", "example.com"),
+        }
+        subprocess.run(
+            [sys.executable, "-c", "from app.config import Base, engine; Base.metadata.create_all(engine)"],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_until_up(base_url, process)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--serve", action="store_true", help="start uvicorn with fakeredis instead of using --base-url")
+    parser.add_argument("--database-url", help="with --serve: database to use (default: a fresh SQLite file)")
+    parser.add_argument("--server-workers", type=int, default=1, help="with --serve: uvicorn worker processes")
+    parser.add_argument("--users", type=int, default=10, help="users to seed")
+    parser.add_argument("--contacts", type=int, default=100, help="contacts seeded per user")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the action mix and data")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95/requests-per-second change")
+    args = parser.parse_args()
+
+    def execute(base_url: str) -> dict:
+        return asyncio.run(run(base_url, args.users, args.contacts, args.clients, args.seconds, args.seed))
+
+    if args.serve:
+        with serve(args.database_url, args.server_workers) as base_url:
+            report = execute(base_url)
+    else:
+        report = execute(args.base_url)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
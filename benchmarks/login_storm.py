@@ -0,0 +1,104 @@
+"""Measure /contacts/ latency while a storm of logins runs against the same server.
+
+Start the API in one terminal, once with bcrypt in threads and once with the
+process pool, and compare the reports:
+
+    PASSWORD_HASH_WORKERS=0 uvicorn app.main:app --port 8000
+    PASSWORD_HASH_WORKERS=4 uvicorn app.main:app --port 8000
+
+    python -m benchmarks.login_storm --base-url http://127.0.0.1:8000 --logins 32 --seconds 20
+
+Logins rejected with 503 (hashing queue full) are counted separately.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 2)
+
+
+async def create_user(client: httpx.AsyncClient) -> dict:
+    unique = uuid.uuid4().hex[:8]
+    credentials = {"username": f"bench_{unique}@example.com", "password": "BenchPass123"}
+    response = await client.post("/users/signup", json={
+        "username": f"bench_{unique}",
+        "email": credentials["username"],
+        "password": credentials["password"],
+    })
+    response.raise_for_status()
+    return credentials
+
+
+async def login_loop(client: httpx.AsyncClient, credentials: dict, deadline: float, counts: dict) -> None:
+    while time.perf_counter() < deadline:
+        response = await client.post("/users/login", data=credentials)
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+async def probe_loop(client: httpx.AsyncClient, token: str, deadline: float, samples: list) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/contacts/", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+async def run(base_url: str, logins: int, probes: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=logins + probes + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        credentials = await create_user(client)
+        token = (await client.post("/users/login", data=credentials)).json()["access_token"]
+
+        baseline = []
+        await probe_loop(client, token, time.perf_counter() + 2, baseline)
+
+        samples, counts = [], {}
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(login_loop(client, credentials, deadline, counts) for _ in range(logins)),
+            *(probe_loop(client, token, deadline, samples) for _ in range(probes)),
+        )
+
+    return {
+        "concurrent_logins": logins,
+        "seconds": seconds,
+        "login_responses": counts,
+        "logins_per_second": round(counts.get(200, 0) / seconds, 1),
+        "contacts_idle_ms": {"p50": percentile(baseline, 50), "p99": percentile(baseline, 99)},
+        "contacts_under_storm_ms": {
+            "requests": len(samples),
+            "mean": round(statistics.mean(samples) * 1000, 2) if samples else 0.0,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login loops")
+    parser.add_argument("--probes", type=int, default=2, help="concurrent /contacts/ loops")
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.base_url, args.logins, args.probes, args.seconds))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure what the Prometheus instrumentation costs per request and per SQL statement.
+
+Times MetricsMiddleware around a trivial ASGI app, and the SQLAlchemy cursor
+event listeners around SELECT 1 on in-memory SQLite, each against the same
+work without instrumentation:
+
+    python -m benchmarks.metrics_overhead --iterations 20000
+
+The budget is 50 us per request and 10 us per statement; the script exits
+with status 1 when either overhead is above its budget.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import create_engine, event
+
+from app.services import metrics
+
+
+class FakeRoute:
+    path = "/contacts/{contact_id}"
+
+
+async def plain_app(scope, receive, send):
+    scope["route"] = FakeRoute()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"[]"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def time_asgi(app, iterations: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/contacts/1", "headers": []}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / iterations
+
+
+def time_queries(instrumented: bool, iterations: int) -> float:
+    engine = create_engine("sqlite://")
+    if instrumented:
+        event.listen(engine, "before_cursor_execute", metrics._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", metrics._after_cursor_execute)
+    token = metrics._request_stats.set(metrics.RequestStats()) if instrumented else None
+    try:
+        with engine.connect() as conn:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                conn.exec_driver_sql("SELECT 1").fetchall()
+            return (time.perf_counter() - started) / iterations
+    finally:
+        if token is not None:
+            metrics._request_stats.reset(token)
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--request-budget-us", type=float, default=50)
+    parser.add_argument("--query-budget-us", type=float, default=10)
+    args = parser.parse_args()
+
+    # Warm-up runs first, so imports and label creation are not measured
+    asyncio.run(time_asgi(metrics.MetricsMiddleware(plain_app), 1000))
+    bare = asyncio.run(time_asgi(plain_app, args.iterations))
+    wrapped = asyncio.run(time_asgi(metrics.MetricsMiddleware(plain_app), args.iterations))
+    time_queries(True, 1000)
+    plain_query = time_queries(False, args.iterations)
+    instrumented_query = time_queries(True, args.iterations)
+
+    report = {
+        "request_overhead_us": round((wrapped - bare) * 1e6, 2),
+        "request_budget_us": args.request_budget_us,
+        "query_overhead_us": round((instrumented_query - plain_query) * 1e6, 2),
+        "query_budget_us": args.query_budget_us,
+        "query_us": {"plain": round(plain_query * 1e6, 2), "instrumented": round(instrumented_query * 1e6, 2)},
+    }
+    print(json.dumps(report, indent=2))
+    if report["request_overhead_us"] > args.request_budget_us or report["query_overhead_us"] > args.query_budget_us:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Show the contact search plan switching from a seq scan to a trigram index scan.
+
+Needs a Postgres DATABASE_URL migrated to head (pg_trgm indexes present):
+
+    python -m benchmarks.search_plan --rows 200000 --term smith
+
+The search is explained twice: once inside a rolled-back transaction with the
+trigram indexes dropped, and once with them in place.
+"""
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.config import engine
+from app.database.models import Contact
+from app.services.utils import ranked_search_query
+
+TRGM_INDEXES = ("ix_contacts_first_name_trgm", "ix_contacts_last_name_trgm", "ix_contacts_email_trgm")
+
+
+def seed(conn, rows: int) -> int:
+    unique = uuid.uuid4().hex[:8]
+    user_id = conn.execute(
+        text(
+            "INSERT INTO users (username, email, password_hash, is_verified, role) "
+            "VALUES (:name, :email, 'x', true, 'user') RETURNING id"
+        ),
+        {"name": f"bench_{unique}", "email": f"bench_{unique}@example.com"},
+    ).scalar_one()
+    conn.execute(
+        text(
+            "INSERT INTO contacts (first_name, last_name, email, phone, user_id) "
+            "SELECT 'first' || md5(g::text), 'last' || md5((g * 7)::text), "
+            "       :prefix || g || '@example.com', '555' || g, :user_id "
+            "FROM generate_series(1, :rows) AS g"
+        ),
+        {"prefix": f"bench_{unique}_", "user_id": user_id, "rows": rows},
+    )
+    conn.execute(text("ANALYZE contacts"))
+    return user_id
+
+
+def plan_nodes(plan: dict) -> list:
+    nodes = [plan["Node Type"] + (f" on {plan['Index Name']}" if "Index Name" in plan else "")]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(conn, compiled) -> dict:
+    # exec_driver_sql hands the compiled pyformat SQL and its params straight to the driver
+    started = time.perf_counter()
+    raw = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}", compiled.params).scalar_one()
+    elapsed = time.perf_counter() - started
+    plan = (raw if isinstance(raw, list) else json.loads(raw))[0]
+    return {
+        "nodes": plan_nodes(plan["Plan"]),
+        "execution_ms": plan["Execution Time"],
+        "wall_ms": round(elapsed * 1000, 2),
+    }
+
+
+def compile_sql(query):
+    return query.compile(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--term", default="abc")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("search_plan needs a Postgres DATABASE_URL")
+
+    with engine.begin() as conn:
+        user_id = seed(conn, args.rows)
+
+    queries = {
+        "contains": compile_sql(
+            select(Contact).where(
+                Contact.user_id == user_id,
+                Contact.first_name.ilike(f"%{args.term}%") | Contact.last_name.ilike(f"%{args.term}%"),
+            ).limit(50)
+        ),
+        "ranked": compile_sql(ranked_search_query("postgresql", name=args.term, user_id=user_id, limit=50)),
+    }
+
+    report = {"rows": args.rows, "without_trgm_indexes": {}, "with_trgm_indexes": {}}
+    with engine.connect() as conn:
+        with conn.begin() as tx:
+            for index in TRGM_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            for name, compiled in queries.items():
+                report["without_trgm_indexes"][name] = explain(conn, compiled)
+            tx.rollback()
+        for name, compiled in queries.items():
+            report["with_trgm_indexes"][name] = explain(conn, compiled)
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM contacts WHERE user_id = :user_id"), {"user_id": user_id})
+        conn.execute(text("DELETE FROM users WHERE id = :user_id"), {"user_id": user_id})
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
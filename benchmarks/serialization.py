@@ -0,0 +1,107 @@
+"""Compare ways of turning a page of contacts into the GET /contacts/ JSON body.
+
+Seeds one user's contacts into a scratch database (in-memory SQLite unless
+--database-url is given) and times each path end to end, query included:
+
+    orm_response_model  ORM objects, validated and dumped to Python by the response
+                        model, then json.dumps in JSONResponse (FastAPI's default path)
+    orm_type_adapter    ORM objects through TypeAdapter.dump_json (the old cache-miss path)
+    rows_type_adapter   column-only rows through TypeAdapter.dump_json
+    rows_orjson         column-only rows encoded with orjson (the route's current path)
+
+    python -m benchmarks.serialization --contacts 10000 --repeat 10
+
+Prints JSON with the median query, encode and total time per path in ms, and
+whether every path produced the same bytes.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.config import Base
+from app.database import crud
+from app.database.models import Contact, User
+from app.services.response_cache import CONTACT_LIST, CONTACT_ROWS, render
+
+
+def seed(db: Session, contacts: int) -> int:
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    db.execute(insert(Contact), [
+        {
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"contact{i}@example.com",
+            "phone": "+380501234567",
+            "birthday": date(1980, 1, 1) + timedelta(days=i % 10000) if i % 3 else None,
+            "extra_info": "Met at the conference" if i % 2 else None,
+            "user_id": user.id,
+        }
+        for i in range(contacts)
+    ])
+    db.commit()
+    return user.id
+
+
+def orm_response_model(contacts) -> bytes:
+    content = CONTACT_LIST.dump_python(CONTACT_LIST.validate_python(contacts, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+PATHS = {
+    "orm_response_model": (crud.get_contacts, orm_response_model),
+    "orm_type_adapter": (crud.get_contacts, lambda contacts: render(CONTACT_LIST, contacts)),
+    "rows_type_adapter": (crud.get_contact_rows, lambda rows: render(CONTACT_LIST, rows)),
+    "rows_orjson": (crud.get_contact_rows, lambda rows: render(CONTACT_ROWS, rows)),
+}
+
+
+def time_path(db: Session, user_id: int, load, encode, repeat: int) -> tuple:
+    queries, encodes = [], []
+    body = b""
+    for _ in range(repeat):
+        # A fresh identity map each time, as in a request
+        db.expunge_all()
+        started = time.perf_counter()
+        result = load(db, user_id)
+        loaded = time.perf_counter()
+        body = encode(result)
+        queries.append(loaded - started)
+        encodes.append(time.perf_counter() - loaded)
+    query, encoding = statistics.median(queries) * 1000, statistics.median(encodes) * 1000
+    return {"query_ms": round(query, 2), "encode_ms": round(encoding, 2), "total_ms": round(query + encoding, 2)}, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url", default="sqlite://", help="scratch database; its tables are created")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    report = {"contacts": args.contacts, "paths": {}}
+    bodies = set()
+    with Session(engine) as db:
+        user_id = seed(db, args.contacts)
+        for name, (load, encode) in PATHS.items():
+            time_path(db, user_id, load, encode, 1)
+            report["paths"][name], body = time_path(db, user_id, load, encode, args.repeat)
+            bodies.add(body)
+    report["identical_output"] = len(bodies) == 1
+    baseline = report["paths"]["orm_response_model"]["total_ms"]
+    report["speedup"] = round(baseline / report["paths"]["rows_orjson"]["total_ms"], 1)
+    print(json.dumps(report, indent=2))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
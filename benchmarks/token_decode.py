@@ -0,0 +1,46 @@
+"""Compare a full JWT verification with a warm verified-claims cache lookup.
+
+    python -m benchmarks.token_decode --iterations 100000
+
+"cold" runs jwt.decode (signature and claims checks) on every call, "warm"
+serves the same bearer token from the TokenCache used by app.services.auth.
+"""
+import argparse
+import json
+import time
+
+from app.services.auth import _verify_jwt, create_access_token
+from app.services.token_cache import TokenCache
+
+
+def measure(func, token: str, iterations: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(token)
+    elapsed = time.perf_counter() - started
+    return {"total_ms": round(elapsed * 1000, 2), "per_call_us": round(elapsed / iterations * 1_000_000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    token = create_access_token(data={"sub": "bench@example.com"})
+    cache = TokenCache(_verify_jwt, maxsize=1000, ttl=300, enabled=True)
+    cache.decode(token)
+
+    cold = measure(_verify_jwt, token, args.iterations)
+    warm = measure(cache.decode, token, args.iterations)
+    report = {
+        "iterations": args.iterations,
+        "cold": cold,
+        "warm": warm,
+        "speedup": round(cold["per_call_us"] / warm["per_call_us"], 1),
+        "cache": cache.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
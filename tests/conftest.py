@@ -1,11 +1,35 @@
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# The outbox worker would try to reach Mailgun; tests drive it directly against a fake server
+os.environ.setdefault("EMAIL_WORKER_ENABLED", "false")
+# Same for the daily digest job: its tests run it themselves for a given day
+os.environ.setdefault("BIRTHDAY_DIGEST_ENABLED", "false")
+
 import pytest
+import pytest_asyncio
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from app.main import app
+from app.config import Base
 from app.database.db import SessionLocal
+from app.database import crud
+from app.database.async_db import get_async_db, get_async_sessionmaker
 from app.database.models import User
+from app.routes.aio import contacts as async_contacts, users as async_users
+from app.services import email
 from app.services.security import hash_password
+from app.services.user_cache import user_cache
+
+TEST_PASSWORD = "TestPass123"
 
 
 @pytest.fixture(scope="module")
@@ -39,3 +63,100 @@ def get_auth_header(email: str, password: str) -> dict:
         )
         token = response.json()["access_token"]
         return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def user(db):
+    # A verified user with a unique email (password TEST_PASSWORD), loaded in the test's session
+    email = f"user_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, TEST_PASSWORD)
+    yield crud.get_user_by_email(db, email)
+    user_cache.invalidate(email)
+
+
+@pytest_asyncio.fixture
+async def async_engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_db(async_engine):
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def async_client(async_engine):
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as session:
+            yield session
+
+    async_app = FastAPI()
+    async_app.include_router(async_contacts.router)
+    async_app.include_router(async_users.router)
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    async_app.dependency_overrides[get_async_sessionmaker] = lambda: session_factory
+
+    async with AsyncClient(transport=ASGITransport(app=async_app), base_url="http://test") as client:
+        yield client
+
+
+class FakeMailgun(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeMailgunHandler)
+        self.requests = []
+        self.connections = set()
+        # Status codes to answer with, in order; 200 once the list is used up
+        self.statuses = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v3"
+
+
+class FakeMailgunHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API, so pooled clients reuse connections
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        self.server.requests.append({"path": self.path, "form": form})
+        self.server.connections.add(self.client_address)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        payload = b'{"message": "Queued. Thank you."}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_mailgun(monkeypatch):
+    server = FakeMailgun()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(email, "MAILGUN_API_BASE", server.base_url)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,65 @@
+"""pytest plugin: SQL statement budgets for endpoints (enabled with -p in pytest.ini).
+
+    @pytest.mark.max_queries(3)
+    def test_something(test_client): ...         # the whole test body
+
+    def test_get(test_client, assert_max_queries):
+        with assert_max_queries(2):               # just this block
+            test_client.get("/contacts/1")
+
+Both fail on more statements than allowed, and on repeated SELECT shapes
+(likely N+1) unless n_plus_one=True is passed.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "max_queries(limit, n_plus_one=False): fail when the test runs more SQL statements than limit"
+    )
+
+
+def _problems(log, limit: int, n_plus_one: bool) -> list:
+    problems = []
+    if log.count > limit:
+        problems.append(f"expected at most {limit} SQL statements, got {log.count}")
+    if not n_plus_one and log.repeated():
+        problems.append("repeated SELECT statements (N+1)")
+    if problems:
+        problems.append(log.summary())
+        problems.extend(f"  {i}. {statement}" for i, (statement, _) in enumerate(log.statements, 1))
+    return problems
+
+
+@pytest.fixture
+def assert_max_queries():
+    # Imported lazily: app.config must not be loaded before conftest has set up the environment
+    from app.services.sql_profiler import capture_queries
+
+    @contextmanager
+    def check(limit: int, n_plus_one: bool = False):
+        with capture_queries() as log:
+            yield log
+        problems = _problems(log, limit, n_plus_one)
+        if problems:
+            pytest.fail("\n".join(problems), pytrace=False)
+
+    return check
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("max_queries")
+    if marker is None:
+        return (yield)
+
+    from app.services.sql_profiler import capture_queries
+
+    with capture_queries() as log:
+        result = yield
+    problems = _problems(log, marker.args[0], marker.kwargs.get("n_plus_one", False))
+    if problems:
+        pytest.fail("\n".join(problems), pytrace=False)
+    return result
@@ -0,0 +1,66 @@
+import uuid
+from datetime import date
+
+from app.database import async_crud
+from app.database.schemas import ContactCreate, ContactUpdate, UserCreate
+from app.services import async_utils
+
+
+async def create_user(async_db):
+    unique = uuid.uuid4().hex[:8]
+    return await async_crud.create_user(async_db, UserCreate(
+        username=f"async_{unique}",
+        email=f"async_{unique}@example.com",
+        password="AsyncPass123",
+    ))
+
+
+def contact_data(**overrides):
+    data = {
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "email": f"ada_{uuid.uuid4().hex[:6]}@example.com",
+        "phone": "1234567890",
+    }
+    data.update(overrides)
+    return ContactCreate(**data)
+
+
+async def test_async_contact_crud(async_db):
+    user = await create_user(async_db)
+
+    contact = await async_crud.create_contact(async_db, contact_data(), user.id)
+    assert contact.id is not None
+
+    contacts = await async_crud.get_contacts(async_db, user.id)
+    assert [c.id for c in contacts] == [contact.id]
+
+    updated = await async_crud.update_contact(
+        async_db, contact.id, ContactUpdate(first_name="Augusta"), user.id
+    )
+    assert updated.first_name == "Augusta"
+
+    deleted = await async_crud.delete_contact(async_db, contact.id, user.id)
+    assert deleted.id == contact.id
+    assert await async_crud.get_contact_by_id(async_db, contact.id, user.id) is None
+
+
+async def test_async_password_update(async_db):
+    user = await create_user(async_db)
+
+    updated = await async_crud.update_user_password(async_db, user.email, "NewAsyncPass123")
+
+    assert updated is not None
+    assert await async_crud.verify_password("NewAsyncPass123", updated.password_hash)
+
+
+async def test_async_search_and_birthdays(async_db):
+    user = await create_user(async_db)
+    await async_crud.create_contact(async_db, contact_data(first_name="Findable"), user.id)
+    await async_crud.create_contact(async_db, contact_data(birthday=date.today()), user.id)
+
+    found = await async_utils.search_contacts(async_db, name="Findable", user_id=user.id)
+    birthdays = await async_utils.get_upcoming_birthdays(async_db, user.id)
+
+    assert [c.first_name for c in found] == ["Findable"]
+    assert len(birthdays) == 1
@@ -0,0 +1,91 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app import config
+from app.config import SessionLocal, engine, get_engine_options
+from app.database.db import get_db, pool_status
+from app.main import app
+from tests.conftest import create_user_in_db, get_auth_header
+
+client = TestClient(app)
+
+PG_URL = "postgresql+psycopg2://user:secret@db/contacts"
+ASYNCPG_URL = "postgresql+asyncpg://user:secret@db/contacts"
+
+
+def test_pool_options_come_from_config(monkeypatch):
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(config, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = get_engine_options(PG_URL)
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert get_engine_options(ASYNCPG_URL)["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+
+def test_pgbouncer_mode_disables_pool_and_prepared_statements(monkeypatch):
+    monkeypatch.setattr(config, "DB_PGBOUNCER", True)
+    monkeypatch.setattr(config, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = get_engine_options(ASYNCPG_URL)
+
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options
+    assert options["connect_args"] == {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    assert "connect_args" not in get_engine_options(PG_URL)
+
+
+def test_sqlite_memory_keeps_its_own_pool():
+    assert "pool_size" not in get_engine_options("sqlite://")
+    assert "pool_size" in get_engine_options("sqlite:////tmp/contacts.db")
+
+
+def test_single_engine_and_dependency():
+    import app.database
+
+    assert app.database.engine is engine
+    assert app.database.SessionLocal is SessionLocal
+    db_gen = get_db()
+    assert next(db_gen).get_bind() is engine
+    db_gen.close()
+
+
+def test_pool_status_counts_checked_out_connections():
+    before = pool_status()["checked_out"]
+    with engine.connect():
+        status = pool_status()
+    assert status["checked_out"] == before + 1
+    assert status["pool"] == "QueuePool"
+    assert status["max_connections"] == status["size"] + status["max_overflow"]
+    assert status["max_connections_all_workers"] == status["max_connections"] * status["workers"]
+
+
+def test_pool_status_without_a_local_pool(tmp_path):
+    null_engine = create_engine(f"sqlite:///{tmp_path / 'null.db'}", poolclass=NullPool)
+    try:
+        status = pool_status(null_engine)
+    finally:
+        null_engine.dispose()
+    assert status["pool"] == "NullPool"
+    assert status["pooled"] is False
+    assert "PgBouncer" in status["detail"]
+    assert "checked_out" not in status
+
+
+def test_db_pool_endpoint_is_admin_only():
+    email = f"pool_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "PoolPass123")
+    assert client.get("/admin/db_pool", headers=get_auth_header(email, "PoolPass123")).status_code == 403
+
+    admin = f"pool_admin_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(admin, "PoolPass123", role="admin")
+    response = client.get("/admin/db_pool", headers=get_auth_header(admin, "PoolPass123"))
+    assert response.status_code == 200
+    assert response.json()["sync"]["pool"] == "QueuePool"
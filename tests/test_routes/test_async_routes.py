@@ -0,0 +1,65 @@
+import uuid
+
+
+async def register_and_login_user(async_client):
+    username = f"user_{uuid.uuid4().hex[:8]}"
+    email = f"{username}@example.com"
+    password = "testpassword123"
+
+    response = await async_client.post("/users/signup", json={
+        "username": username,
+        "email": email,
+        "password": password
+    })
+    assert response.status_code == 201
+
+    response = await async_client.post("/users/login", data={
+        "username": email,
+        "password": password
+    })
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def test_async_contacts_flow(async_client):
+    headers = await register_and_login_user(async_client)
+
+    response = await async_client.post("/contacts/", json={
+        "first_name": "John",
+        "last_name": "Doe",
+        "email": f"john_{uuid.uuid4().hex[:5]}@example.com",
+        "phone": "1234567890"
+    }, headers=headers)
+    assert response.status_code == 201
+    contact = response.json()
+
+    response = await async_client.get("/contacts/", headers=headers)
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [contact["id"]]
+
+    response = await async_client.put(
+        f"/contacts/{contact['id']}", json={"first_name": "Updated"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Updated"
+
+    response = await async_client.delete(f"/contacts/{contact['id']}", headers=headers)
+    assert response.status_code == 200
+
+    response = await async_client.get(f"/contacts/{contact['id']}", headers=headers)
+    assert response.status_code == 404
+
+
+async def test_async_export_contacts(async_client):
+    headers = await register_and_login_user(async_client)
+    for _ in range(2):
+        await async_client.post("/contacts/", json={
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": f"jane_{uuid.uuid4().hex[:5]}@example.com",
+            "phone": "1234567890"
+        }, headers=headers)
+
+    response = await async_client.get("/contacts/export", params={"format": "ndjson"}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2
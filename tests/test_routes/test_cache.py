@@ -5,6 +5,7 @@ from app.database.schemas import UserCreate
 from fastapi.testclient import TestClient
 from app.main import app
 from app.database import SessionLocal
+from app.services.response_cache import response_cache
 import random
 import string
 
@@ -50,3 +51,88 @@ def test_contacts_cache(auth_headers):
     print(f"Response Body: {response.json()}")
 
     assert response.status_code == 200, f"Expected status 200, but got {response.status_code}: {response.json()}"
+
+
+@pytest.fixture(scope="module")
+def cache_headers(db):
+    # Its own user: test_user is deleted and recreated on every run, which fails once it owns contacts
+    suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+    user = crud.create_user(db=db, user=UserCreate(
+        username=f"cache_{suffix}", email=f"cache_{suffix}@example.com", password="CachePass123"
+    ))
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+
+def create_contact(headers, **overrides):
+    suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+    payload = {
+        "first_name": "Cached",
+        "last_name": "Contact",
+        "email": f"cached_{suffix}@example.com",
+        "phone": "123456789",
+        **overrides,
+    }
+    response = client.post("/contacts/", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_contacts_served_from_cache_until_changed(cache_headers):
+    create_contact(cache_headers)
+    first = client.get("/contacts/", headers=cache_headers)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    hits = response_cache.hits
+    second = client.get("/contacts/", headers=cache_headers)
+    assert response_cache.hits == hits + 1
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+
+    created = create_contact(cache_headers)
+    third = client.get("/contacts/", headers=cache_headers)
+    assert third.headers["etag"] != etag
+    assert created["id"] in [c["id"] for c in third.json()]
+
+
+def test_if_none_match_returns_304(cache_headers):
+    contact = create_contact(cache_headers)
+    response = client.get(f"/contacts/{contact['id']}", headers=cache_headers)
+    assert response.json()["email"] == contact["email"]
+
+    cached = client.get(f"/contacts/{contact['id']}", headers={**cache_headers, "If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    client.put(f"/contacts/{contact['id']}", json={"first_name": "Changed"}, headers=cache_headers)
+    changed = client.get(f"/contacts/{contact['id']}", headers={**cache_headers, "If-None-Match": response.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["first_name"] == "Changed"
+
+
+def test_cache_key_includes_query_and_keeps_pagination_headers(cache_headers):
+    for _ in range(3):
+        create_contact(cache_headers, first_name="Paged")
+    page = client.get("/contacts/search/", params={"name": "Paged", "limit": 2}, headers=cache_headers)
+    again = client.get("/contacts/search/", params={"limit": 2, "name": "Paged"}, headers=cache_headers)
+    other = client.get("/contacts/search/", params={"name": "Paged", "limit": 1}, headers=cache_headers)
+
+    assert again.headers["etag"] == page.headers["etag"]
+    assert again.headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+    assert again.headers["Link"] == page.headers["Link"]
+    assert other.headers["etag"] != page.headers["etag"]
+    assert len(other.json()) == 1
+
+
+def test_delete_invalidates(cache_headers):
+    contact = create_contact(cache_headers)
+    assert client.get(f"/contacts/{contact['id']}", headers=cache_headers).status_code == 200
+    client.delete(f"/contacts/{contact['id']}", headers=cache_headers)
+    assert client.get(f"/contacts/{contact['id']}", headers=cache_headers).status_code == 404
+
+
+def test_disabled_cache_has_no_etag(cache_headers, monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+    response = client.get("/contacts/", headers=cache_headers)
+    assert response.status_code == 200
+    assert "etag" not in response.headers
@@ -0,0 +1,68 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import SessionLocal
+from app.database import crud
+from app.main import app
+from app.services.response_cache import CONTACT_LIST, CONTACT_ROWS, render, response_cache
+from tests.conftest import create_user_in_db, get_auth_header
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def owner():
+    email = f"rows_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "RowsPass123")
+    headers = get_auth_header(email, "RowsPass123")
+    contacts = [
+        {"first_name": "Олена", "last_name": "Коваль", "birthday": "1990-02-28", "extra_info": "Друг \"з\" роботи"},
+        {"first_name": "Plain", "last_name": "Contact"},
+        {"first_name": "Third", "last_name": "Contact", "birthday": "2000-12-31"},
+    ]
+    for contact in contacts:
+        response = client.post("/contacts/", json={
+            **contact, "email": f"rows_{uuid.uuid4().hex[:8]}@example.com", "phone": "+380501234567",
+        }, headers=headers)
+        assert response.status_code == 201
+    db = SessionLocal()
+    try:
+        yield crud.get_user_by_email(db, email).id, headers
+    finally:
+        db.close()
+
+
+def test_rows_render_like_the_response_model(owner):
+    user_id, _ = owner
+    db = SessionLocal()
+    try:
+        rows = crud.get_contact_rows(db, user_id)
+        expected = render(CONTACT_LIST, crud.get_contacts(db, user_id))
+    finally:
+        db.close()
+
+    assert render(CONTACT_ROWS, rows) == expected
+    assert rows[0].birthday == date(1990, 2, 28)
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_list_body_and_pagination(monkeypatch, owner, cache_enabled):
+    user_id, headers = owner
+    monkeypatch.setattr(response_cache, "enabled", cache_enabled)
+    db = SessionLocal()
+    try:
+        expected = render(CONTACT_LIST, crud.get_contacts(db, user_id, limit=2))
+    finally:
+        db.close()
+
+    response = client.get("/contacts/", params={"limit": 2}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == expected
+    assert response.headers["X-Next-Cursor"]
+    rest = client.get("/contacts/", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]}, headers=headers)
+    assert [contact["first_name"] for contact in rest.json()] == ["Third"]
@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import uuid
 from datetime import date
 
@@ -110,3 +113,111 @@ def test_get_upcoming_birthdays(test_client):
     assert response.status_code == 200
     results = response.json()
     assert any(c["first_name"] == "Birthday" for c in results)
+
+
+def test_get_contacts_keyset_pagination(test_client):
+    headers = register_and_login_user(test_client)
+    created = [create_contact(test_client, headers)["id"] for _ in range(3)]
+
+    first_page = test_client.get("/contacts/", params={"limit": 2}, headers=headers)
+    assert first_page.status_code == 200
+    assert [c["id"] for c in first_page.json()] == created[:2]
+    cursor = first_page.headers["X-Next-Cursor"]
+    assert 'rel="next"' in first_page.headers["Link"]
+
+    second_page = test_client.get("/contacts/", params={"limit": 2, "cursor": cursor}, headers=headers)
+    assert second_page.status_code == 200
+    assert [c["id"] for c in second_page.json()] == created[2:]
+    assert "X-Next-Cursor" not in second_page.headers
+
+
+def test_get_contacts_invalid_cursor(test_client):
+    headers = register_and_login_user(test_client)
+    response = test_client.get("/contacts/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_export_contacts_ndjson(test_client):
+    headers = register_and_login_user(test_client)
+    created = [create_contact(test_client, headers, birthday="1990-05-17") for _ in range(2)]
+
+    response = test_client.get("/contacts/export", params={"format": "ndjson"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in rows] == [c["id"] for c in created]
+    assert rows[0]["birthday"] == "1990-05-17"
+
+
+def test_export_contacts_csv(test_client):
+    headers = register_and_login_user(test_client)
+    contact = create_contact(test_client, headers)
+
+    response = test_client.get("/contacts/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["email"] for r in rows] == [contact["email"]]
+
+
+def test_bulk_import_json_reports_row_errors(test_client):
+    headers = register_and_login_user(test_client)
+    existing = create_contact(test_client, headers)
+    fresh_email = f"bulk_{uuid.uuid4().hex[:8]}@example.com"
+
+    payload = [
+        {"first_name": "Bulk", "last_name": "One", "email": fresh_email, "phone": "1"},
+        {"first_name": "Bulk", "last_name": "Dup", "email": existing["email"], "phone": "2"},
+        {"first_name": "Bulk", "last_name": "Again", "email": fresh_email, "phone": "3"},
+        {"first_name": "Bulk", "email": "not-an-email", "phone": "4"},
+    ]
+    response = test_client.post("/contacts/bulk", json=payload, params={"batch_size": 2}, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert {e["row"]: e["error"] for e in data["errors"]}.keys() == {2, 3, 4}
+    assert data["errors"][0]["error"] == "Email already exists"
+
+    contacts = test_client.get("/contacts/", headers=headers).json()
+    assert {c["email"] for c in contacts} == {existing["email"], fresh_email}
+
+
+def test_bulk_import_csv_upload(test_client):
+    headers = register_and_login_user(test_client)
+    rows = "\n".join(
+        ["first_name,last_name,email,phone,birthday,extra_info"]
+        + [f"Csv,Row{i},csv_{uuid.uuid4().hex[:8]}@example.com,555{i},,"
+           for i in range(5)]
+    )
+    files = {"file": ("contacts.csv", io.BytesIO(rows.encode()), "text/csv")}
+
+    response = test_client.post("/contacts/bulk", files=files, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 5
+    assert response.json()["errors"] == []
+
+
+def test_bulk_import_rejects_unknown_content_type(test_client):
+    headers = register_and_login_user(test_client)
+    response = test_client.post("/contacts/bulk", content=b"x", headers={**headers, "Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_search_contacts_ranked(test_client):
+    headers = register_and_login_user(test_client)
+    create_contact(test_client, headers, first_name="Mariana", last_name="Kovalenko")
+    exact = create_contact(test_client, headers, first_name="Maria", last_name="Shevchenko")
+
+    response = test_client.get(
+        "/contacts/search/", params={"name": "maria", "mode": "ranked", "limit": 10}, headers=headers
+    )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [c["first_name"] for c in results] == ["Maria", "Mariana"]
+    assert results[0]["id"] == exact["id"]
+    assert "X-Next-Cursor" not in response.headers
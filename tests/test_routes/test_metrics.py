@@ -0,0 +1,96 @@
+import uuid
+
+import redis
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from sqlalchemy import text
+
+from app.config import REDIS_URL, SessionLocal
+from app.main import app
+from app.services.metrics import RequestStats, _request_stats
+from tests.conftest import create_user_in_db, get_auth_header
+
+client = TestClient(app)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_route_latency_and_queries_are_recorded():
+    email = f"metrics_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "MetricsPass123")
+    headers = get_auth_header(email, "MetricsPass123")
+    labels = {"method": "GET", "route": "/contacts/{contact_id}"}
+    before = sample("http_request_duration_seconds_count", **labels)
+    queries_before = sample("db_queries_per_request_sum", route="/contacts/{contact_id}")
+
+    assert client.get("/contacts/999999999", headers=headers).status_code == 404
+
+    assert sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert sample("http_requests_total", status="404", **labels) >= 1
+    # The route template is the label, never the raw path
+    assert REGISTRY.get_sample_value("http_requests_total", {**labels, "route": "/contacts/999999999", "status": "404"}) is None
+    assert sample("db_queries_per_request_sum", route="/contacts/{contact_id}") > queries_before
+
+
+def test_metrics_endpoint_exposes_pool_cache_and_hash_metrics():
+    email = f"metrics_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "MetricsPass123")
+    get_auth_header(email, "MetricsPass123")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in body
+    assert 'db_pool_checkout_wait_seconds_count' in body
+    assert 'cache_events_total{cache="token",event="hits"}' in body
+    assert 'route="/metrics"' not in body
+
+
+def test_queries_are_counted_in_the_request_context():
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+        finally:
+            db.close()
+    finally:
+        _request_stats.reset(token)
+    assert stats.queries == 1
+
+
+def test_rate_limit_rejections_are_counted():
+    email = f"metrics_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "MetricsPass123")
+    headers = get_auth_header(email, "MetricsPass123")
+    before = sample("rate_limit_rejections_total", route="/auth/me")
+
+    try:
+        with TestClient(app) as limited:
+            statuses = [limited.get("/auth/me", headers=headers).status_code for _ in range(7)]
+    finally:
+        # Other tests call /auth/me from the same client address within the minute
+        limiter_redis = redis.Redis.from_url(REDIS_URL)
+        keys = list(limiter_redis.scan_iter("fastapi-limiter:*"))
+        if keys:
+            limiter_redis.delete(*keys)
+
+    assert 429 in statuses
+    assert sample("rate_limit_rejections_total", route="/auth/me") == before + statuses.count(429)
+
+
+def test_pool_checkout_wait_is_observed():
+    before = sample("db_pool_checkout_wait_seconds_count")
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+    assert sample("db_pool_checkout_wait_seconds_count") > before
@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.response_cache import response_cache
+from app.services.user_cache import user_cache
+from tests.conftest import create_user_in_db, get_auth_header
+
+client = TestClient(app)
+
+# Authenticated reads: the user lookup plus one query for the data. More means a lazy load or N+1
+pytestmark = pytest.mark.usefixtures("uncached")
+
+
+@pytest.fixture
+def uncached(monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+    monkeypatch.setattr(user_cache, "enabled", False)
+
+
+@pytest.fixture(scope="module")
+def headers():
+    email = f"budget_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "BudgetPass123")
+    headers = get_auth_header(email, "BudgetPass123")
+    for i in range(5):
+        response = client.post("/contacts/", json={
+            "first_name": "Budget",
+            "last_name": f"Contact{i}",
+            "email": f"budget_{uuid.uuid4().hex[:8]}@example.com",
+            "phone": "123456789",
+        }, headers=headers)
+        assert response.status_code == 201
+    return headers
+
+
+@pytest.fixture(scope="module")
+def contact_id(headers):
+    return client.get("/contacts/", headers=headers).json()[0]["id"]
+
+
+def test_list_contacts(headers, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.get("/contacts/", headers=headers)
+    assert len(response.json()) == 5
+
+
+def test_get_contact(headers, contact_id, assert_max_queries):
+    with assert_max_queries(2):
+        assert client.get(f"/contacts/{contact_id}", headers=headers).status_code == 200
+
+
+def test_search_contacts(headers, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.get("/contacts/search/", params={"name": "Budget"}, headers=headers)
+    assert len(response.json()) == 5
+
+
+@pytest.mark.max_queries(2)
+def test_upcoming_birthdays(headers):
+    assert client.get("/contacts/upcoming_birthdays/", headers=headers).status_code in (200, 404)
+
+
+def test_budget_failure_lists_statements(headers, assert_max_queries):
+    with pytest.raises(pytest.fail.Exception, match="expected at most 1 SQL statements, got 2"):
+        with assert_max_queries(1):
+            client.get("/contacts/", headers=headers)
@@ -2,6 +2,7 @@ import uuid
 import pytest
 from app.config import SessionLocal
 from app.services.security import hash_password
+from app.database import crud
 from app.database.models import User
 from fastapi.testclient import TestClient
 from app.main import app
@@ -50,3 +51,36 @@ def test_refresh_token_flow(role):
     refresh_data = refresh_response.json()
     assert "access_token" in refresh_data
     assert refresh_data["token_type"] == "bearer"
+
+
+def login(email: str, password: str) -> dict:
+    response = client.post("/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_token_is_not_a_bearer_token():
+    email = f"scope_{uuid.uuid4().hex[:6]}@test.com"
+    create_user(email, "TestPass123")
+    tokens = login(email, "TestPass123")
+
+    response = client.get("/contacts/", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 401
+    response = client.get("/contacts/", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200
+
+
+def test_password_change_invalidates_refresh_token():
+    email = f"ver_{uuid.uuid4().hex[:6]}@test.com"
+    create_user(email, "TestPass123")
+    tokens = login(email, "TestPass123")
+
+    db = SessionLocal()
+    try:
+        crud.update_user_password(db, email, "NewPass456")
+    finally:
+        db.close()
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": login(email, "NewPass456")["refresh_token"]}).status_code == 200
@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+
+from tests.conftest import create_user_in_db
+
+
+@pytest.fixture
+def credentials():
+    email = f"revoke_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "RevokePass123")
+    return {"username": email, "password": "RevokePass123"}
+
+
+def login(test_client, credentials) -> dict:
+    response = test_client.post("/auth/login", data=credentials)
+    assert response.status_code == 200
+    return response.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_logout_revokes_access_and_refresh_tokens(test_client, credentials):
+    tokens = login(test_client, credentials)
+    assert test_client.get("/contacts/", headers=bearer(tokens)).status_code == 200
+
+    response = test_client.post(
+        "/auth/logout", headers=bearer(tokens), json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert response.status_code == 200
+    assert test_client.get("/contacts/", headers=bearer(tokens)).status_code == 401
+    assert test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_refresh_token_is_single_use(test_client, credentials):
+    tokens = login(test_client, credentials)
+
+    rotated = test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    replayed = test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    assert rotated.status_code == 200
+    assert replayed.status_code == 401
+    new_refresh = rotated.json()["refresh_token"]
+    assert test_client.post("/auth/refresh", json={"refresh_token": new_refresh}).status_code == 200
+
+
+def test_admin_revokes_all_sessions(test_client, credentials):
+    first = login(test_client, credentials)
+    second = login(test_client, credentials)
+    admin_email = f"revoke_admin_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(admin_email, "AdminPass123", role="admin")
+    admin = login(test_client, {"username": admin_email, "password": "AdminPass123"})
+    user_id = test_client.get("/auth/me", headers=bearer(first)).json()["id"]
+
+    response = test_client.post(f"/users/{user_id}/revoke_sessions", headers=bearer(admin))
+
+    assert response.status_code == 200
+    for tokens in (first, second):
+        assert test_client.get("/contacts/", headers=bearer(tokens)).status_code == 401
+        assert test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    # Logging in again afterwards gives a working session
+    assert test_client.get("/contacts/", headers=bearer(login(test_client, credentials))).status_code == 200
+
+
+def test_revoke_sessions_requires_admin(test_client, credentials):
+    tokens = login(test_client, credentials)
+
+    response = test_client.post("/users/1/revoke_sessions", headers=bearer(tokens))
+
+    assert response.status_code == 403
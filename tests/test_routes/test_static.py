@@ -0,0 +1,138 @@
+import asyncio
+import gzip
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app.config import AVATAR_STORAGE_PATH
+from app.main import app
+from app.services import static_files
+from app.services.static_files import CachedStaticFiles, compress_directory
+
+client = TestClient(app)
+
+
+def test_favicon_has_strong_etag_and_revalidates():
+    response = client.get("/favicon.ico")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert response.headers["cache-control"] == "public, max-age=3600"
+
+    cached = client.get("/favicon.ico", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+
+def test_hashed_avatar_is_immutable():
+    digest = uuid.uuid4().hex
+    path = os.path.join(AVATAR_STORAGE_PATH, f"{digest}_64.webp")
+    with open(path, "wb") as file:
+        file.write(b"RIFF....WEBP")
+    try:
+        response = client.get(f"/static/avatars/{digest}_64.webp")
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"{digest}_64"'
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["content-type"] == "image/webp"
+
+        cached = client.get(f"/static/avatars/{digest}_64.webp", headers={"If-None-Match": f'W/"{digest}_64"'})
+        assert cached.status_code == 304
+    finally:
+        os.remove(path)
+
+
+@pytest.fixture
+def compressed_client(tmp_path):
+    (tmp_path / "style.css").write_text("body { color: red; }\n" * 100)
+    (tmp_path / "tiny.css").write_text("a{}")
+    assert compress_directory(str(tmp_path)) >= 1
+    return TestClient(Starlette(routes=[Mount("/static", CachedStaticFiles(directory=str(tmp_path)))]))
+
+
+def test_precompressed_variant_is_served(compressed_client, tmp_path):
+    original = (tmp_path / "style.css").read_bytes()
+
+    response = compressed_client.get("/static/style.css", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/css")
+    assert int(response.headers["content-length"]) == os.path.getsize(tmp_path / "style.css.gz")
+    assert response.content == original
+    assert response.headers["etag"].endswith('-gzip"')
+
+    cached = compressed_client.get(
+        "/static/style.css", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+    )
+    assert cached.status_code == 304
+
+
+def test_identity_when_encoding_not_accepted(compressed_client, tmp_path):
+    response = compressed_client.get("/static/style.css", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == (tmp_path / "style.css").read_bytes()
+    # Small files are not worth compressing
+    assert not (tmp_path / "tiny.css.gz").exists()
+
+
+def test_range_request_gets_the_original(compressed_client, tmp_path):
+    response = compressed_client.get("/static/style.css", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.content == b"body"
+
+
+def test_gzip_output_is_reproducible(tmp_path):
+    (tmp_path / "app.js").write_text("console.log(1);\n" * 100)
+    compress_directory(str(tmp_path))
+    first = (tmp_path / "app.js.gz").read_bytes()
+    compress_directory(str(tmp_path))
+    assert (tmp_path / "app.js.gz").read_bytes() == first
+    assert gzip.decompress(first) == (tmp_path / "app.js").read_bytes()
+
+
+def test_etag_and_variants_are_computed_off_the_event_loop(compressed_client, monkeypatch):
+    on_loop = []
+    original = static_files.strong_etag
+
+    def strong_etag(path, stat_result):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return original(path, stat_result)
+
+    monkeypatch.setattr(static_files, "strong_etag", strong_etag)
+    assert compressed_client.get("/static/style.css").status_code == 200
+    assert client.get("/favicon.ico").status_code == 200
+    assert compressed_client.get("/static/missing.css").status_code == 404
+
+    assert on_loop == [False, False]
+
+
+def test_etag_cache_is_safe_across_threads(tmp_path):
+    # More files than the cache holds, so threads evict entries others are reading
+    paths = []
+    for i in range(static_files.ETAG_CACHE_SIZE + 200):
+        path = tmp_path / f"file{i}.txt"
+        path.write_text(str(i))
+        paths.append(str(path))
+
+    def etag(path):
+        return static_files.strong_etag(path, os.stat(path))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        first = list(pool.map(etag, paths * 2))
+
+    assert first[:len(paths)] == first[len(paths):]
+    assert len(set(first[:len(paths)])) == len(paths)
@@ -0,0 +1,169 @@
+import io
+import os
+import time
+import uuid
+
+import pytest
+from PIL import Image
+from fastapi import HTTPException, Request
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+from app.config import AVATAR_STORAGE_PATH, SessionLocal
+from app.database import crud
+from app.main import app
+from app.services import avatars
+from app.services.storage import LocalStorage
+from tests.conftest import create_user_in_db, get_auth_header
+
+
+def png_bytes(size=(300, 200), color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def test_store_upload_is_content_addressed(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+    content = png_bytes()
+    first = await avatars.store_upload(UploadFile(io.BytesIO(content), filename="me.PNG"), storage)
+    second = await avatars.store_upload(UploadFile(io.BytesIO(content), filename="other.png"), storage)
+
+    assert (first.digest, first.filename) == (second.digest, second.filename)
+    assert first.filename == f"{first.digest}.png"
+    assert first.url == f"/media/{first.filename}"
+    assert sorted(os.listdir(tmp_path)) == [first.filename]
+    # The spooled originals are kept for the resize job
+    assert first.source != second.source and os.path.exists(first.source)
+
+
+async def test_store_upload_enforces_byte_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", 1000)
+    upload = UploadFile(io.BytesIO(b"x" * 1001), filename="big.png")
+
+    with pytest.raises(HTTPException) as exc:
+        await avatars.store_upload(upload, LocalStorage(str(tmp_path)))
+
+    assert exc.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+async def test_store_upload_rejects_other_types(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        await avatars.store_upload(UploadFile(io.BytesIO(b"#!/bin/sh"), filename="run.sh"), LocalStorage(str(tmp_path)))
+    assert exc.value.status_code == 415
+
+
+def test_render_variants(tmp_path):
+    source = tmp_path / "src.png"
+    source.write_bytes(png_bytes())
+
+    rendered = avatars.render_variants(str(source), str(tmp_path), "abc", (64, 256), ("webp", "jpeg"))
+
+    assert rendered == {
+        "64.webp": "abc_64.webp", "64.jpeg": "abc_64.jpg",
+        "256.webp": "abc_256.webp", "256.jpeg": "abc_256.jpg",
+    }
+    with Image.open(tmp_path / "abc_256.webp") as image:
+        assert image.size == (256, 256)
+        assert image.format == "WEBP"
+
+
+def test_avatar_url_switches_to_processed_variant():
+    email = f"avatar_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "AdminPass123", role="admin")
+
+    with TestClient(app) as client:
+        headers = get_auth_header(email, "AdminPass123")
+        files = {"file": ("avatar.png", io.BytesIO(png_bytes(color=(1, 2, 3))), "image/png")}
+        response = client.post("/users/avatar", files=files, headers=headers)
+
+        assert response.status_code == 200
+        original = response.json()["avatar_url"]
+        digest = os.path.basename(original).split(".")[0]
+        assert original == f"/static/avatars/{digest}.png"
+
+        expected = f"/static/avatars/{digest}_256.webp"
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            db = SessionLocal()
+            try:
+                current = crud.get_user_by_email(db, email).avatar_url
+            finally:
+                db.close()
+            if current == expected:
+                break
+            time.sleep(0.2)
+
+        assert current == expected
+        assert os.path.exists(os.path.join(AVATAR_STORAGE_PATH, f"{digest}_64.jpg"))
+        assert client.get(expected).status_code == 200
+
+
+def test_avatar_upload_over_cap_is_rejected(monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", 1024)
+    email = f"avatar_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "AdminPass123", role="admin")
+    client = TestClient(app)
+    headers = get_auth_header(email, "AdminPass123")
+
+    files = {"file": ("avatar.png", io.BytesIO(b"x" * 64 * 1024), "image/png")}
+    response = client.post("/users/avatar", files=files, headers=headers)
+
+    assert response.status_code == 413
+
+
+async def test_chunked_upload_is_cut_off_at_the_cap(monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", 1024)
+    chunks = [b'--b\r\nContent-Disposition: form-data; name="file"; filename="avatar.png"\r\n\r\n']
+    chunks += [b"x" * 64 * 1024] * 1000
+    received = []
+
+    async def receive():
+        # No Content-Length: the body arrives in chunks of unknown total size
+        received.append(chunks[len(received)])
+        return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(chunks)}
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/users/avatar",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=b")],
+    }
+    with pytest.raises(HTTPException) as exc:
+        await avatars.read_upload(Request(scope, receive))
+
+    assert exc.value.status_code == 413
+    assert len(received) == 2
+
+
+async def test_processing_tolerates_a_missing_source(tmp_path, monkeypatch):
+    processor = avatars.AvatarProcessor(storage=LocalStorage(str(tmp_path)))
+    monkeypatch.setattr(processor, "start", lambda: None)  # no executor: rendering fails
+    avatar = avatars.StoredAvatar("d" * 32, "missing.png", "/media/missing.png", str(tmp_path / "gone.png"))
+
+    assert await processor.process(1, avatar) is None
+
+
+def test_spooled_upload_is_removed_when_the_update_fails(monkeypatch):
+    email = f"avatar_{uuid.uuid4().hex[:8]}@example.com"
+    create_user_in_db(email, "AdminPass123", role="admin")
+    stored = []
+    store_upload = avatars.store_upload
+
+    async def recording_store_upload(file):
+        avatar = await store_upload(file)
+        stored.append(avatar)
+        return avatar
+
+    def failing_update(*args):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(avatars, "store_upload", recording_store_upload)
+    monkeypatch.setattr(crud, "update_avatar", failing_update)
+    client = TestClient(app, raise_server_exceptions=False)
+    headers = get_auth_header(email, "AdminPass123")
+
+    files = {"file": ("avatar.png", io.BytesIO(png_bytes(color=(4, 5, 6))), "image/png")}
+    response = client.post("/users/avatar", files=files, headers=headers)
+
+    assert response.status_code == 500
+    assert not os.path.exists(stored[0].source)
@@ -0,0 +1,124 @@
+import uuid
+from datetime import date
+
+import pytest
+from redis import asyncio as aioredis
+
+from app.database import crud
+from app.database.models import Contact
+from app.database.schemas import ContactCreate, ContactUpdate, UserCreate
+from app.services import birthday_digest
+from app.services.auth import create_access_token
+
+
+def clear_day(today: date) -> None:
+    # User ids are reused across runs on a shared Redis, so per-user entries go too
+    keys = list(birthday_digest._redis.scan_iter(f"{birthday_digest.KEY_PREFIX}{today.isoformat()}:*"))
+    if keys:
+        birthday_digest._redis.delete(*keys)
+
+
+@pytest.fixture
+def fresh_day():
+    today = date.today()
+    clear_day(today)
+    yield today
+    clear_day(today)
+
+
+def add_contact(db, user, birthday, first_name="Digest"):
+    return crud.create_contact(db, ContactCreate(
+        first_name=first_name,
+        last_name="Contact",
+        email=f"digest_{uuid.uuid4().hex[:8]}@example.com",
+        phone="1",
+        birthday=birthday,
+    ), user.id)
+
+
+def test_digest_missing_until_built(user, fresh_day):
+    assert birthday_digest.get_digest(user.id, fresh_day) is None
+
+
+def test_daily_job_stores_each_users_birthdays(db, user, fresh_day):
+    contact = add_contact(db, user, fresh_day.replace(year=1990))
+    other = crud.create_user(db, UserCreate(
+        username=f"digest_{uuid.uuid4().hex[:8]}",
+        email=f"digest_{uuid.uuid4().hex[:8]}@example.com",
+        password="DigestPass123",
+    ))
+
+    birthday_digest.run_daily_job(fresh_day)
+
+    assert [c["id"] for c in birthday_digest.get_digest(user.id, fresh_day)] == [contact.id]
+    assert birthday_digest.get_digest(other.id, fresh_day) == []
+
+
+def test_contact_changes_refresh_the_users_entry(db, user, fresh_day):
+    birthday_digest.run_daily_job(fresh_day)
+    assert birthday_digest.get_digest(user.id, fresh_day) == []
+
+    contact = add_contact(db, user, fresh_day.replace(year=1991))
+    assert [c["id"] for c in birthday_digest.get_digest(user.id, fresh_day)] == [contact.id]
+
+    crud.update_contact(db, contact.id, ContactUpdate(first_name="Renamed"), user.id)
+    assert birthday_digest.get_digest(user.id, fresh_day)[0]["first_name"] == "Renamed"
+
+    crud.delete_contact(db, contact.id, user.id)
+    assert birthday_digest.get_digest(user.id, fresh_day) == []
+
+
+def test_dropped_day_ignores_stale_user_entries(db, user, fresh_day):
+    add_contact(db, user, fresh_day.replace(year=1993))
+    birthday_digest.run_daily_job(fresh_day)
+
+    # What a failed refresh does: only the ready marker goes, the user's entry stays behind
+    birthday_digest._drop_day(fresh_day)
+
+    assert birthday_digest._redis.exists(birthday_digest.user_key(fresh_day, user.id))
+    assert birthday_digest.get_digest(user.id, fresh_day) is None
+
+
+def test_change_during_the_daily_pass_is_not_overwritten(db, user, fresh_day, monkeypatch):
+    # The pass is running: refresh_user only marks the user
+    birthday_digest._redis.set(birthday_digest.lock_key(fresh_day), 1, ex=60)
+    contact = add_contact(db, user, fresh_day.replace(year=1994))
+    assert birthday_digest._redis.sismember(birthday_digest.dirty_key(fresh_day), user.id)
+
+    # The pass read its snapshot before the contact existed
+    query = birthday_digest.upcoming_birthdays_query
+    monkeypatch.setattr(
+        birthday_digest, "upcoming_birthdays_query",
+        lambda *args: query(*args).where(Contact.user_id != user.id),
+    )
+    birthday_digest.compute_all(db, fresh_day)
+
+    assert [c["id"] for c in birthday_digest.get_digest(user.id, fresh_day)] == [contact.id]
+    assert not birthday_digest._redis.exists(birthday_digest.dirty_key(fresh_day))
+
+
+async def test_async_refresh_failure_drops_the_day_without_blocking(fresh_day, monkeypatch):
+    birthday_digest._redis.set(birthday_digest.ready_key(fresh_day), 1)
+    monkeypatch.setattr(birthday_digest, "_drop_day", None)
+    dropped = []
+
+    async def adrop_day(today):
+        dropped.append(today)
+
+    monkeypatch.setattr(birthday_digest, "_adrop_day", adrop_day)
+    monkeypatch.setattr(birthday_digest, "_get_async_redis", lambda: aioredis.Redis(port=1, socket_connect_timeout=0.1))
+
+    await birthday_digest.arefresh_user(None, 1, fresh_day)
+
+    assert dropped == [fresh_day]
+
+
+def test_endpoint_serves_digest(db, user, fresh_day, test_client):
+    add_contact(db, user, fresh_day.replace(year=1992), first_name="FromDigest")
+    birthday_digest.run_daily_job(fresh_day)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+    response = test_client.get("/contacts/upcoming_birthdays/", headers=headers)
+
+    assert response.status_code == 200
+    assert [c["first_name"] for c in response.json()] == ["FromDigest"]
@@ -0,0 +1,56 @@
+import uuid
+from datetime import date
+
+from app.database import crud
+from app.database.models import birthday_day_of_year
+from app.database.schemas import ContactCreate, ContactUpdate
+from app.services.utils import get_upcoming_birthdays
+
+
+def add_contact(db, user, birthday):
+    return crud.create_contact(db, ContactCreate(
+        first_name="B",
+        last_name=str(birthday),
+        email=f"bday_{uuid.uuid4().hex[:8]}@example.com",
+        phone="1",
+        birthday=birthday,
+    ), user.id)
+
+
+def test_day_of_year_is_leap_year_normalized():
+    assert birthday_day_of_year(date(1999, 2, 28)) == 59
+    assert birthday_day_of_year(date(2000, 2, 29)) == 60
+    assert birthday_day_of_year(date(1999, 3, 1)) == 61
+    assert birthday_day_of_year(date(2000, 3, 1)) == 61
+    assert birthday_day_of_year(date(1985, 12, 31)) == 366
+    assert birthday_day_of_year(None) is None
+
+
+def test_birthday_doy_maintained_on_update(db, user):
+    contact = add_contact(db, user, date(1990, 1, 15))
+    assert contact.birthday_doy == 15
+
+    updated = crud.update_contact(db, contact.id, ContactUpdate(birthday=date(1990, 2, 1)), user.id)
+    assert updated.birthday_doy == 32
+
+
+def test_upcoming_birthdays_wraps_year_end(db, user):
+    add_contact(db, user, date(1980, 12, 30))
+    add_contact(db, user, date(1981, 1, 3))
+    add_contact(db, user, date(1982, 1, 20))
+    add_contact(db, user, date(1983, 12, 1))
+
+    found = get_upcoming_birthdays(db, user.id, days=7, today=date(2025, 12, 28))
+
+    assert [c.birthday for c in found] == [date(1980, 12, 30), date(1981, 1, 3)]
+
+
+def test_upcoming_birthdays_window_is_configurable(db, user):
+    add_contact(db, user, date(1990, 3, 10))
+    add_contact(db, user, date(1990, 5, 2))
+
+    today = date(2025, 3, 1)
+
+    assert len(get_upcoming_birthdays(db, user.id, days=7, today=today)) == 0
+    assert len(get_upcoming_birthdays(db, user.id, days=10, today=today)) == 1
+    assert len(get_upcoming_birthdays(db, user.id, days=90, today=today)) == 2
@@ -1,5 +1,8 @@
+import json
+
 import pytest
 from unittest.mock import patch
+from app.services import email
 from app.services.email import send_email
 
 @patch("app.services.email.requests.post")
@@ -26,3 +29,30 @@ def test_send_email_failure(mock_post):
     send_email(subject, to_email, body)
 
     mock_post.assert_called_once()
+
+
+async def test_send_batch_groups_recipients(fake_mailgun):
+    recipients = {f"user{i}@example.com": {"name": f"User {i}"} for i in range(2500)}
+
+    report = await email.send_batch_async("Hello", "Hi %recipient.name%", recipients)
+
+    assert report.requests == 3
+    assert len(report.sent) == 2500
+    assert report.failed == {}
+    assert sorted(len(r["form"]["to"]) for r in fake_mailgun.requests) == [500, 1000, 1000]
+    variables = json.loads(fake_mailgun.requests[0]["form"]["recipient-variables"][0])
+    assert variables[fake_mailgun.requests[0]["form"]["to"][0]]["name"].startswith("User ")
+    # The shared pool keeps connections alive instead of opening one per request
+    assert len(fake_mailgun.connections) <= email.MAILGUN_BATCH_CONCURRENCY
+
+
+async def test_send_batch_reports_failed_recipients(fake_mailgun):
+    fake_mailgun.statuses = [500]
+    recipients = {"ok@example.com": {}, "not-an-email": {}}
+
+    report = await email.send_batch_async("Hello", "Hi", recipients, batch_size=1)
+
+    assert report.requests == 1
+    assert report.sent == []
+    assert set(report.failed) == {"ok@example.com", "not-an-email"}
+    assert report.failed["ok@example.com"].startswith("Mailgun 500")
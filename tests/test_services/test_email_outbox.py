@@ -0,0 +1,140 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import Base, SessionLocal
+from app.database import crud
+from app.database.models import EmailOutbox
+from app.services import email, email_outbox
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+async def client():
+    async with email_outbox.create_client() as client:
+        yield client
+
+
+def get_message(session_factory, message_id):
+    with session_factory() as db:
+        return db.get(EmailOutbox, message_id)
+
+
+def enqueue(session_factory, to_email="outbox@example.com"):
+    with session_factory() as db:
+        return crud.enqueue_email(db, "Subject", to_email, "Body").id
+
+
+async def test_worker_sends_pending_email(fake_mailgun, session_factory, client):
+    message_id = enqueue(session_factory)
+
+    assert await email_outbox.process_batch(client, session_factory) == 1
+
+    request = fake_mailgun.requests[0]
+    assert request["path"].endswith("/messages")
+    assert request["form"]["to"] == ["outbox@example.com"]
+    assert request["form"]["subject"] == ["Subject"]
+    message = get_message(session_factory, message_id)
+    assert message.status == "sent"
+    assert message.attempts == 1
+    assert await email_outbox.process_batch(client, session_factory) == 0
+
+
+async def test_server_error_is_retried_with_backoff(fake_mailgun, session_factory, client):
+    fake_mailgun.statuses = [503]
+    message_id = enqueue(session_factory)
+
+    await email_outbox.process_batch(client, session_factory)
+
+    message = get_message(session_factory, message_id)
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert "503" in message.last_error
+    # Not due yet, so the next poll leaves it alone
+    assert await email_outbox.process_batch(client, session_factory) == 0
+
+    later = datetime.now(timezone.utc) + email_outbox.retry_delay(1) + timedelta(seconds=1)
+    assert await email_outbox.process_batch(client, session_factory, now=later) == 1
+    assert get_message(session_factory, message_id).status == "sent"
+
+
+async def test_client_error_goes_to_dead_letter(fake_mailgun, session_factory, client):
+    fake_mailgun.statuses = [400]
+    message_id = enqueue(session_factory)
+
+    await email_outbox.process_batch(client, session_factory)
+
+    assert get_message(session_factory, message_id).status == "dead"
+    with session_factory() as db:
+        assert email_outbox.requeue_dead(db) == 1
+    await email_outbox.process_batch(client, session_factory)
+    assert get_message(session_factory, message_id).status == "sent"
+
+
+async def test_exhausted_retries_go_to_dead_letter(fake_mailgun, session_factory, client, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 2)
+    fake_mailgun.statuses = [500, 500]
+    message_id = enqueue(session_factory)
+
+    await email_outbox.process_batch(client, session_factory)
+    later = datetime.now(timezone.utc) + timedelta(days=1)
+    await email_outbox.process_batch(client, session_factory, now=later)
+
+    message = get_message(session_factory, message_id)
+    assert message.status == "dead"
+    assert message.attempts == 2
+    assert len(fake_mailgun.requests) == 2
+
+
+async def test_unreachable_mailgun_is_retried(session_factory, client, monkeypatch):
+    monkeypatch.setattr(email, "MAILGUN_API_BASE", "http://127.0.0.1:9/v3")
+    message_id = enqueue(session_factory)
+
+    await email_outbox.process_batch(client, session_factory)
+
+    message = get_message(session_factory, message_id)
+    assert message.status == "pending"
+    assert message.last_error.startswith("ConnectError")
+
+
+async def test_missing_mailgun_settings_count_as_attempts(session_factory, client, monkeypatch):
+    monkeypatch.setattr(email, "MAILGUN_API_KEY", None)
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 2)
+    message_id = enqueue(session_factory)
+
+    await email_outbox.process_batch(client, session_factory)
+    message = get_message(session_factory, message_id)
+    assert (message.status, message.attempts) == ("pending", 1)
+    assert "Mailgun" in message.last_error
+
+    later = datetime.now(timezone.utc) + timedelta(days=1)
+    await email_outbox.process_batch(client, session_factory, now=later)
+    assert get_message(session_factory, message_id).status == "dead"
+
+
+def test_signup_enqueues_verification_email(test_client):
+    unique = uuid.uuid4().hex[:8]
+    response = test_client.post("/auth/signup", json={
+        "username": f"outbox_{unique}",
+        "email": f"outbox_{unique}@example.com",
+        "password": "OutboxPass123",
+    })
+
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        message = db.scalars(
+            select(EmailOutbox).where(EmailOutbox.to_email == f"outbox_{unique}@example.com")
+        ).one()
+    assert message.status == "pending"
+    assert "/auth/verify/" in message.body
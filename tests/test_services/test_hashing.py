@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import hashing
+from app.services.hashing import HashingBusyError, PasswordHasher
+from app.services.security import hash_password
+
+
+@pytest.fixture
+def pool_hasher():
+    hasher = PasswordHasher(workers=1, max_queue=4)
+    yield hasher
+    hasher.shutdown()
+
+
+async def test_process_pool_hash_and_verify(pool_hasher):
+    hashed = await pool_hasher.hash("PoolPass123")
+
+    assert await pool_hasher.verify("PoolPass123", hashed)
+    assert not await pool_hasher.verify("WrongPass123", hashed)
+    assert pool_hasher.pending == 0
+
+
+async def test_thread_fallback_verifies_existing_hash():
+    hasher = PasswordHasher(workers=0, max_queue=4)
+
+    assert await hasher.verify("ThreadPass123", hash_password("ThreadPass123"))
+
+
+async def test_full_queue_is_rejected_immediately():
+    hasher = PasswordHasher(workers=0, max_queue=1)
+    first = asyncio.create_task(hasher.hash("QueuedPass123"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HashingBusyError):
+        await hasher.hash("RejectedPass123")
+
+    await first
+    assert hasher.pending == 0
+
+
+async def test_busy_hasher_maps_to_503(monkeypatch):
+    monkeypatch.setattr(hashing, "password_hasher", PasswordHasher(workers=0, max_queue=0))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await hashing.verify_password_async("AnyPass123", "hash")
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
@@ -0,0 +1,74 @@
+import pytest
+
+from app.database import crud
+from app.services import auth
+from app.services.auth import Principal, create_access_token
+from app.services.response_cache import response_cache
+from app.services.token_versions import token_versions
+from app.services.user_cache import user_cache
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_MODE", "stateless")
+
+
+def bearer(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data=auth.access_token_data(user))}"}
+
+
+def test_stateless_contacts_call_skips_user_lookup(test_client, user, stateless, assert_max_queries, monkeypatch):
+    monkeypatch.setattr(user_cache, "enabled", False)
+    # The second call would otherwise be answered from the response cache without any query
+    monkeypatch.setattr(response_cache, "enabled", False)
+    headers = bearer(user)
+    test_client.get("/contacts/", headers=headers)
+
+    with assert_max_queries(1) as log:
+        response = test_client.get("/contacts/", headers=headers)
+
+    assert response.status_code == 200
+    assert "FROM contacts" in log.statements[0][0]
+
+
+def test_stateful_contacts_call_loads_user(test_client, user, assert_max_queries, monkeypatch):
+    monkeypatch.setattr(user_cache, "enabled", False)
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+    with assert_max_queries(2) as log:
+        response = test_client.get("/contacts/", headers=bearer(user))
+
+    assert response.status_code == 200
+    assert log.count == 2
+    assert "FROM users" in log.statements[0][0]
+
+
+def test_cold_version_is_loaded_once(db, user, stateless, assert_max_queries):
+    token_versions.redis.delete(f"token_version:{user.id}")
+    token_versions.local.clear()
+    token = create_access_token(data=auth.access_token_data(user))
+    with assert_max_queries(1) as log:
+        first = auth.get_current_principal(token, db)
+        second = auth.get_current_principal(token, db)
+
+    assert first == second == Principal(user.id, user.email, "user", 0)
+    assert log.count == 1
+    assert token_versions.get(user.id) == 0
+
+
+@pytest.mark.parametrize("mode", ["stateful", "stateless"])
+def test_password_change_invalidates_old_tokens(test_client, db, user, mode, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_MODE", mode)
+    headers = bearer(user)
+    assert test_client.get("/contacts/", headers=headers).status_code == 200
+
+    new_headers = bearer(crud.update_user_password(db, user.email, "ChangedPass123"))
+
+    assert test_client.get("/contacts/", headers=headers).status_code == 401
+    assert test_client.get("/contacts/", headers=new_headers).status_code == 200
+
+
+def test_tokens_without_stateless_claims_fall_back_to_user_lookup(test_client, user, stateless):
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+    assert test_client.get("/contacts/", headers=headers).status_code == 200
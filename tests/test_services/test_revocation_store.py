@@ -0,0 +1,104 @@
+import time
+import uuid
+
+import pytest
+
+from app.services import revocation
+from app.services.revocation import BloomFilter, RevocationStore
+
+
+@pytest.fixture
+def store():
+    return RevocationStore(capacity=1000, error_rate=0.01, sync_interval=60)
+
+
+def claims(sub="store@example.com", **extra) -> dict:
+    return {"sub": sub, "jti": uuid.uuid4().hex, "iat": time.time(), "exp": time.time() + 60, **extra}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    items = [uuid.uuid4().hex for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+def test_unrevoked_token_never_reaches_redis(store):
+    store.sync()
+
+    assert store.is_revoked(claims()) is False
+    assert store.stats()["bloom_negatives"] == 1
+    assert store.stats()["redis_checks"] == 0
+
+
+def test_revoked_jti_is_rejected_once(store):
+    store.sync()
+    token = claims()
+
+    assert store.revoke_claims(token) is True
+    assert store.revoke_claims(token) is False
+    assert store.is_revoked(token) is True
+    assert store.stats()["redis_checks"] == 1
+
+
+def test_other_workers_see_revocations_after_sync(store):
+    other_worker = RevocationStore(capacity=1000, error_rate=0.01, sync_interval=60)
+    store.sync()
+    other_worker.sync()
+    token = claims()
+
+    other_worker.revoke_claims(token)
+    assert store.is_revoked(token) is False
+
+    store.sync()
+    assert store.is_revoked(token) is True
+
+
+async def test_user_revocation_cuts_off_older_tokens(store):
+    store.sync()
+    subject = f"store_{uuid.uuid4().hex[:8]}@example.com"
+    old_token = claims(sub=subject)
+
+    await store.arevoke_user(subject, 60)
+    new_token = claims(sub=subject)
+
+    assert await store.ais_revoked(old_token) is True
+    assert await store.ais_revoked(new_token) is False
+
+
+def test_sync_reads_only_new_revocations(store, monkeypatch):
+    monkeypatch.setattr(revocation, "CLOCK_SKEW", 0)
+    other_worker = RevocationStore(capacity=1000, error_rate=0.01, sync_interval=60)
+    store.sync()
+    store.sync()
+    token = claims()
+
+    other_worker.revoke_claims(token)
+    # Only the log since the last sync is read, not every revoked member
+    assert store.sync() == 1
+    assert store.is_revoked(token) is True
+    assert store.stats()["rebuilds"] == 1
+    assert store.stats()["incremental_syncs"] == 2
+
+
+def test_full_rebuild_runs_on_its_interval():
+    store = RevocationStore(capacity=1000, error_rate=0.01, sync_interval=60, rebuild_interval=0.05)
+    store.sync()
+    store.sync()
+    time.sleep(0.1)
+    store.sync()
+
+    assert store.stats()["rebuilds"] == 2
+    assert store.stats()["incremental_syncs"] == 1
+
+
+def test_full_filter_is_rebuilt(store):
+    store.sync()
+    store.bloom.count = store.bloom.capacity + 1
+    store.sync()
+
+    assert store.stats()["rebuilds"] == 2
@@ -0,0 +1,78 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config import SessionLocal
+from app.services.sql_profiler import QueryLog, SQLProfilerMiddleware, capture_queries, statement_shape
+
+
+def test_statement_shape_ignores_parameters_and_literals():
+    assert statement_shape("SELECT * FROM contacts\n WHERE id = ?") == "SELECT * FROM contacts WHERE id = ?"
+    assert statement_shape("SELECT * FROM contacts WHERE id = 42") == statement_shape("SELECT * FROM contacts WHERE id = 7")
+    assert statement_shape("SELECT 1 WHERE name = 'Ann'") == statement_shape("SELECT 1 WHERE name = 'Bob'")
+    assert (
+        statement_shape("SELECT * FROM users WHERE id IN (?, ?, ?)")
+        == statement_shape("SELECT * FROM users WHERE id IN (?)")
+        == "SELECT * FROM users WHERE id IN (...)"
+    )
+
+
+def test_repeated_selects_are_flagged():
+    log = QueryLog()
+    for contact_id in range(3):
+        log.record(f"SELECT * FROM users WHERE id = {contact_id}", 0.001)
+    log.record("SELECT * FROM contacts", 0.001)
+    for _ in range(5):
+        log.record("UPDATE contacts SET first_name = ?", 0.001)
+
+    assert log.repeated(threshold=3) == {"SELECT * FROM users WHERE id = ?": 3}
+    assert log.repeated(threshold=4) == {}
+    assert "possible N+1: 3x" in log.summary(threshold=3)
+
+
+def test_capture_queries_sees_every_statement():
+    db = SessionLocal()
+    try:
+        with capture_queries() as log:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+    finally:
+        db.close()
+    assert log.count == 2
+    assert [statement for statement, _ in log.statements] == ["SELECT 1", "SELECT 2"]
+
+
+def profiled_app(mode: str) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/lookups/{n}")
+    def lookups(n: int):
+        db = SessionLocal()
+        try:
+            for i in range(n):
+                db.execute(text("SELECT :i"), {"i": i})
+        finally:
+            db.close()
+        return {"n": n}
+
+    app.add_middleware(SQLProfilerMiddleware, mode=mode)
+    return TestClient(app)
+
+
+def test_header_mode_profiles_only_when_asked():
+    client = profiled_app("header")
+
+    assert "X-SQL-Count" not in client.get("/lookups/1").headers
+
+    response = client.get("/lookups/1", headers={"X-SQL-Profile": "1"})
+    assert response.headers["X-SQL-Count"] == "1"
+    assert response.headers["X-SQL-N-Plus-One"] == "0"
+    assert float(response.headers["X-SQL-Time-Ms"]) >= 0
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_always_mode_flags_n_plus_one():
+    response = profiled_app("always").get("/lookups/5")
+
+    assert response.headers["X-SQL-Count"] == "5"
+    assert response.headers["X-SQL-N-Plus-One"] == "1"
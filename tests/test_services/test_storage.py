@@ -0,0 +1,135 @@
+import asyncio
+import io
+import json
+import os
+import socket
+import uuid
+
+import httpx
+import pytest
+from PIL import Image
+from moto.server import ThreadedMotoServer
+from starlette.datastructures import UploadFile
+
+from app.database import crud
+from app.services import avatars
+from app.services.storage import CACHE_CONTROL, LocalStorage, S3Storage, create_storage
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    # moto in server mode speaks the S3 HTTP API, like a local MinIO would
+    port = free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def s3(s3_endpoint):
+    bucket = f"avatars-{uuid.uuid4().hex[:8]}"
+    storage = S3Storage(
+        bucket=bucket,
+        endpoint_url=s3_endpoint,
+        access_key="test",
+        secret_key="test",
+        public_url=f"{s3_endpoint}/{bucket}",
+        part_size=5 * 1024 * 1024,
+    )
+    storage.client.create_bucket(Bucket=bucket)
+    # A public-read bucket, so the stored URLs work without credentials
+    storage.client.put_bucket_policy(Bucket=bucket, Policy=json.dumps({
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Effect": "Allow", "Principal": "*", "Action": "s3:GetObject",
+            "Resource": f"arn:aws:s3:::{bucket}/*",
+        }],
+    }))
+    return storage
+
+
+def test_local_storage_put_and_url(tmp_path):
+    source = tmp_path / "source.png"
+    source.write_bytes(b"png")
+    storage = LocalStorage(str(tmp_path / "avatars"), "/static/avatars/")
+
+    storage.put("abc.png", str(source))
+
+    assert storage.exists("abc.png")
+    assert (tmp_path / "avatars" / "abc.png").read_bytes() == b"png"
+    assert source.exists()
+    assert storage.url("abc.png") == "/static/avatars/abc.png"
+    storage.delete("abc.png")
+    assert not storage.exists("abc.png")
+
+
+def test_s3_storage_multipart_upload_and_public_url(s3, tmp_path):
+    source = tmp_path / "big.png"
+    content = os.urandom(11 * 1024 * 1024)
+    source.write_bytes(content)
+
+    s3.put("big.png", str(source))
+
+    head = s3.client.head_object(Bucket=s3.bucket, Key="avatars/big.png")
+    # Three 5 MB parts, so the upload went through multipart
+    assert head["ETag"].strip('"').endswith("-3")
+    assert head["ContentType"] == "image/png"
+    assert head["CacheControl"] == CACHE_CONTROL
+
+    response = httpx.get(s3.url("big.png"))
+    assert response.status_code == 200
+    assert response.content == content
+
+
+def test_s3_storage_public_url(s3_endpoint):
+    storage = S3Storage(endpoint_url=s3_endpoint, access_key="test", secret_key="test",
+                        public_url="https://cdn.example.com/")
+    assert storage.url("abc_256.webp") == "https://cdn.example.com/avatars/abc_256.webp"
+
+
+def test_s3_storage_requires_public_url(s3_endpoint):
+    with pytest.raises(ValueError, match="AVATAR_S3_PUBLIC_URL"):
+        S3Storage(endpoint_url=s3_endpoint, access_key="test", secret_key="test", public_url=None)
+
+
+def test_s3_storage_exists(s3, tmp_path):
+    source = tmp_path / "a.webp"
+    source.write_bytes(b"webp")
+    assert not s3.exists("a.webp")
+    s3.put("a.webp", str(source))
+    assert s3.exists("a.webp")
+
+
+def test_create_storage_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_storage("ftp")
+
+
+async def test_avatar_pipeline_with_s3(s3, db, user):
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 240), (10, 200, 10)).save(buffer, "PNG")
+    buffer.seek(0)
+
+    avatar = await avatars.store_upload(UploadFile(buffer, filename="avatar.png"), s3)
+    crud.update_avatar(db, crud.get_user_by_id(db, user.id), avatar.url)
+    processor = avatars.AvatarProcessor(workers=1, storage=s3)
+    try:
+        new_url = await processor.process(user.id, avatar)
+    finally:
+        processor.shutdown()
+
+    assert new_url is not None and f"avatars/{avatar.digest}_256.webp" in new_url
+    assert s3.exists(f"{avatar.digest}_64.jpg")
+    assert not os.path.exists(avatar.source)
+    db.expire_all()
+    assert crud.get_user_by_id(db, user.id).avatar_url == new_url
+    response = await asyncio.to_thread(httpx.get, new_url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
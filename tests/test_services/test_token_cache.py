@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from jose import JWTError
+
+from app.services import auth
+from app.services.token_cache import TokenCache
+
+
+class CountingDecoder:
+    def __init__(self, claims=None):
+        self.calls = 0
+        self.claims = claims or {}
+
+    def __call__(self, token: str) -> dict:
+        self.calls += 1
+        if token == "bad":
+            raise JWTError("Signature verification failed")
+        return {"sub": f"{token}@example.com", "exp": time.time() + 3600, **self.claims}
+
+
+def test_warm_decode_skips_verification():
+    decoder = CountingDecoder()
+    cache = TokenCache(decoder, maxsize=10, ttl=60, enabled=True)
+
+    first = cache.decode("token")
+    second = cache.decode("token")
+
+    assert first == second
+    assert decoder.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entry_never_outlives_token_exp():
+    decoder = CountingDecoder()
+    cache = TokenCache(decoder, maxsize=10, ttl=60, enabled=True)
+    decoder.claims = {"exp": time.time() + 0.05}
+
+    cache.decode("short")
+    time.sleep(0.1)
+    cache.decode("short")
+
+    assert decoder.calls == 2
+    assert cache.stats()["expired"] == 1
+
+
+def test_invalid_tokens_are_not_cached():
+    decoder = CountingDecoder()
+    cache = TokenCache(decoder, maxsize=10, ttl=60, enabled=True)
+
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            cache.decode("bad")
+
+    assert decoder.calls == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    decoder = CountingDecoder()
+    cache = TokenCache(decoder, maxsize=2, ttl=60, enabled=True)
+
+    cache.decode("a")
+    cache.decode("b")
+    cache.decode("a")
+    cache.decode("c")
+
+    assert cache.stats()["evictions"] == 1
+    cache.decode("a")
+    assert decoder.calls == 3
+
+
+def test_revocation_hooks_evict_entries():
+    decoder = CountingDecoder()
+    cache = TokenCache(decoder, maxsize=10, ttl=60, enabled=True)
+    cache.decode("a")
+    decoder.claims = {"sub": "shared@example.com"}
+    cache.decode("b")
+    cache.decode("c")
+
+    assert cache.evict("a") is True
+    assert cache.evict("a") is False
+    assert cache.evict_subject("shared@example.com") == 2
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["revoked"] == 3
+
+
+def test_auth_reuses_verified_access_token():
+    token = auth.create_access_token(data={"sub": "token_cache@example.com"})
+    hits = auth.token_cache.hits
+
+    assert auth.get_token_subject(token) == "token_cache@example.com"
+    assert auth.get_token_subject(token) == "token_cache@example.com"
+
+    assert auth.token_cache.hits == hits + 1
+    assert auth.verify_refresh_token(token) is None
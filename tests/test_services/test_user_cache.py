@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+
+from app.database import crud
+from app.services.auth import access_token_data, create_access_token, get_current_user
+from app.services.user_cache import UserCache, user_cache
+
+
+def test_warm_cache_skips_database(db, user, assert_max_queries):
+    token = create_access_token(data={"sub": user.email})
+
+    with assert_max_queries(1) as log:
+        cold = get_current_user(token, db)
+    assert cold.id == user.id
+    assert log.count == 1
+
+    hits_before = user_cache.stats()["hits"]
+    with assert_max_queries(0):
+        warm = get_current_user(token, db)
+
+    assert user_cache.stats()["hits"] == hits_before + 1
+    assert warm.id == user.id
+    assert warm.email == user.email
+    assert warm.role == user.role
+    assert warm.password_hash is None
+
+
+def test_password_reset_invalidates_cache(db, user, assert_max_queries):
+    token = create_access_token(data={"sub": user.email})
+    get_current_user(token, db)
+
+    updated = crud.update_user_password(db, user.email, "NewCachePass123")
+    misses_before = user_cache.stats()["misses"]
+    # A token without "ver" counts as version 0, which the password change has bumped
+    with assert_max_queries(1) as log, pytest.raises(HTTPException):
+        get_current_user(token, db)
+
+    assert log.count == 1
+    assert user_cache.stats()["misses"] == misses_before + 1
+    get_current_user(create_access_token(data=access_token_data(updated)), db)
+
+
+def test_local_tier_serves_repeat_reads(db, user):
+    cache = UserCache(local_size=8, local_ttl=60)
+    db_user = crud.get_user_by_email(db, user.email)
+    cache.set(db_user)
+    cache.redis.delete("user:" + user.email)
+
+    cached = cache.get(user.email)
+
+    assert cached is not None and cached.id == user.id
+    assert cache.stats()["local_hits"] == 1
+
+    cache.invalidate(user.email)
+    assert cache.get(user.email) is None
+    assert cache.stats()["misses"] == 1